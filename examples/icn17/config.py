@@ -25,9 +25,39 @@ CACHING_GRANULARITY = 'OBJECT'
 
 # Format in which results are saved.
 # Result readers and writers are located in module ./icarus/results/readwrite.py
-# Currently only PICKLE is supported 
+# Supported formats are PICKLE, LOG and NPZ. NPZ stores scalar metrics as
+# columns and other metrics in chunks which can be read separately
 RESULTS_FORMAT = 'PICKLE'
 
+# Directory where topologies and their shortest paths are cached on disk
+# so that experiments on the same topology do not regenerate them.
+# Uncomment to enable
+# TOPOLOGY_CACHE_DIR = 'topology_cache'
+
+# If True, topologies and shortest paths are built once for each distinct
+# topology specification before launching experiments and shared by all
+# experiments (and worker processes) using them
+PREPARE_TOPOLOGIES = False
+
+# If True, warm-up requests are executed by a stripped network controller
+# which only updates caches and RSN tables, without reporting any event
+FAST_WARMUP = False
+
+# Directory where the state of the network after warm-up is saved, so that
+# experiments differing only in the measured strategy restore it instead of
+# running the warm-up again. Each replication has its own snapshot. Only used
+# with LRU and FIFO cache policies, whose state is restored exactly, and with
+# seeded workloads. Uncomment to enable
+# WARMUP_SNAPSHOT_DIR = 'warmup_snapshots'
+
+# If True, experiments differing only in the strategy used after warm-up are
+# grouped: the warm-up is executed once per group and a child process is then
+# forked for each experiment (requires os.fork, i.e. a POSIX system)
+FORK_AFTER_WARMUP = False
+
+# Maximum number of child processes forked at the same time for each group
+FORK_MAX_CHILDREN = 1
+
 # Number of times each experiment is replicated
 # This is necessary for extracting confidence interval of selected metrics
 N_REPLICATIONS = 1
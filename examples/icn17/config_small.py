@@ -25,7 +25,8 @@ CACHING_GRANULARITY = 'OBJECT'
 
 # Format in which results are saved.
 # Result readers and writers are located in module ./icarus/results/readwrite.py
-# Currently only PICKLE is supported 
+# Supported formats are PICKLE, LOG and NPZ. NPZ stores scalar metrics as
+# columns and other metrics in chunks which can be read separately
 RESULTS_FORMAT = 'PICKLE'
 
 # Number of times each experiment is replicated
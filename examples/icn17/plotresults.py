@@ -10,6 +10,7 @@ import sys #Onur
 import matplotlib.pyplot as plt
 
 from icarus.registry import RESULTS_READER
+from icarus.results import ResultSet
 from icarus.results.plot import plot_bar_chart, plot_lines
 
 
@@ -859,8 +860,12 @@ def searchDict(lst, category, attr_value_pairs, num_pairs, collector, subtype):
 
     Returns the result if found in the dictionary lst; otherwise returns None
 
+    If lst is a ResultSet and all attribute-value pairs must match, the search
+    uses its index rather than scanning all results.
     """
     result = None
+    if isinstance(lst, ResultSet) and num_pairs == len(attr_value_pairs):
+        lst = lst.filter({category: attr_value_pairs})
     for l in lst:
         for key, val in l[0].items():
             #print key + '-and-' + category + '-\n'
@@ -1970,18 +1975,18 @@ def run(resultsfile, plotdir):
         print 'RESULTS:\n'
         printTree(l[1])
 
-    #print_second_experiment_data(lst) # DFIB size
-    #print_probability_with_fanout(lst)
-    #print_extra_quota_experiment_data(lst) # Extra quota
+    #print_second_experiment_data(resultset) # DFIB size
+    #print_probability_with_fanout(resultset)
+    #print_extra_quota_experiment_data(resultset) # Extra quota
 
-    #print_first_experiment_data(lst)
-    #print_strategies_experiments_gnuplot(lst)
-    #print_extra_quota_with_fanout(lst)
-    #print_quota_increment_results(lst)
+    #print_first_experiment_data(resultset)
+    #print_strategies_experiments_gnuplot(resultset)
+    #print_extra_quota_with_fanout(resultset)
+    #print_quota_increment_results(resultset)
 
 
     ###plot_third_experiments(resultset, plotdir)
-    ###print_fourth_experiment_data(lst)
+    ###print_fourth_experiment_data(resultset)
         
     # Create dir if not existsing
     if not os.path.exists(plotdir):
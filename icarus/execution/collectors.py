@@ -2,14 +2,16 @@
 """This module contains performance metrics loggers
 """
 from __future__ import division
+import array
 import collections
 import random
 
 from icarus.registry import register_data_collector
-from icarus.tools import cdf
+from icarus.tools import cdf, QuantileSketch
 from icarus.util import Tree, inheritdoc
 
 import numpy as np
+import scipy.stats as ss
 
 
 __all__ = [
@@ -168,6 +170,21 @@ class DataCollector(object):
         """
         pass
 
+def _noop(*args, **kwargs):
+    """Ignore an event no collector listens to
+    """
+    pass
+
+
+def _dispatcher(methods):
+    """Return a function calling all the given collector methods in order
+    """
+    def dispatch(*args, **kwargs):
+        for method in methods:
+            method(*args, **kwargs)
+    return dispatch
+
+
 # Note: The implementation of CollectorProxy could be improved to avoid having
 # to rewrite almost identical methods, for example by playing with __dict__
 # attribute. However, it was implemented this way to make it more readable and 
@@ -184,7 +201,7 @@ class CollectorProxy(DataCollector):
     EVENTS = ('start_session', 'end_session', 'cache_hit', 'cache_miss', 'server_hit',
               'request_hop', 'off_path_request_hop', 'content_hop', 'offpath_trail', 'results')
     
-    def __init__(self, view, collectors):
+    def __init__(self, view, collectors, compiled=False):
         """Constructor
         
         Parameters
@@ -193,10 +210,36 @@ class CollectorProxy(DataCollector):
             An instance of the network view
         collector : list of DataCollector
             List of instances of DataCollector that will be notified of events
+        compiled : bool, optional
+            If *True*, each event method of the proxy is replaced by a
+            function dispatching the event directly to the bound methods of
+            the collectors listening to it, or by a no-op if none does. This
+            removes the per-event lookup of listening collectors.
         """
         self.view = view
         self.collectors = {e: [c for c in collectors if e in type(c).__dict__]
                            for e in self.EVENTS}
+        if compiled:
+            self.compile()
+
+    def compile(self):
+        """Bind each event method of the proxy to a specialized dispatcher.
+        
+        Events with no listening collector are bound to a no-op function and
+        events with a single listening collector are bound directly to the
+        method of that collector.
+        """
+        for event in self.EVENTS:
+            if event == 'results':
+                continue
+            methods = tuple(getattr(c, event) for c in self.collectors[event])
+            if len(methods) == 0:
+                dispatch = _noop
+            elif len(methods) == 1:
+                dispatch = methods[0]
+            else:
+                dispatch = _dispatcher(methods)
+            setattr(self, event, dispatch)
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
@@ -252,9 +295,13 @@ class CollectorProxy(DataCollector):
 @register_data_collector('LINK_LOAD')
 class LinkLoadCollector(DataCollector):
     """Data collector measuring the link load
+    
+    Links are indexed once, when the collector is created, so that traffic
+    is counted in arrays of per-link counters rather than in dictionaries
+    keyed by link.
     """
     
-    def __init__(self, view, sr=10):
+    def __init__(self, view, sr=10, bin_size=None):
         """Constructor
         
         Parameters
@@ -265,47 +312,115 @@ class LinkLoadCollector(DataCollector):
             Size ratio. The average ratio between the size of the content data
             and the request data. For example, if sr = x, then it means that
             the average size of a content is x times the size of a request.
+        bin_size : float, optional
+            If specified, the load of each link is also measured over time
+            bins of this duration, starting from the first session. The
+            traffic of a session is counted in the bin in which it starts
         """
         self.view = view
-        self.req_count = collections.defaultdict(int)
-        self.cont_count = collections.defaultdict(int)
         if sr <= 0:
             raise ValueError('sr must be positive')
+        if bin_size is not None and bin_size <= 0:
+            raise ValueError('bin_size must be positive')
         self.sr = sr
+        self.bin_size = bin_size
         self.t_start = -1
         self.t_end = 1
+        # Links in index order and map from (u, v) to index, as a dict of
+        # dicts so that counting a hop does not create a tuple
+        self.links = []
+        self.link_index = collections.defaultdict(dict)
+        self.req_count = array.array('l')
+        self.cont_count = array.array('l')
+        # Per-bin request and content counters and those of the current bin
+        self.bin_req_count = []
+        self.bin_cont_count = []
+        self.curr_bin_req = self.curr_bin_cont = None
+        for u, v in view.topology().edges_iter():
+            for link in ((u, v), (v, u)):
+                if link not in self.link_index[link[0]]:
+                    self.add_link(*link)
+    
+    def add_link(self, u, v):
+        """Add a link to the link index
+        
+        Returns
+        -------
+        index : int
+            The index of the link
+        """
+        i = len(self.links)
+        self.links.append((u, v))
+        self.link_index[u][v] = i
+        for counts in [self.req_count, self.cont_count] + \
+                      self.bin_req_count + self.bin_cont_count:
+            counts.append(0)
+        return i
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
         if self.t_start < 0:
             self.t_start = timestamp
         self.t_end = timestamp
+        if self.bin_size is not None:
+            b = int((timestamp - self.t_start)//self.bin_size)
+            while len(self.bin_req_count) <= b:
+                self.bin_req_count.append(array.array('l', [0])*len(self.links))
+                self.bin_cont_count.append(array.array('l', [0])*len(self.links))
+            self.curr_bin_req = self.bin_req_count[b]
+            self.curr_bin_cont = self.bin_cont_count[b]
     
     @inheritdoc(DataCollector)
     def request_hop(self, u, v, main_path=True):
-        self.req_count[(u, v)] += 1
+        try:
+            i = self.link_index[u][v]
+        except KeyError:
+            i = self.add_link(u, v)
+        self.req_count[i] += 1
+        if self.curr_bin_req is not None:
+            self.curr_bin_req[i] += 1
     
     @inheritdoc(DataCollector)
     def content_hop(self, u, v, main_path=True):
-        self.cont_count[(u, v)] += 1
+        try:
+            i = self.link_index[u][v]
+        except KeyError:
+            i = self.add_link(u, v)
+        self.cont_count[i] += 1
+        if self.curr_bin_cont is not None:
+            self.curr_bin_cont[i] += 1
     
     @inheritdoc(DataCollector)
     def results(self):
         duration = self.t_end - self.t_start
-        link_loads = dict((link, (self.req_count[link] + self.sr*self.cont_count[link])/duration) 
-                          for link in self.req_count)
-        link_loads_int = dict((link, load)
-                              for link, load in link_loads.iteritems()
-                              if self.view.link_type(*link) == 'internal')
-        link_loads_ext = dict((link, load)
-                              for link, load in link_loads.iteritems()
-                              if self.view.link_type(*link) == 'external')
-        mean_load_int = sum(link_loads_int.values())/len(link_loads_int)
-        mean_load_ext = sum(link_loads_ext.values())/len(link_loads_ext)
-        return Tree({'MEAN_INTERNAL':     mean_load_int, 
-                     'MEAN_EXTERNAL':     mean_load_ext,
-                     'PER_LINK_INTERNAL': link_loads_int,
-                     'PER_LINK_EXTERNAL': link_loads_ext})
+        req_count = np.frombuffer(self.req_count, dtype=np.int_)
+        cont_count = np.frombuffer(self.cont_count, dtype=np.int_)
+        link_loads = (req_count + self.sr*cont_count)/duration
+        link_type = np.array([self.view.link_type(u, v)
+                              for u, v in self.links])
+        # As before, only links traversed by requests are reported
+        used = req_count > 0
+        internal = used & (link_type == 'internal')
+        external = used & (link_type == 'external')
+        results = Tree({'MEAN_INTERNAL':     link_loads[internal].mean(),
+                        'MEAN_EXTERNAL':     link_loads[external].mean(),
+                        'PER_LINK_INTERNAL': dict(zip(
+                                [self.links[i] for i in np.flatnonzero(internal)],
+                                link_loads[internal].tolist())),
+                        'PER_LINK_EXTERNAL': dict(zip(
+                                [self.links[i] for i in np.flatnonzero(external)],
+                                link_loads[external].tolist()))})
+        if self.bin_size is not None:
+            bin_counts = np.zeros((len(self.bin_req_count), len(self.links)))
+            for b, (bin_req, bin_cont) in enumerate(zip(self.bin_req_count,
+                                                        self.bin_cont_count)):
+                bin_counts[b] = np.frombuffer(bin_req, dtype=np.int_) + \
+                                self.sr*np.frombuffer(bin_cont, dtype=np.int_)
+            results['LINKS'] = list(self.links)
+            results['TIME_BINS'] = self.t_start + \
+                                   self.bin_size*np.arange(len(bin_counts))
+            results['PER_LINK_TIME_BINS'] = bin_counts/self.bin_size
+        return results
 
 @register_data_collector('SAT_RATE')
 class SatisfactionRateCollector(DataCollector):
@@ -479,7 +594,7 @@ class LatencyCollector(DataCollector):
     content.
     """
     
-    def __init__(self, view, cdf=False):
+    def __init__(self, view, cdf=False, cdf_rel_err=None):
         """Constructor
         
         Parameters
@@ -488,8 +603,15 @@ class LatencyCollector(DataCollector):
             The network view instance
         cdf : bool, optional
             If *True*, also collects a cdf of the latency
+        cdf_rel_err : float, optional
+            If specified, the cdf is estimated with this maximum relative error
+            using a quantile sketch, whose memory does not grow with the number
+            of sessions, rather than computed from all latency values. The
+            sketch is also returned as *CDF_SKETCH*, so that sketches of
+            different experiments can be merged
         """
         self.cdf = cdf
+        self.cdf_rel_err = cdf_rel_err
         self.view = view
         self.req_latency = 0.0
         self.sess_count = 0
@@ -498,7 +620,8 @@ class LatencyCollector(DataCollector):
         self.hit_indicator = False
         self.content_recvd = False # indicator set to True when receiver gets the content
         if cdf:
-            self.latency_data = collections.deque()
+            self.latency_data = collections.deque() if cdf_rel_err is None \
+                                else QuantileSketch(cdf_rel_err)
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
@@ -538,7 +661,10 @@ class LatencyCollector(DataCollector):
         if not success:
             return
         if self.cdf:
-            self.latency_data.append(self.sess_latency)
+            if self.cdf_rel_err is None:
+                self.latency_data.append(self.sess_latency)
+            else:
+                self.latency_data.add(self.sess_latency)
         self.latency += self.sess_latency
         if self.hit_indicator is False:
             path = self.view.shortest_path(self.receiver, self.source)
@@ -550,7 +676,11 @@ class LatencyCollector(DataCollector):
     def results(self):
         results = Tree({'MEAN': self.latency/self.sess_count})
         if self.cdf:
-            results['CDF'] = cdf(self.latency_data) 
+            if self.cdf_rel_err is None:
+                results['CDF'] = cdf(self.latency_data)
+            else:
+                results['CDF'] = self.latency_data.cdf()
+                results['CDF_SKETCH'] = self.latency_data
         return results
 
 
@@ -652,7 +782,7 @@ class PathStretchCollector(DataCollector):
     path length and the shortest path length.
     """
     
-    def __init__(self, view, cdf=False):
+    def __init__(self, view, cdf=False, cdf_rel_err=None):
         """Constructor
         
         Parameters
@@ -661,9 +791,15 @@ class PathStretchCollector(DataCollector):
             The network view instance
         cdf : bool, optional
             If *True*, also collects a cdf of the path stretch
+        cdf_rel_err : float, optional
+            If specified, the cdfs are estimated with this maximum relative
+            error using quantile sketches, rather than computed from all path
+            stretch values. The sketches are also returned as *CDF_SKETCH*,
+            *CDF_REQUEST_SKETCH* and *CDF_CONTENT_SKETCH*
         """
         self.view = view
         self.cdf = cdf
+        self.cdf_rel_err = cdf_rel_err
         self.req_path_len = collections.defaultdict(int)
         self.cont_path_len = collections.defaultdict(int)
         self.sess_count = 0
@@ -671,9 +807,14 @@ class PathStretchCollector(DataCollector):
         self.mean_cont_stretch = 0.0
         self.mean_stretch = 0.0
         if self.cdf:
-            self.req_stretch_data = collections.deque()
-            self.cont_stretch_data = collections.deque()
-            self.stretch_data = collections.deque()
+            if cdf_rel_err is None:
+                self.req_stretch_data = collections.deque()
+                self.cont_stretch_data = collections.deque()
+                self.stretch_data = collections.deque()
+            else:
+                self.req_stretch_data = QuantileSketch(cdf_rel_err)
+                self.cont_stretch_data = QuantileSketch(cdf_rel_err)
+                self.stretch_data = QuantileSketch(cdf_rel_err)
     
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
@@ -704,9 +845,14 @@ class PathStretchCollector(DataCollector):
         self.mean_cont_stretch += cont_stretch
         self.mean_stretch += stretch
         if self.cdf:
-            self.req_stretch_data.append(req_stretch)
-            self.cont_stretch_data.append(cont_stretch)
-            self.stretch_data.append(stretch)
+            if self.cdf_rel_err is None:
+                self.req_stretch_data.append(req_stretch)
+                self.cont_stretch_data.append(cont_stretch)
+                self.stretch_data.append(stretch)
+            else:
+                self.req_stretch_data.add(req_stretch)
+                self.cont_stretch_data.add(cont_stretch)
+                self.stretch_data.add(stretch)
             
     @inheritdoc(DataCollector)
     def results(self):
@@ -714,9 +860,17 @@ class PathStretchCollector(DataCollector):
                         'MEAN_REQUEST': self.mean_req_stretch/self.sess_count,
                         'MEAN_CONTENT': self.mean_cont_stretch/self.sess_count})
         if self.cdf:
-            results['CDF'] = cdf(self.stretch_data)
-            results['CDF_REQUEST'] = cdf(self.req_stretch_data)
-            results['CDF_CONTENT'] = cdf(self.cont_stretch_data)
+            if self.cdf_rel_err is None:
+                results['CDF'] = cdf(self.stretch_data)
+                results['CDF_REQUEST'] = cdf(self.req_stretch_data)
+                results['CDF_CONTENT'] = cdf(self.cont_stretch_data)
+            else:
+                results['CDF'] = self.stretch_data.cdf()
+                results['CDF_REQUEST'] = self.req_stretch_data.cdf()
+                results['CDF_CONTENT'] = self.cont_stretch_data.cdf()
+                results['CDF_SKETCH'] = self.stretch_data
+                results['CDF_REQUEST_SKETCH'] = self.req_stretch_data
+                results['CDF_CONTENT_SKETCH'] = self.cont_stretch_data
         return results
     
 
@@ -727,54 +881,108 @@ class ControlPlaneCollector(DataCollector):
     In particular this collector analyzes overheads of various routing tables.
     """
     
-    def __init__(self, view, t_poll=1000, cdf=True):
+    def __init__(self, view, t_poll=1000, cdf=True, n_samples=None,
+                 confidence=0.95, seed=None):
         """Constructor
         
         Parameters
         ----------
         view : NetworkView
             The network view instance
+        t_poll : int, optional
+            The number of sessions between two inspections of RSN tables
+        cdf : bool, optional
+            If *True*, also collects cdfs of the RSN hit ratios
+        n_samples : int, optional
+            If specified, the hit ratio of each RSN table is estimated on this
+            number of entries drawn at random, so that the cost of each
+            inspection does not depend on the size of the tables. Otherwise
+            all entries of all tables are inspected
+        confidence : float, optional
+            The confidence level of the intervals of mean RSN hit ratios,
+            which are returned if *n_samples* is specified
+        seed : any hashable type, optional
+            The seed of the random number generator used to draw entries
         """
         self.view = view
         self.t_poll = t_poll
         self.cdf = cdf
+        self.n_samples = n_samples
+        self.confidence = confidence
+        self.rnd = random.Random(seed)
         self.sess_count = 1
         self.rsn_hit_ratio = [collections.deque() for _ in range(4)]
+        # Estimated variance of each RSN hit ratio measured, if sampled
+        self.rsn_hit_ratio_var = [collections.deque() for _ in range(4)]
 
+    def rsn_hop(self, node, content, next_hop):
+        """Return the distance from an RSN node of the cache holding a
+        content, as found by following the RSN entries of the content.
+        
+        Returns
+        -------
+        hops : int
+            The number of hops (0 to 3) between the node and the cache
+            holding the content or *None* if it is not found
+        """
+        view = self.view
+        if view.cache_lookup(node, content):
+            return 0
+        if view.cache_lookup(next_hop, content):
+            return 1
+        next_hop = view.rsn_lookup(next_hop, content)
+        if next_hop is None:
+            return None
+        if view.cache_lookup(next_hop, content):
+            return 2
+        next_hop = view.rsn_lookup(next_hop, content)
+        if next_hop is not None and view.cache_lookup(next_hop, content):
+            return 3
+        return None
 
     @inheritdoc(DataCollector)
     def start_session(self, timestamp, receiver, content):
         if self.sess_count % self.t_poll == 0:
             # Inspect RSN freshness
             hit_ratio = np.zeros(4)
+            hit_ratio_var = np.zeros(4)
             # number of RSN tables used, i.e. on nodes traversed by traffic
             n_active_rsn = 0
             for rsn_node in self.view.rsn_nodes():
-                rsn_dump = self.view.rsn_dump(rsn_node)
+                if self.n_samples is None:
+                    entries = self.view.rsn_dump(rsn_node)
+                else:
+                    entries = self.view.rsn_sample(rsn_node, self.n_samples,
+                                                   self.rnd)
                 per_node_hits = np.zeros(4)
-                for content, next_hop in rsn_dump:
-                    if self.view.cache_lookup(rsn_node, content):
-                        per_node_hits[0] += 1
-                    elif self.view.cache_lookup(next_hop, content):
-                        per_node_hits[1] += 1
-                    else:
-                        next_hop = self.view.rsn_lookup(next_hop, content)
-                        if next_hop is not None:
-                            if self.view.cache_lookup(next_hop, content):
-                                per_node_hits[2] += 1
-                            else:
-                                next_hop = self.view.rsn_lookup(next_hop, content)
-                                if next_hop is not None:
-                                    if self.view.cache_lookup(next_hop, content):
-                                        per_node_hits[3] += 1
+                for entry in entries:
+                    # Entries of RSN tables with expiration times also
+                    # include them, after content and next hop
+                    hops = self.rsn_hop(rsn_node, entry[0], entry[1])
+                    if hops is not None:
+                        per_node_hits[hops] += 1
                 # at this stage I have the number of hits coming from 1, 2 or 3 hops away
                 # if the node investigated had an RSN with at least one entry
-                if len(rsn_dump) > 0:
+                n_entries = len(entries)
+                if n_entries > 0:
                     n_active_rsn += 1
-                    hit_ratio += per_node_hits/len(rsn_dump)
+                    per_node_ratio = per_node_hits/n_entries
+                    hit_ratio += per_node_ratio
+                    # Samples smaller than n_samples include all entries,
+                    # while the others are assumed to be drawn from a large
+                    # table, which may overestimate their variance
+                    if self.n_samples is not None and \
+                            n_entries == self.n_samples:
+                        hit_ratio_var += per_node_ratio*(1 - per_node_ratio) \
+                                         /n_entries
             for i in range(4):
-                rsn_hit_ratio = hit_ratio[i]/n_active_rsn if n_active_rsn > 0 else 0
-                self.rsn_hit_ratio[i].append(rsn_hit_ratio)
+                if n_active_rsn > 0:
+                    self.rsn_hit_ratio[i].append(hit_ratio[i]/n_active_rsn)
+                    self.rsn_hit_ratio_var[i].append(
+                                        hit_ratio_var[i]/n_active_rsn**2)
+                else:
+                    self.rsn_hit_ratio[i].append(0)
+                    self.rsn_hit_ratio_var[i].append(0)
         self.sess_count += 1
 
             
@@ -790,6 +998,14 @@ class ControlPlaneCollector(DataCollector):
                                   results['MEAN_RSN_ONE_HOP'] + \
                                   results['MEAN_RSN_TWO_HOP'] + \
                                   results['MEAN_RSN_THREE_HOP']  
+        if self.n_samples is not None:
+            # Half-width of the confidence intervals of the means, which only
+            # account for the error due to sampling RSN entries
+            z = ss.norm.ppf((1 + self.confidence)/2)
+            for i, name in enumerate(('ZERO', 'ONE', 'TWO', 'THREE')):
+                n_polls = len(self.rsn_hit_ratio_var[i])
+                results['ERR_RSN_%s_HOP' % name] = \
+                        z*np.sqrt(sum(self.rsn_hit_ratio_var[i]))/n_polls
         if self.cdf:
             results.update({
                'CDF_RSN_ZERO_HOP':      cdf(self.rsn_hit_ratio[0]),
@@ -5,14 +5,31 @@ experiments needs to be run, instantiates all the required classes and executes
 the experiment by iterating through the event provided by an event generator
 and providing them to a strategy instance. 
 """
-from icarus.execution import NetworkModel, NetworkView, NetworkController, CollectorProxy
+import os
+import random
+import itertools
+import collections
+import tempfile
+import traceback
+import cPickle as pickle
+
+import numpy as np
+
+from icarus.execution import NetworkModel, NetworkView, NetworkController, \
+                             WarmupController, CollectorProxy
 from icarus.registry import DATA_COLLECTOR, STRATEGY
 
 
-__all__ = ['exec_experiment']
+__all__ = [
+    'exec_experiment',
+    'fork_experiments',
+    'save_warmup_snapshot',
+    'load_warmup_snapshot'
+          ]
 
 
-def exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors, warmup_strategy):
+def exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors, warmup_strategy,
+                    fast_warmup=False, warmup_snapshot=None):
     """Execute the simulation of a specific scenario.
     
     Parameters
@@ -37,6 +54,20 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
         The collectors to be used. It is a dictionary in which keys are the
         names of collectors to use and values are dictionaries of attributes
         for the collector they refer to.
+    warmup_strategy : tree
+        Warm-up strategy definition, used for the first *n_warmup* events of
+        the workload
+    fast_warmup : bool, optional
+        If *True*, the warm-up strategy is executed with a WarmupController,
+        which updates caches and RSN tables without any event reporting
+    warmup_snapshot : str, optional
+        Path of the file storing the state of the network and of the random
+        number generators at the end of the warm-up. If the file exists, the
+        state is restored from it and warm-up events are skipped instead of
+        being executed. Otherwise, the state is saved to it after warm-up.
+        It is ignored unless the network model restores its state exactly
+        (see *NetworkModel.restores_exactly*), i.e. with LRU and FIFO cache
+        policies
          
     Returns
     -------
@@ -49,7 +80,7 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
     
     collectors_inst = [DATA_COLLECTOR[name](view, **params)
                        for name, params in collectors.items()]
-    collector = CollectorProxy(view, collectors_inst)
+    collector = CollectorProxy(view, collectors_inst, compiled=True)
     controller.attach_collector(collector)
     
     strategy_name = strategy['name']
@@ -57,14 +88,174 @@ def exec_experiment(topology, workload, netconf, strategy, cache_policy, collect
     strategy_args = {k: v for k, v in strategy.iteritems() if k != 'name'}
     warmup_strategy_args = {k: v for k, v in warmup_strategy.iteritems() if k != 'name'}
     strategy_inst = STRATEGY[strategy_name](view, controller, **strategy_args)
-    warmup_strategy_inst = STRATEGY[warmup_strategy_name](view, controller, **warmup_strategy_args)
+    warmup_controller = WarmupController(model) if fast_warmup else controller
+    warmup_strategy_inst = STRATEGY[warmup_strategy_name](view, warmup_controller, **warmup_strategy_args)
+    
+    events = iter(workload)
+    _warmup(model, events, workload.n_warmup, warmup_strategy_inst,
+            warmup_snapshot)
+    for time, event in events:
+        strategy_inst.process_event(time, **event)
+
+    return collector.results()
+
+
+def fork_experiments(topology, workload, netconf, strategies, cache_policy, collectors,
+                     warmup_strategy, fast_warmup=False, warmup_snapshot=None,
+                     max_children=1):
+    """Execute the simulation of several scenarios differing only in the
+    strategy used after warm-up.
+    
+    The warm-up is executed once, then a child process is forked for each
+    strategy, which inherits the state of the network after warm-up and
+    executes the remaining events of the workload. Results are sent back to
+    the parent process through a pipe.
+    
+    Parameters
+    ----------
+    topology : Topology
+        The FNSS Topology object modelling the network topology on which
+        experiments are run.
+    workload : iterable
+        The workload, as for *exec_experiment*
+    netconf : dict
+        Dictionary of attributes to inizialize the network model
+    strategies : list of trees
+        Definitions of the strategies used after warm-up, one per experiment
+    cache_policy : tree
+        Cache policy definition
+    collectors: dict
+        The collectors to be used in each experiment
+    warmup_strategy : tree
+        Warm-up strategy definition
+    fast_warmup : bool, optional
+        If *True*, the warm-up strategy is executed with a WarmupController
+    warmup_snapshot : str, optional
+        Path of the warm-up snapshot file, as for *exec_experiment*
+    max_children : int, optional
+        Maximum number of child processes running at the same time
+    
+    Returns
+    -------
+    results : list
+        The results of each strategy, in the same order as *strategies*. An
+        element is *None* if the experiment failed in the child process.
+    """
+    model = NetworkModel(topology, cache_policy, **netconf)
+    view = NetworkView(model)
+    controller = WarmupController(model) if fast_warmup else NetworkController(model)
+    warmup_strategy_args = {k: v for k, v in warmup_strategy.iteritems() if k != 'name'}
+    warmup_strategy_inst = STRATEGY[warmup_strategy['name']](view, controller, **warmup_strategy_args)
+    events = iter(workload)
+    _warmup(model, events, workload.n_warmup, warmup_strategy_inst,
+            warmup_snapshot)
+    
+    results = [None]*len(strategies)
+    children = collections.deque()
     
-    counter = 0
-    for time, event in workload:
-        if counter < workload.n_warmup:
-            counter += 1
+    def wait_child():
+        i, pid, fd = children.popleft()
+        with os.fdopen(fd, 'rb') as f:
+            data = f.read()
+        os.waitpid(pid, 0)
+        if data:
+            results[i] = pickle.loads(data)
+    
+    for i, strategy in enumerate(strategies):
+        if len(children) >= max_children:
+            wait_child()
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            status = 0
+            try:
+                data = pickle.dumps(_exec_measured(view, events, strategy, collectors),
+                                    protocol=pickle.HIGHEST_PROTOCOL)
+                with os.fdopen(w, 'wb') as f:
+                    f.write(data)
+            except:
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)
+        os.close(w)
+        children.append((i, pid, r))
+    while children:
+        wait_child()
+    return results
+
+
+def _warmup(model, events, n_warmup, warmup_strategy_inst, warmup_snapshot=None):
+    """Execute the warm-up events of a workload or, if a snapshot of the
+    network state after warm-up is available, skip them and restore it.
+    """
+    if not model.restores_exactly():
+        # Restoring the snapshot would change results
+        warmup_snapshot = None
+    if warmup_snapshot is not None and os.path.isfile(warmup_snapshot):
+        for _ in itertools.islice(events, n_warmup):
+            pass
+        load_warmup_snapshot(warmup_snapshot, model)
+    else:
+        for time, event in itertools.islice(events, n_warmup):
             warmup_strategy_inst.process_event(time, **event)
-        else:
-            strategy_inst.process_event(time, **event)
+        if warmup_snapshot is not None:
+            save_warmup_snapshot(warmup_snapshot, model)
+
 
+def _exec_measured(view, events, strategy, collectors):
+    """Execute the remaining events of a workload with a given strategy and
+    return the results of the collectors.
+    """
+    controller = NetworkController(view.model)
+    collectors_inst = [DATA_COLLECTOR[name](view, **params)
+                       for name, params in collectors.items()]
+    collector = CollectorProxy(view, collectors_inst, compiled=True)
+    controller.attach_collector(collector)
+    strategy_args = {k: v for k, v in strategy.iteritems() if k != 'name'}
+    strategy_inst = STRATEGY[strategy['name']](view, controller, **strategy_args)
+    for time, event in events:
+        strategy_inst.process_event(time, **event)
     return collector.results()
+
+
+def save_warmup_snapshot(path, model):
+    """Save the state of a network model and of the random number generators
+    to a file.
+    
+    The file is written atomically, so that concurrent experiments never read
+    a partially written snapshot.
+    
+    Parameters
+    ----------
+    path : str
+        The path of the snapshot file
+    model : NetworkModel
+        The network model
+    """
+    snapshot = {'model': model.snapshot(),
+                'random': random.getstate(),
+                'numpy': np.random.get_state()}
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.rename(tmp_path, path)
+
+
+def load_warmup_snapshot(path, model):
+    """Restore the state of a network model and of the random number
+    generators from a file written by *save_warmup_snapshot*.
+    
+    Parameters
+    ----------
+    path : str
+        The path of the snapshot file
+    model : NetworkModel
+        The network model
+    """
+    with open(path, 'rb') as f:
+        snapshot = pickle.load(f)
+    model.restore(snapshot['model'])
+    random.setstate(snapshot['random'])
+    np.random.set_state(snapshot['numpy'])
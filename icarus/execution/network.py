@@ -2,18 +2,23 @@
 """Network Model-View-Controller (MVC)
 """
 import logging
+import random
 
+import numpy as np
 import networkx as nx
 import fnss
 
 from icarus.registry import CACHE_POLICY
-from icarus.models import keyval_cache
-from icarus.util import path_links
+from icarus.models import keyval_cache, ttl_keyval_cache, KeyValCache, \
+                          LruCache, FifoCache
+from icarus.util import path_links, all_pairs_order
 
 __all__ = [
+    'ShortestPaths',
     'NetworkModel',
     'NetworkView',
-    'NetworkController'
+    'NetworkController',
+    'WarmupController'
           ]
 
 logger = logging.getLogger('orchestration')
@@ -24,6 +29,154 @@ def symmetrify_paths(shortest_paths):
             shortest_paths[u][v] = list(reversed(shortest_paths[v][u]))
     return shortest_paths
 
+class ShortestPaths(object):
+    """Provider of shortest paths computing single-source shortest path trees
+    on demand instead of all-pairs shortest paths upfront.
+    
+    Paths are the same as those of the symmetrified all-pairs shortest paths
+    dictionary: the path between *s* and *t* is taken from the Dijkstra
+    shortest path tree rooted at whichever of the two nodes comes later in the
+    order returned by *all_pairs_order*, and *paths[s][t]* (or
+    *paths.path(s, t)*) is the reverse of *paths[t][s]*. Therefore a shortest
+    path tree is only computed for nodes which are actually used as path
+    endpoints (typically sources and receivers of the workload).
+    
+    Trees can be stored either as dictionaries of paths or, to reduce memory
+    footprint, as compact arrays of predecessors, in which case paths are
+    rebuilt at every query. The number of trees stored can be bounded, in
+    which case the least recently used tree is discarded.
+    
+    Alternatively, a precomputed matrix of predecessors (e.g. memory-mapped
+    from a file) can be provided, in which case no tree is computed.
+    """
+    
+    def __init__(self, topology, max_trees=None, compact=False, nodes=None,
+                 predecessors=None, order=None):
+        """Constructor
+        
+        Parameters
+        ----------
+        topology : fnss.Topology
+            The topology object
+        max_trees : int, optional
+            The maximum number of shortest path trees stored. If not
+            specified, all trees computed are stored
+        compact : bool, optional
+            If *True*, store trees as arrays of predecessors instead of
+            dictionaries of paths
+        nodes : list, optional
+            The nodes of the topology, in the order used to index the
+            predecessors. If not specified, the order of *topology.nodes()*
+            is used
+        predecessors : 2-d array, optional
+            Matrix of predecessors, such that *predecessors[t][s]* is the
+            index of the node following *s* in the path from *s* to *t* of the
+            shortest path tree rooted at *t* or *-1* if there is no such node.
+            If specified, *compact* is implied
+        order : list, optional
+            The nodes of the topology in the order returned by
+            *all_pairs_order*, which selects the tree from which the path
+            between two nodes is taken. If not specified, it is computed from
+            the topology. It must be specified if the topology passed is a
+            copy of the one from which *predecessors* were computed, since
+            copies may iterate nodes in a different order
+        """
+        self.topology = topology
+        self._nodes = list(nodes) if nodes is not None else topology.nodes()
+        self._node_index = {v: i for i, v in enumerate(self._nodes)}
+        if order is None:
+            order = all_pairs_order(topology)
+        self._rank = {v: i for i, v in enumerate(order)}
+        self._predecessors = predecessors
+        self.compact = compact or predecessors is not None
+        self._trees = {}
+        self._lru = LruCache(max_trees) if max_trees is not None else None
+
+    def __getitem__(self, s):
+        return _PathsFrom(self, s)
+
+    def _tree(self, t):
+        """Return the shortest path tree towards node *t*, computing it if
+        not already available
+        """
+        if self._predecessors is not None:
+            return self._predecessors[self._node_index[t]]
+        if t in self._trees:
+            if self._lru is not None:
+                self._lru.get(t)
+            return self._trees[t]
+        paths = nx.single_source_dijkstra_path(self.topology, t)
+        if self.compact:
+            tree = np.empty(len(self._nodes), dtype=np.int32)
+            tree.fill(-1)
+            for s, path in paths.iteritems():
+                if len(path) > 1:
+                    tree[self._node_index[s]] = self._node_index[path[-2]]
+        else:
+            tree = {s: list(reversed(path)) for s, path in paths.iteritems()}
+        self._trees[t] = tree
+        if self._lru is not None:
+            evicted = self._lru.put(t)
+            if evicted is not None:
+                del self._trees[evicted]
+        return tree
+
+    def path(self, s, t):
+        """Return the shortest path from *s* to *t*
+        
+        Parameters
+        ----------
+        s : any hashable type
+            Origin node
+        t : any hashable type
+            Destination node
+        
+        Returns
+        -------
+        shortest_path : list
+            List of nodes of the shortest path (origin and destination
+            included)
+        """
+        # As in symmetrify_paths, the path is taken from the tree rooted at
+        # the node coming later in the order of all_pairs_order
+        reverse = self._rank[s] > self._rank[t]
+        if reverse:
+            s, t = t, s
+        tree = self._tree(t)
+        if not self.compact:
+            if s not in tree:
+                raise KeyError('There is no path from %s to %s' % (str(s), str(t)))
+            path = tree[s]
+            return list(reversed(path)) if reverse else path
+        nodes = self._nodes
+        i = self._node_index[s]
+        dest = self._node_index[t]
+        path = [s]
+        while i != dest:
+            i = tree[i]
+            if i < 0:
+                raise KeyError('There is no path from %s to %s' % (str(s), str(t)))
+            path.append(nodes[i])
+        if reverse:
+            path.reverse()
+        return path
+
+
+class _PathsFrom(object):
+    """Shortest paths from a given origin, supporting *paths[s][t]* lookups on
+    a ShortestPaths instance.
+    """
+    
+    __slots__ = ['_paths', '_s']
+    
+    def __init__(self, paths, s):
+        self._paths = paths
+        self._s = s
+
+    def __getitem__(self, t):
+        return self._paths.path(self._s, t)
+
+
 class NetworkView(object):
     
     def __init__(self, model):
@@ -97,7 +250,9 @@ class NetworkView(object):
         Return
         ------
         all_pairs_shortest_paths : dict of lists
-            Shortest paths between all pairs
+            Shortest paths between all pairs. If the network model computes
+            paths on demand, this is a ShortestPaths instance, which supports
+            the same *[s][t]* lookups
         """
         return self.model.shortest_path
 
@@ -186,6 +341,26 @@ class NetworkView(object):
         neighbors = self.topology().neighbors(node)
         return neighbors
 
+    def router_neighbors(self, node):
+        """Return the neighbors of a given node that are neither content
+        sources nor receivers.
+        
+        Differently from *get_neighbors*, this method does not inspect the
+        topology but returns an index built when the network model is
+        created.
+        
+        Parameters
+        ----------
+        node : any hashable type
+            The node identifier
+        
+        Returns
+        -------
+        neighbors : tuple
+            The neighbors of the node which are neither sources nor receivers
+        """
+        return self.model.router_neighbors[node]
+
     def cache_nodes(self, size=False):
         """Returns a list of nodes with caching capability
         
@@ -343,6 +518,24 @@ class NetworkView(object):
         if node in self.model.rsn:
             return self.model.rsn[node].value(content)
     
+    def rsn_key(self, content, next_hop):
+        """Return the compact key identifying the T-FIB entry of a content
+        towards a given next hop.
+        
+        Parameters
+        ----------
+        content : any hashable type
+            The content identifier
+        next_hop : any hashable type
+            The next hop node of the entry
+            
+        Returns
+        -------
+        key : int or tuple
+            The key of the entry
+        """
+        return self.model.rsn_key(content, next_hop)
+
     def get_rsn_table(self, node):
         """Return the rsn table of a node
         """
@@ -367,13 +560,36 @@ class NetworkView(object):
         """
         if node in self.model.rsn:
             return self.model.rsn[node].dump()
+    
+    def rsn_sample(self, node, n, rnd=random):
+        """Returns entries of the RSN table of a specific node drawn uniformly
+        at random, without replacement.
+        
+        Parameters
+        ----------
+        node : any hashable type
+            The node identifier
+        n : int
+            The number of entries to draw. If the RSN table has fewer entries,
+            all entries are returned
+        rnd : Random, optional
+            The random number generator used to draw entries
+            
+        Returns
+        -------
+        sample : list
+            List of (content, value) tuples
+        """
+        if node in self.model.rsn:
+            return self.model.rsn[node].sample(n, rnd)
         
 
 class NetworkModel(object):
     """Models the internal state of the network
     """
     
-    def __init__(self, topology, cache_policy, shortest_path=None):
+    def __init__(self, topology, cache_policy, shortest_path=None,
+                 lazy_paths=False, max_path_trees=None, compact_paths=False):
         """Constructors
         
         Parameters
@@ -384,8 +600,18 @@ class NetworkModel(object):
             cache policy descriptor. It has the name attribute which identify
             the cache policy name and keyworded arguments specific to the
             policy
-        shortest_path : dict of dict, optional
+        shortest_path : dict of dict or ShortestPaths, optional
             The all-pair shortest paths of the network
+        lazy_paths : bool, optional
+            If *True* and *shortest_path* is not specified, compute shortest
+            paths on demand using a ShortestPaths instance instead of
+            computing all-pairs shortest paths upfront
+        max_path_trees : int, optional
+            Maximum number of shortest path trees stored if *lazy_paths* is
+            *True*
+        compact_paths : bool, optional
+            If *True*, store shortest path trees as arrays of predecessors if
+            *lazy_paths* is *True*
         """
         # Filter inputs
         if not isinstance(topology, fnss.Topology):
@@ -393,12 +619,28 @@ class NetworkModel(object):
                              'fnss.Topology or any of its subclasses.')
         
         # Shortest paths of the network
-        self.shortest_path = shortest_path if shortest_path is not None \
-                             else symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+        if shortest_path is not None:
+            self.shortest_path = shortest_path
+        elif lazy_paths:
+            self.shortest_path = ShortestPaths(topology, max_path_trees,
+                                               compact_paths)
+        else:
+            self.shortest_path = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
         
         # Network topology
         self.topology = topology
         
+        # List of nodes and dictionary mapping each node to its index in the
+        # list, used to pack (content, next hop) pairs of T-FIB entries in a
+        # single integer
+        self.index_node = topology.nodes()
+        self.node_index = {v: i for i, v in enumerate(self.index_node)}
+        
+        # Dictionary mapping each node to the tuple of its neighbors that are
+        # neither sources nor receivers
+        self.router_neighbors = {}
+        self.update_router_neighbors()
+        
         # Dictionary mapping each content object to its source
         # dict of location of contents keyed by content ID
         self.content_source = {}
@@ -449,16 +691,196 @@ class NetworkModel(object):
                 if self.rsn_size[node] < 1:    
                     self.rsn_size[node] = 1
                     
+        # Current simulation time, updated by the controller at the start of
+        # each session and read by time-based cache policies
+        self.time = 0
+                    
         policy_name = cache_policy['name']
         policy_args = {k: v for k, v in cache_policy.items() if k != 'name'}
+        if policy_name.startswith('TTL_'):
+            policy_args['f_time'] = lambda: self.time
         # The actual cache and RSN objects storing the content
 
         self.cache = {node: CACHE_POLICY[policy_name](self.cache_size[node], **policy_args)
                           for node in self.cache_size}
         
-        # RSN and cache must have the same cache eviction policy
-        self.rsn = {node: keyval_cache(CACHE_POLICY[policy_name](size, **policy_args), size)
+        # RSN and cache must have the same cache eviction policy. LRU RSN
+        # tables are implemented natively by KeyValCache. Entries of RSN
+        # tables of TTL policies expire with the same default TTL of contents,
+        # unless inserted with their own expiration time
+        self.rsn_expires = policy_name.startswith('TTL_')
+        if self.rsn_expires:
+            rsn_policy = CACHE_POLICY[policy_name[len('TTL_'):]]
+            self.rsn = {node: ttl_keyval_cache(rsn_policy(size),
+                                               policy_args['f_time'], size,
+                                               policy_args.get('ttl'))
                         for node, size in self.rsn_size.iteritems()}
+        elif policy_name == 'LRU':
+            self.rsn = {node: KeyValCache(size)
+                        for node, size in self.rsn_size.iteritems()}
+        else:
+            self.rsn = {node: keyval_cache(CACHE_POLICY[policy_name](size, **policy_args), size)
+                        for node, size in self.rsn_size.iteritems()}
+
+    def snapshot(self):
+        """Return the current state of all caches and RSN tables of the
+        network, together with the contents stored by each source.
+        
+        The state only contains built-in types and items or values stored
+        in caches and RSN tables, so that it can be pickled.
+        
+        Returns
+        -------
+        snapshot : dict
+            The state of the network, which can be passed to *restore*
+        """
+        rsn = {}
+        for node, table in self.rsn.iteritems():
+            rsn[node] = {'entries': table.dump(),
+                         'quota': list(table.get_quota()),
+                         'nlookups': list(table.get_nlookups()),
+                         'nsuccess': list(table.get_nsuccess())}
+        sources = {}
+        for node in self.topology.nodes_iter():
+            stack_name, stack_props = fnss.get_stack(self.topology, node)
+            if stack_name == 'source' and 'contents' in stack_props:
+                sources[node] = stack_props['contents']
+        return {'cache': {node: cache.dump()
+                          for node, cache in self.cache.iteritems()},
+                'rsn': rsn,
+                'sources': sources,
+                'time': self.time}
+
+    def restores_exactly(self):
+        """Return whether *restore* exactly reproduces the state of all
+        caches and RSN tables, i.e. whether all of them evict items in LRU or
+        FIFO order, with or without TTL.
+        
+        The state of other policies (e.g. the frequency counters of LFU
+        caches or the segments of SLRU caches) is not part of a snapshot.
+        
+        Returns
+        -------
+        restores_exactly : bool
+            *True* if the network state is exactly restored from a snapshot
+        """
+        return all(isinstance(cache, (LruCache, FifoCache, KeyValCache))
+                   for caches in (self.cache, self.rsn)
+                   for cache in caches.itervalues())
+
+    def restore(self, snapshot):
+        """Restore the state of caches, RSN tables and sources from a
+        snapshot returned by *snapshot*.
+        
+        Items are reinserted in reverse eviction order. This exactly
+        reproduces the state of LRU and FIFO caches, while for other policies
+        only the set of stored items is guaranteed to be restored (see
+        *restores_exactly*).
+        
+        Parameters
+        ----------
+        snapshot : dict
+            The state of the network
+        """
+        self.time = snapshot['time']
+        for node, dump in snapshot['cache'].iteritems():
+            cache = self.cache[node]
+            cache.clear()
+            if hasattr(cache, 'expiry'):
+                # TTL caches dump (item, expiration time) pairs
+                for k, expires in reversed(dump):
+                    cache.put(k, expires=expires)
+            else:
+                for k in reversed(dump):
+                    cache.put(k)
+        for node, state in snapshot['rsn'].iteritems():
+            table = self.rsn[node]
+            table.clear()
+            if hasattr(table, 'expiry'):
+                # TTL RSN tables dump (key, value, expiration time) tuples
+                for k, v, expires in reversed(state['entries']):
+                    table.put(k, v, expires=expires)
+            else:
+                for k, v in reversed(state['entries']):
+                    table.put(k, v)
+            for stats, values in ((table.get_quota(), state['quota']),
+                                  (table.get_nlookups(), state['nlookups']),
+                                  (table.get_nsuccess(), state['nsuccess'])):
+                for i, x in enumerate(values):
+                    stats[i] = x
+        self.content_source = {}
+        for node, contents in snapshot['sources'].iteritems():
+            fnss.get_stack(self.topology, node)[1]['contents'] = contents
+            for content in contents:
+                self.content_source[content] = node
+
+    def update_router_neighbors(self, nodes=None):
+        """Rebuild the index of neighbors of each node which are neither
+        sources nor receivers.
+        
+        This must be called every time the topology is changed.
+        
+        Parameters
+        ----------
+        nodes : iterable, optional
+            The nodes whose neighbors changed. If not specified, the index of
+            all nodes is rebuilt
+        """
+        topology = self.topology
+        if nodes is None:
+            nodes = topology.nodes_iter()
+        for v in nodes:
+            self.router_neighbors[v] = tuple(
+                    u for u in topology.neighbors_iter(v)
+                    if topology.node[u].get('stack', (None,))[0]
+                    not in ('source', 'receiver'))
+
+    def rsn_key(self, content, next_hop):
+        """Return the compact key identifying the T-FIB entry of a content
+        towards a given next hop.
+        
+        If the content identifier is an integer, the key is the integer
+        *content * n + i*, where *n* is the number of nodes and *i* is the
+        index of the next hop, which can be hashed and compared without
+        allocating new objects. Otherwise the key is the
+        *(content, next_hop)* tuple.
+        
+        Parameters
+        ----------
+        content : any hashable type
+            The content identifier
+        next_hop : any hashable type
+            The next hop node of the entry
+            
+        Returns
+        -------
+        key : int or tuple
+            The key of the entry
+        """
+        if isinstance(content, (int, long)):
+            return content*len(self.index_node) + self.node_index[next_hop]
+        return (content, next_hop)
+
+    def split_rsn_key(self, key):
+        """Return the content and next hop of a T-FIB entry key generated by
+        :meth:`rsn_key`
+        
+        Parameters
+        ----------
+        key : int or tuple
+            The key of the entry
+            
+        Returns
+        -------
+        content : any hashable type
+            The content identifier
+        next_hop : any hashable type
+            The next hop node of the entry
+        """
+        if isinstance(key, tuple):
+            return key
+        content, i = divmod(key, len(self.index_node))
+        return content, self.index_node[i]
 
 
 
@@ -476,6 +898,9 @@ class NetworkController(object):
         self.session = None
         self.model = model
         self.collector = None
+        # True if events of the current session must be reported to the
+        # collector. It is cached here to avoid a dict lookup at every hop
+        self._log = False
     
     def attach_collector(self, collector):
         """Attaches a data collector to which all events will be reported.
@@ -491,6 +916,7 @@ class NetworkController(object):
         """Detaches the data collector.
         """
         self.collector = None
+        self._log = False
     
     def start_session(self, timestamp, receiver, content, log):
         """Instruct the controller to start a new session (i.e. the retrieval
@@ -508,11 +934,13 @@ class NetworkController(object):
             *True* if this session needs to be reported to the collector,
             *False* otherwise
         """
+        self.model.time = timestamp
         self.session = dict(timestamp=timestamp,
                             receiver=receiver,
                             content=content,
                             log=log)
-        if self.collector is not None and self.session['log']:
+        self._log = log and self.collector is not None
+        if self._log:
             self.collector.start_session(timestamp, receiver, content)
     
     def forward_request_path(self, s, t, path=None, main_path=True):
@@ -559,7 +987,7 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
+        if self._log:
             self.collector.request_hop(u, v, main_path)
     
     def forward_off_path_request_hop(self, u, v, main_path=True):
@@ -572,7 +1000,7 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
+        if self._log:
             self.collector.off_path_request_hop(u, v, main_path)
     
     def forward_content_hop(self, u, v, main_path=True):
@@ -585,7 +1013,7 @@ class NetworkController(object):
         v : any hashable type
             Destination node
         """
-        if self.collector is not None and self.session['log']:
+        if self._log:
             self.collector.content_hop(u, v, main_path)
     
     def put_content(self, node):
@@ -625,15 +1053,15 @@ class NetworkController(object):
         if node in self.model.cache:
             cache_hit = self.model.cache[node].get(self.session['content'])
             if cache_hit:
-                if self.session['log']:
+                if self._log:
                     self.collector.cache_hit(node)
             else:
-                if self.session['log']:
+                if self._log:
                     self.collector.cache_miss(node)
             return cache_hit
         name, props = fnss.get_stack(self.model.topology, node)
         if name == 'source' and self.session['content'] in props['contents']:
-            if self.collector is not None and self.session['log']:
+            if self._log:
                 self.collector.server_hit(node)
             return True
         else:
@@ -644,7 +1072,7 @@ class NetworkController(object):
         Keep track of trail discoveries and their success and quota amount used
         """
 
-        if self.session['log']:
+        if self._log:
             self.collector.offpath_trail(quota, success)
 
 
@@ -665,7 +1093,7 @@ class NetworkController(object):
             return self.model.cache[node].remove(self.session['content'])
 
 
-    def put_rsn(self, node, next_hop, content=None):
+    def put_rsn(self, node, next_hop, content=None, expires=None):
         """Store forwarding information in the Recently Served Name (RSN) table
         of the specified node.
         
@@ -683,6 +1111,9 @@ class NetworkController(object):
         content : any hashable type
             The content identifier to insert in the entry. If not specified
             the content being transferred in the session is used
+        expires : float, optional
+            The time at which the entry expires. It is only used if RSN
+            tables expire their entries, i.e. with TTL cache policies
         
         Returns
         -------
@@ -691,6 +1122,9 @@ class NetworkController(object):
         """
         if node in self.model.rsn:
             content = self.session['content'] if content is None else content
+            if expires is not None and self.model.rsn_expires:
+                return self.model.rsn[node].put(content, next_hop,
+                                                expires=expires)
             return self.model.rsn[node].put(content, next_hop)
     
     def get_rsn(self, node, content=None):
@@ -715,6 +1149,39 @@ class NetworkController(object):
 
         return None
 
+    def probe_rsn(self, node, next_hops, content=None, rank=True):
+        """Look up the T-FIB entries of a content towards several next hops
+        at a given node and refresh those found in a single pass.
+        
+        This is equivalent to looking up the position and then calling
+        *get_rsn* for the key of each next hop, in order.
+        
+        Parameters
+        ----------
+        node : any hashable type
+            The node where the T-FIB entries are retrieved
+        next_hops : list
+            The candidate next hops
+        content : any hashable type, optional
+            The content identifier to retrieve. If not specified
+            the content being transferred in the session is used
+        rank : bool, optional
+            If *True*, return the position of each entry found and the quota
+            associated to that position
+            
+        Returns
+        -------
+        entries : list
+            A list with one element for each next hop, which is *None* if the
+            T-FIB has no entry for it or a (next_hop, position, quota) tuple
+            otherwise.
+        """
+        if node not in self.model.rsn:
+            return [None]*len(next_hops)
+        content = self.session['content'] if content is None else content
+        rsn_key = self.model.rsn_key
+        return self.model.rsn[node].probe([rsn_key(content, v) for v in next_hops], rank)
+
     def invalidate_trail(self, trail, content=None):
         """Remove a trail consisting of RSN state at multiple nodes
 
@@ -735,7 +1202,7 @@ class NetworkController(object):
                 else:
                     rsn_entry.delete_nexthop(next_hop)
                     # Remove the RSN entry from the table if there are no nexthops 
-                    if not len(rsn_entry.nexthops):
+                    if not len(rsn_entry):
                         self.model.rsn[curr_hop].remove(content)
                         #self.remove_rsn(curr_hopm content)
 
@@ -764,9 +1231,10 @@ class NetworkController(object):
         success : bool, optional
             *True* if the session was completed successfully, *False* otherwise
         """
-        if self.collector is not None and self.session['log']:
+        if self._log:
             self.collector.end_session(success)
         self.session = None
+        self._log = False
 
     def remove_link(self, u, v):
         raise NotImplementedError('Method not yet implemented')
@@ -781,3 +1249,60 @@ class NetworkController(object):
         raise NotImplementedError('Method not yet implemented')
     
 
+
+class WarmupController(NetworkController):
+    """Network controller stripped of all event reporting, used to execute
+    warm-up requests.
+    
+    It only updates the state of caches and RSN tables of the model. No
+    collector is ever notified and the session is a single dictionary
+    reused across sessions, which only stores the content being handled.
+    """
+    
+    def __init__(self, model):
+        """Constructor
+        
+        Parameters
+        ----------
+        model : NetworkModel
+            Instance of the network model
+        """
+        super(WarmupController, self).__init__(model)
+        self.session = {'content': None, 'log': False}
+    
+    def attach_collector(self, collector):
+        """Collectors are never notified of warm-up events, so this does
+        nothing.
+        """
+        pass
+    
+    def start_session(self, timestamp, receiver, content, log=False):
+        self.session['content'] = content
+        self.model.time = timestamp
+    
+    def forward_request_path(self, s, t, path=None, main_path=True):
+        pass
+    
+    def forward_content_path(self, u, v, path=None, main_path=True):
+        pass
+    
+    def forward_request_hop(self, u, v, main_path=True):
+        pass
+    
+    def forward_off_path_request_hop(self, u, v, main_path=True):
+        pass
+    
+    def forward_content_hop(self, u, v, main_path=True):
+        pass
+    
+    def get_content(self, node):
+        if node in self.model.cache:
+            return self.model.cache[node].get(self.session['content'])
+        name, props = fnss.get_stack(self.model.topology, node)
+        return name == 'source' and self.session['content'] in props['contents']
+    
+    def follow_trail(self, quota, success):
+        pass
+    
+    def end_session(self, success=True):
+        pass
@@ -0,0 +1,74 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+
+from icarus.execution import CollectorProxy, DataCollector
+
+
+class HopCollector(DataCollector):
+
+    def __init__(self, view, name):
+        self.view = view
+        self.name = name
+        self.hops = []
+
+    def request_hop(self, u, v, main_path=True):
+        self.hops.append((u, v, main_path))
+
+    def results(self):
+        return self.hops
+
+
+class HitCollector(DataCollector):
+
+    def __init__(self, view, name):
+        self.view = view
+        self.name = name
+        self.hits = []
+
+    def cache_hit(self, node):
+        self.hits.append(node)
+
+    def results(self):
+        return self.hits
+
+
+class TestCollectorProxy(unittest.TestCase):
+
+    def check_proxy(self, compiled):
+        hop = HopCollector(None, 'HOP')
+        hit = HitCollector(None, 'HIT')
+        proxy = CollectorProxy(None, [hop, hit], compiled=compiled)
+        proxy.start_session(0, 1, 2)
+        proxy.request_hop(1, 2)
+        proxy.cache_hit(2)
+        proxy.content_hop(2, 1)
+        proxy.end_session()
+        self.assertEqual([(1, 2, True)], hop.hops)
+        self.assertEqual([2], hit.hits)
+        self.assertEqual({'HOP': [(1, 2, True)], 'HIT': [2]},
+                         dict(proxy.results()))
+
+    def test_dispatch(self):
+        self.check_proxy(False)
+
+    def test_compiled_dispatch(self):
+        self.check_proxy(True)
+
+    def test_compiled_single_listener(self):
+        hop = HopCollector(None, 'HOP')
+        proxy = CollectorProxy(None, [hop], compiled=True)
+        self.assertEqual(hop.request_hop, proxy.request_hop)
+
+    def test_compiled_multiple_listeners(self):
+        hops = [HopCollector(None, 'HOP_1'), HopCollector(None, 'HOP_2')]
+        proxy = CollectorProxy(None, hops, compiled=True)
+        proxy.request_hop(1, 2, False)
+        for c in hops:
+            self.assertEqual([(1, 2, False)], c.hops)
@@ -0,0 +1,243 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import os
+import random
+import shutil
+import tempfile
+
+import fnss
+import numpy as np
+
+from icarus.execution import exec_experiment, fork_experiments, \
+                             NetworkModel, WarmupController
+from icarus.scenarios import IcnTopology, TraceDrivenWorkload
+
+
+def ring_topology(contents=range(1, 11), cache_size=1, rsn_size=4):
+    """Return a ring of routers with a cache and, unless *rsn_size* is
+    *None*, a T-FIB each
+    """
+    topology = fnss.ring_topology(6)
+    topology.add_edge(0, 6)
+    topology.add_edge(3, 7)
+    topology.add_edge(1, 8)
+    fnss.add_stack(topology, 8, 'source', {'contents': contents})
+    for v in (6, 7):
+        fnss.add_stack(topology, v, 'receiver', {})
+    for v in range(6):
+        props = {'cache_size': cache_size}
+        if rsn_size is not None:
+            props['rsn_size'] = rsn_size
+        fnss.add_stack(topology, v, 'router', props)
+    fnss.set_delays_constant(topology, 1, 'ms')
+    return IcnTopology(topology)
+
+
+class ListWorkload(object):
+
+    def __init__(self, n_warmup, n_measured, seed):
+        rnd = random.Random(seed)
+        self.n_warmup = n_warmup
+        self.events = [(float(i), {'receiver': rnd.choice([6, 7]),
+                                   'content': rnd.randint(1, 10),
+                                   'log': i >= n_warmup})
+                       for i in range(n_warmup + n_measured)]
+
+    def __iter__(self):
+        return iter(self.events)
+
+
+class TestExecExperiment(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_experiment(self, strategy, fast_warmup, warmup_snapshot=None):
+        random.seed(1)
+        workload = ListWorkload(300, 200, 0)
+        collectors = {'CACHE_HIT_RATIO': {}, 'LATENCY': {}}
+        return exec_experiment(ring_topology(), workload, {}, strategy,
+                               {'name': 'LRU'}, collectors, strategy,
+                               fast_warmup, warmup_snapshot)
+
+    def test_fast_warmup(self):
+        for strategy in ({'name': 'LCE'},
+                         {'name': 'LIRA_DFIB_OPH', 'extra_quota': 3,
+                          'fan_out': 2}):
+            self.assertEqual(self.run_experiment(strategy, False),
+                             self.run_experiment(strategy, True))
+
+    def test_warmup_snapshot(self):
+        strategy = {'name': 'LIRA_DFIB_OPH', 'extra_quota': 3, 'fan_out': 2}
+        path = os.path.join(self.tmp_dir, 'snapshot.pickle')
+        expected = self.run_experiment(strategy, False)
+        self.assertEqual(expected, self.run_experiment(strategy, False, path))
+        self.assertTrue(os.path.isfile(path))
+        # Warm-up is now skipped and its final state restored from the file
+        self.assertEqual(expected, self.run_experiment(strategy, False, path))
+        # A warm-up strategy which does nothing must not change results
+        random.seed(1)
+        results = exec_experiment(ring_topology(), ListWorkload(300, 200, 0),
+                                  {}, strategy, {'name': 'LRU'},
+                                  {'CACHE_HIT_RATIO': {}, 'LATENCY': {}},
+                                  {'name': 'NO_CACHE'}, False, path)
+        self.assertEqual(expected, results)
+
+    def test_warmup_snapshot_policies(self):
+        # Policies other than LRU and FIFO do not support RSN tables
+        def run(cache_policy, warmup_snapshot):
+            random.seed(1)
+            return exec_experiment(ring_topology(cache_size=3, rsn_size=None),
+                                   ListWorkload(300, 200, 0), {},
+                                   {'name': 'LCE'}, cache_policy,
+                                   {'CACHE_HIT_RATIO': {}, 'LATENCY': {}},
+                                   {'name': 'LCE'}, False, warmup_snapshot)
+        for name, restored in (('LRU', True), ('FIFO', True),
+                               ('TTL_LRU', True), ('TTL_FIFO', True),
+                               ('SLRU', False), ('LFU', False),
+                               ('PERFECT_LFU', False), ('RAND', False)):
+            cache_policy = {'name': name}
+            if name.startswith('TTL_'):
+                cache_policy['ttl'] = 100
+            path = os.path.join(self.tmp_dir, '%s.pickle' % name)
+            expected = run(cache_policy, None)
+            for _ in range(2):
+                self.assertEqual(expected, run(cache_policy, path))
+            # Snapshots are only used if they restore the state exactly
+            self.assertEqual(restored, os.path.isfile(path))
+
+    def test_cdf_sketch(self):
+        results = {}
+        for cdf_rel_err in (None, 0.01):
+            random.seed(1)
+            collectors = {
+                'LATENCY': {'cdf': True, 'cdf_rel_err': cdf_rel_err},
+                'PATH_STRETCH': {'cdf': True, 'cdf_rel_err': cdf_rel_err}}
+            results[cdf_rel_err] = exec_experiment(
+                                    ring_topology(), ListWorkload(300, 200, 0),
+                                    {}, {'name': 'LCE'}, {'name': 'LRU'},
+                                    collectors, {'name': 'LCE'}, False)
+        exact, approx = results[None], results[0.01]
+        for path in (('LATENCY', 'CDF'), ('PATH_STRETCH', 'CDF_REQUEST')):
+            exact_x, exact_cdf = exact.getval(path)
+            approx_x, approx_cdf = approx.getval(path)
+            self.assertEqual(len(exact_x), len(approx_x))
+            for x_1, x_2 in zip(exact_x, approx_x):
+                self.assertAlmostEqual(x_1, x_2, delta=0.01*x_1)
+            for y_1, y_2 in zip(exact_cdf, approx_cdf):
+                self.assertAlmostEqual(y_1, y_2)
+            sketch = approx.getval(path[:1] + (path[1] + '_SKETCH',))
+            self.assertEqual(200, len(sketch))
+        self.assertEqual(exact.getval(('LATENCY', 'MEAN')),
+                         approx.getval(('LATENCY', 'MEAN')))
+
+    def test_control_plane_sampling(self):
+        strategy = {'name': 'LIRA_DFIB_OPH', 'extra_quota': 3, 'fan_out': 2}
+        results = []
+        for n_samples in (None, 8, 2):
+            random.seed(1)
+            collectors = {'CONTROL_PLANE': {'t_poll': 50, 'cdf': False,
+                                            'n_samples': n_samples,
+                                            'seed': 0}}
+            results.append(exec_experiment(
+                                    ring_topology(), ListWorkload(300, 200, 0),
+                                    {}, strategy, {'name': 'LRU'},
+                                    collectors, strategy, False))
+        exact, full_sample, sample = results
+        # Samples smaller than n_samples include all entries of RSN tables
+        for hops in ('ZERO', 'ONE', 'TWO', 'THREE'):
+            path = ('CONTROL_PLANE', 'MEAN_RSN_%s_HOP' % hops)
+            self.assertEqual(exact.getval(path), full_sample.getval(path))
+            self.assertEqual(0, full_sample.getval(
+                                ('CONTROL_PLANE', 'ERR_RSN_%s_HOP' % hops)))
+            self.assertIsNone(exact.getval(
+                                ('CONTROL_PLANE', 'ERR_RSN_%s_HOP' % hops)))
+            self.assertGreaterEqual(sample.getval(
+                                ('CONTROL_PLANE', 'ERR_RSN_%s_HOP' % hops)), 0)
+
+    def test_link_load_time_bins(self):
+        topology = ring_topology()
+        for u, v in topology.edges_iter():
+            topology.edge[u][v]['type'] = 'external' if max(u, v) >= 6 \
+                                          else 'internal'
+        random.seed(1)
+        results = exec_experiment(topology, ListWorkload(300, 200, 0), {},
+                                  {'name': 'LCE'}, {'name': 'LRU'},
+                                  {'LINK_LOAD': {'bin_size': 50}},
+                                  {'name': 'LCE'}, False)['LINK_LOAD']
+        self.assertEqual([300, 350, 400, 450], list(results['TIME_BINS']))
+        bin_loads = results['PER_LINK_TIME_BINS']
+        self.assertEqual((4, len(results['LINKS'])), bin_loads.shape)
+        per_link = dict(results['PER_LINK_INTERNAL'])
+        per_link.update(results['PER_LINK_EXTERNAL'])
+        self.assertTrue(per_link)
+        for i, link in enumerate(results['LINKS']):
+            # Sessions span 199 seconds, from 300 to 499
+            total_load = bin_loads[:, i].sum()*50/199.0
+            if link in per_link:
+                self.assertAlmostEqual(per_link[link], total_load)
+        self.assertAlmostEqual(np.mean(results['PER_LINK_INTERNAL'].values()),
+                               results['MEAN_INTERNAL'])
+
+
+class TestForkExperiments(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_trace_driven_workload(self):
+        contents = ['content-%032d\n' % i for i in range(10)]
+        reqs_file = os.path.join(self.tmp_dir, 'requests.txt')
+        contents_file = os.path.join(self.tmp_dir, 'contents.txt')
+        rnd = random.Random(0)
+        with open(reqs_file, 'w') as f:
+            f.writelines(rnd.choice(contents) for _ in range(4000))
+        with open(contents_file, 'w') as f:
+            f.writelines(contents)
+        collectors = {'CACHE_HIT_RATIO': {}, 'LATENCY': {}}
+        topology = ring_topology(contents)
+        workload = TraceDrivenWorkload(topology, reqs_file, contents_file,
+                                       10, 1000, 3000)
+        # Read requests in many blocks after warm-up
+        workload.buffering = 4096
+        random.seed(1)
+        expected = exec_experiment(topology, workload, {}, {'name': 'LCE'},
+                                   {'name': 'LRU'}, collectors,
+                                   {'name': 'LCE'})
+        # Children forked after warm-up read all remaining requests, even if
+        # they run concurrently
+        random.seed(1)
+        results = fork_experiments(ring_topology(contents), workload, {},
+                                   [{'name': 'LCE'}]*3, {'name': 'LRU'},
+                                   collectors, {'name': 'LCE'},
+                                   max_children=2)
+        self.assertEqual([expected]*3, results)
+
+
+class TestWarmupController(unittest.TestCase):
+
+    def test_get_content(self):
+        model = NetworkModel(ring_topology(), {'name': 'LRU'})
+        controller = WarmupController(model)
+        controller.attach_collector(object())
+        controller.start_session(0.0, 6, 3, True)
+        self.assertFalse(controller.get_content(0))
+        controller.put_content(0)
+        self.assertTrue(controller.get_content(0))
+        self.assertTrue(controller.get_content(8))
+        controller.forward_request_path(6, 8)
+        controller.end_session()
+        self.assertEqual(3, controller.session['content'])
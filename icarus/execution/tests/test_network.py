@@ -0,0 +1,169 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import networkx as nx
+import numpy as np
+import fnss
+
+from icarus.execution import NetworkModel, NetworkView, NetworkController, \
+                             ShortestPaths
+from icarus.execution.network import symmetrify_paths
+from icarus.scenarios import shortest_path_predecessors
+from icarus.util import all_pairs_order
+
+
+def path_topology():
+    """Return a small topology with multiple equal-cost paths
+    """
+    # Topology sketch
+    #
+    # 0 ---- 1 ---- 2 ---- 3
+    # |             |
+    # 4 ---- 5 ---- 6 ---- 7
+    #
+    topology = fnss.Topology()
+    topology.add_path([0, 1, 2, 3])
+    topology.add_path([4, 5, 6, 7])
+    topology.add_edge(0, 4)
+    topology.add_edge(2, 6)
+    fnss.set_delays_constant(topology, 1, 'ms')
+    fnss.add_stack(topology, 3, 'source', {'contents': range(5)})
+    for v in (0, 7):
+        fnss.add_stack(topology, v, 'receiver', {})
+    for v in (1, 2, 4, 5, 6):
+        fnss.add_stack(topology, v, 'router', {'cache_size': 1})
+    return topology
+
+
+class TestShortestPaths(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.topology = path_topology()
+        cls.expected = symmetrify_paths(nx.all_pairs_dijkstra_path(cls.topology))
+
+    def check_paths(self, paths):
+        for s in self.topology.nodes_iter():
+            for t in self.topology.nodes_iter():
+                self.assertEqual(self.expected[s][t], paths.path(s, t))
+                self.assertEqual(self.expected[s][t], paths[s][t])
+
+    def test_paths(self):
+        self.check_paths(ShortestPaths(self.topology))
+
+    def test_compact_paths(self):
+        self.check_paths(ShortestPaths(self.topology, compact=True))
+
+    def test_predecessors(self):
+        nodes = list(reversed(self.topology.nodes()))
+        pred = shortest_path_predecessors(self.topology, nodes)
+        self.check_paths(ShortestPaths(self.topology, nodes=nodes,
+                                       predecessors=pred))
+
+    def test_bounded_trees(self):
+        paths = ShortestPaths(self.topology, max_trees=2, compact=True)
+        self.check_paths(paths)
+        self.assertLessEqual(len(paths._trees), 2)
+
+    def test_ties(self):
+        # Grids have many equal-cost paths between each pair of nodes
+        topology = fnss.Topology(nx.grid_2d_graph(6, 6))
+        expected = symmetrify_paths(nx.all_pairs_dijkstra_path(topology))
+        nodes = all_pairs_order(topology)
+        pred = shortest_path_predecessors(topology, nodes)
+        for paths in (ShortestPaths(topology),
+                      ShortestPaths(topology, compact=True, max_trees=4),
+                      ShortestPaths(topology.copy(), nodes=nodes, order=nodes,
+                                    predecessors=pred)):
+            for s in topology.nodes_iter():
+                for t in topology.nodes_iter():
+                    self.assertEqual(expected[s][t], paths.path(s, t))
+                    self.assertEqual(list(reversed(paths.path(t, s))),
+                                     paths.path(s, t))
+
+    def test_disconnected(self):
+        topology = fnss.Topology()
+        topology.add_path([0, 1, 2])
+        topology.add_edge(3, 4)
+        for compact in (True, False):
+            paths = ShortestPaths(topology, compact=compact)
+            self.assertEqual([2, 1, 0], paths.path(2, 0))
+            self.assertRaises(KeyError, paths.path, 3, 0)
+
+    def test_network_model(self):
+        model = NetworkModel(self.topology, cache_policy={'name': 'LRU'},
+                             lazy_paths=True, compact_paths=True)
+        view = NetworkView(model)
+        self.assertIsInstance(model.shortest_path, ShortestPaths)
+        self.assertEqual(self.expected[0][3], view.shortest_path(0, 3))
+        self.assertEqual(self.expected[7][3], view.shortest_path(7, 3))
+
+
+class TestNetworkModelSnapshot(unittest.TestCase):
+
+    def test_snapshot_restore(self):
+        topology = path_topology()
+        for v in (1, 2):
+            topology.node[v]['stack'][1]['cache_size'] = 3
+            topology.node[v]['stack'][1]['rsn_size'] = 3
+        model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        for k in (1, 2, 3):
+            model.cache[2].put(k)
+        for k, v in ((10, 1), (11, 3), (12, 1)):
+            model.rsn[2].put(k, v)
+        model.rsn[2].get_nlookups()[0] = 5
+        snapshot = model.snapshot()
+        model.cache[2].put(4)
+        model.rsn[2].put(13, 3)
+        model.rsn[2].get_nlookups()[0] = 7
+        model.topology.node[3]['stack'][1]['contents'] = [9]
+        model.restore(snapshot)
+        self.assertEqual([3, 2, 1], model.cache[2].dump())
+        self.assertEqual([(12, 1), (11, 3), (10, 1)], model.rsn[2].dump())
+        self.assertEqual(5, model.rsn[2].get_nlookups()[0])
+        self.assertEqual(range(5), model.topology.node[3]['stack'][1]['contents'])
+        self.assertEqual(3, model.content_source[4])
+
+    def test_snapshot_restore_ttl(self):
+        topology = path_topology()
+        for v in (1, 2):
+            topology.node[v]['stack'][1]['cache_size'] = 3
+            topology.node[v]['stack'][1]['rsn_size'] = 3
+        model = NetworkModel(topology, cache_policy={'name': 'TTL_LRU',
+                                                     'ttl': 10})
+        model.time = 5
+        model.cache[2].put(1)
+        model.cache[2].put(2, ttl=2)
+        model.time = 6
+        snapshot = model.snapshot()
+        model.cache[2].clear()
+        model.time = 0
+        model.restore(snapshot)
+        self.assertEqual(6, model.time)
+        self.assertEqual([(2, 7), (1, 15)], model.cache[2].dump())
+        model.time = 8
+        self.assertEqual([(1, 15)], model.cache[2].dump())
+
+    def test_snapshot_restore_ttl_rsn(self):
+        topology = path_topology()
+        for v in (1, 2):
+            topology.node[v]['stack'][1]['cache_size'] = 3
+            topology.node[v]['stack'][1]['rsn_size'] = 3
+        model = NetworkModel(topology, cache_policy={'name': 'TTL_FIFO'})
+        controller = NetworkController(model)
+        controller.start_session(2, 0, 4, False)
+        controller.put_rsn(2, 1, expires=10)
+        controller.put_rsn(2, 3, content=5)
+        snapshot = model.snapshot()
+        model.rsn[2].clear()
+        model.restore(snapshot)
+        self.assertEqual([(5, 3, np.infty), (4, 1, 10)], model.rsn[2].dump())
+        controller.start_session(11, 0, 4, False)
+        self.assertIsNone(controller.get_rsn(2))
+        self.assertEqual(3, controller.get_rsn(2, 5))
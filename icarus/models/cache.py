@@ -5,6 +5,8 @@ provided by Icarus.
 """
 from collections import deque
 import random
+import array
+import heapq
 import abc
 import copy
 
@@ -16,16 +18,23 @@ from icarus.registry import register_cache_policy
 
 __all__ = [
         'LinkedSet',
+        'RankIndex',
+        'SlotIndex',
         'Cache',
         'NullCache',
         'LruCache',
         'SegmentedLruCache',
         'LfuCache',
+        'PerfectLfuCache',
         'FifoCache',
         'RandEvictionCache',
         'rand_insert_cache',
         'keyval_cache',
+        'KeyValCache',
         'ttl_cache',
+        'ttl_keyval_cache',
+        'ttl_lru_cache',
+        'ttl_fifo_cache',
            ]
 
 
@@ -39,10 +48,16 @@ class LinkedSet(object):
     It provides O(1) time complexity for the following operations: searching,
     remove from any position, move to top, move to bottom, insert after or
     before a given item.
+    
+    Nodes of the list are slotted objects and nodes of removed items are kept
+    in a bounded free list and reused for new items, so that workloads
+    continuously inserting and evicting items (e.g. LRU caches) do not
+    allocate a new node for each insertion.
     """
     class _Node(object):
         """Class implementing a node of the linked list
         """
+        __slots__ = ('val', 'up', 'down')
         
         def __init__(self, val, up=None, down=None):
             """Constructor
@@ -60,6 +75,9 @@ class LinkedSet(object):
             self.up = up
             self.down = down
     
+    # Maximum number of unused nodes kept for reuse
+    _MAX_FREE_NODES = 64
+    
     def __init__(self, iterable=[]):
         """Constructuor
         
@@ -72,6 +90,7 @@ class LinkedSet(object):
         self._top = None
         self._bottom = None
         self._map = {}
+        self._free = []
         if iterable:
             if len(set(iterable)) < len(iterable):
                 raise ValueError('The iterable parameter contains repeated '
@@ -79,6 +98,24 @@ class LinkedSet(object):
             for i in iterable:
                 self.append_bottom(i)
             
+    def _new_node(self, val, up, down):
+        """Return a node storing an item, reusing a free node if available
+        """
+        if self._free:
+            n = self._free.pop()
+            n.val = val
+            n.up = up
+            n.down = down
+            return n
+        return self._Node(val, up, down)
+    
+    def _release_node(self, n):
+        """Release the node of an item removed from the set
+        """
+        if len(self._free) < self._MAX_FREE_NODES:
+            n.val = n.up = n.down = None
+            self._free.append(n)
+    
     def __len__(self):
         """Return the number of elements in the linked set
         
@@ -172,13 +209,15 @@ class LinkedSet(object):
         """
         if self._top == None: # No elements to pop
             return None
-        k = self._top.val
-        if self._top == self._bottom: # One single element
+        n = self._top
+        k = n.val
+        if n == self._bottom: # One single element
             self._bottom = self._top = None
         else:
-            self._top.down.up = None
-            self._top = self._top.down
+            n.down.up = None
+            self._top = n.down
         self._map.pop(k)
+        self._release_node(n)
         return k
     
     def pop_bottom(self):
@@ -191,13 +230,15 @@ class LinkedSet(object):
         """
         if self._bottom == None: # No elements to pop
             return None
-        k = self._bottom.val
-        if self._bottom == self._top: # One single element
+        n = self._bottom
+        k = n.val
+        if n == self._top: # One single element
             self._top = self._bottom = None
         else:
-            self._bottom.up.down = None
-            self._bottom = self._bottom.up
+            n.up.down = None
+            self._bottom = n.up
         self._map.pop(k)
+        self._release_node(n)
         return k
     
     def append_top(self, k):
@@ -210,7 +251,7 @@ class LinkedSet(object):
         """
         if k in self._map:
             raise KeyError('The item %s is already in the set' % str(k))
-        n = self._Node(val=k, up=None, down=self._top)
+        n = self._new_node(k, None, self._top)
         if self._top == self._bottom == None:
             self._bottom = n
         else:
@@ -228,7 +269,7 @@ class LinkedSet(object):
         """
         if k in self._map:
             raise KeyError('The item %s is already in the set' % str(k))
-        n = self._Node(val=k, up=self._bottom, down=None)
+        n = self._new_node(k, self._bottom, None)
         if self._top == self._bottom == None:
             self._top = n
         else:
@@ -358,7 +399,7 @@ class LinkedSet(object):
         if n.up == None: # Insert on top
             return self.append_top(k)
         # Now I know I am inserting between two actual elements
-        m = self._Node(k, up=n.up, down=n)
+        m = self._new_node(k, n.up, n)
         n.up.down = m
         n.up = m
         self._map[k] = m
@@ -381,7 +422,7 @@ class LinkedSet(object):
         if n.down == None: # Insert on top
             return self.append_bottom(k)
         # Now I know I am inserting between two actual elements
-        m = self._Node(k, up=n, down=n.down)
+        m = self._new_node(k, n, n.down)
         n.down.up = m
         n.down = m
         self._map[k] = m
@@ -437,6 +478,7 @@ class LinkedSet(object):
         else:
             n.up.down = n.down
         self._map.pop(k)
+        self._release_node(n)
     
     def clear(self):
         """Empty the set"""
@@ -445,6 +487,266 @@ class LinkedSet(object):
         self._map.clear()
 
 
+class RankIndex(object):
+    """An order-statistics index over a set of items ordered by the time they
+    were last pushed to the top.
+    
+    Each item pushed to the top is assigned a monotonically increasing stamp
+    and a Fenwick (binary indexed) tree over the stamps counts how many items
+    are alive at each stamp. This makes it possible to compute the rank of an
+    item (i.e. the number of items pushed to the top after it) in O(log n)
+    time instead of walking a linked list.
+    
+    Push to top and removal are also executed in O(log n) time. When stamps
+    run out, live items are renumbered in O(n log n) time. Since the tree is
+    sized at least twice the number of live items after each renumbering, this
+    cost is amortized to O(log n) per operation.
+    
+    This index is used by cache policies whose items only move to the top or
+    leave the cache (e.g. LRU and FIFO) to answer position queries
+    efficiently.
+    """
+    
+    def __init__(self, capacity=64):
+        """Constructor
+        
+        Parameters
+        ----------
+        capacity : int, optional
+            The initial number of stamps available before renumbering
+        """
+        self._min_capacity = max(int(capacity), 1)
+        self._stamp = {}
+        self._reset(self._min_capacity)
+
+    def _reset(self, capacity):
+        self._capacity = capacity
+        self._tree = [0]*(capacity + 1)
+        self._next = 1
+
+    def __len__(self):
+        """Return the number of items in the index
+        
+        Returns
+        -------
+        len : int
+            The number of items
+        """
+        return len(self._stamp)
+
+    def __contains__(self, k):
+        """Return whether the index contains a given item
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to look up
+        
+        Returns
+        -------
+        contains : bool
+            *True* if the item is in the index, *False* otherwise
+        """
+        return k in self._stamp
+
+    def _update(self, i, delta):
+        tree = self._tree
+        n = self._capacity
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, i):
+        tree = self._tree
+        s = 0
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+    def _compact(self):
+        items = sorted(self._stamp, key=self._stamp.__getitem__)
+        n = len(items)
+        self._reset(max(self._min_capacity, 2*(n + 1)))
+        tree = self._tree
+        cap = self._capacity
+        for i, k in enumerate(items, 1):
+            self._stamp[k] = i
+            tree[i] = 1
+        # Linear-time Fenwick tree construction
+        for i in range(1, cap + 1):
+            j = i + (i & -i)
+            if j <= cap:
+                tree[j] += tree[i]
+        self._next = n + 1
+
+    def push_top(self, k):
+        """Put an item on top of the index. If the item is already in the
+        index, it is moved to the top.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to push
+        """
+        if k in self._stamp:
+            self._update(self._stamp.pop(k), -1)
+        if self._next > self._capacity:
+            self._compact()
+        self._stamp[k] = self._next
+        self._update(self._next, 1)
+        self._next += 1
+
+    def remove(self, k):
+        """Remove an item from the index
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to remove
+        """
+        if k not in self._stamp:
+            raise KeyError('Item %s not in the index' % str(k))
+        self._update(self._stamp.pop(k), -1)
+
+    def rank(self, k):
+        """Return the rank of an item, i.e. the number of items pushed to the
+        top after it. The item on top has rank *0*.
+        
+        This operation has a O(log n) time complexity, with n being the number
+        of stamps available.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item whose rank is queried
+            
+        Returns
+        -------
+        rank : int
+            The rank of the item
+        """
+        if k not in self._stamp:
+            raise KeyError('The item %s is not in the index' % str(k))
+        return len(self._stamp) - self._prefix(self._stamp[k])
+
+    def clear(self):
+        """Empty the index"""
+        self._stamp.clear()
+        self._reset(self._min_capacity)
+
+
+class SlotIndex(object):
+    """An index over a set of items stored in a contiguous array of slots,
+    from which items can be drawn uniformly at random.
+    
+    When an item is removed, the item stored in the last slot is moved to the
+    slot left free, so that items are added and removed in O(1) time and
+    drawing n items takes O(n) time, regardless of the number of items in the
+    index.
+    
+    This index is used by key-value caches to draw samples of their items
+    without copying them.
+    """
+    
+    def __init__(self):
+        """Constructor"""
+        self._items = []
+        self._slot = {}
+
+    def __len__(self):
+        """Return the number of items in the index
+        
+        Returns
+        -------
+        len : int
+            The number of items
+        """
+        return len(self._items)
+
+    def __contains__(self, k):
+        """Return whether the index contains a given item
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to look up
+        
+        Returns
+        -------
+        contains : bool
+            *True* if the item is in the index, *False* otherwise
+        """
+        return k in self._slot
+
+    def add(self, k):
+        """Add an item to the index, if not already present
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to add
+        """
+        if k not in self._slot:
+            self._slot[k] = len(self._items)
+            self._items.append(k)
+
+    def remove(self, k):
+        """Remove an item from the index
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to remove
+        """
+        if k not in self._slot:
+            raise KeyError('Item %s not in the index' % str(k))
+        i = self._slot.pop(k)
+        last = self._items.pop()
+        if i < len(self._items):
+            self._items[i] = last
+            self._slot[last] = i
+
+    def sample(self, n, rnd=random):
+        """Return items drawn uniformly at random, without replacement.
+        
+        Items are drawn by a partial Fisher-Yates shuffle of the slots, which
+        is then undone, so that this operation has a O(n) time complexity
+        and does not change the slots of the items.
+        
+        Parameters
+        ----------
+        n : int
+            The number of items to draw. If the index has fewer items, all
+            items are returned
+        rnd : Random, optional
+            The random number generator used to draw items
+        
+        Returns
+        -------
+        items : list
+            The drawn items
+        """
+        items = self._items
+        if n >= len(items):
+            return list(items)
+        swaps = []
+        sample = []
+        for i in range(len(items) - 1, len(items) - 1 - n, -1):
+            j = rnd.randint(0, i)
+            items[i], items[j] = items[j], items[i]
+            swaps.append((i, j))
+            sample.append(items[i])
+        for i, j in reversed(swaps):
+            items[i], items[j] = items[j], items[i]
+        return sample
+
+    def clear(self):
+        """Empty the index"""
+        del self._items[:]
+        self._slot.clear()
+
+
 class Cache(object):
     """Base implementation of a cache object"""
     
@@ -743,6 +1045,7 @@ class LruCache(Cache):
     it evicts the least recently requested one.
     This eviction policy is efficient for line speed operations because both
     search and replacement tasks can be performed in constant time (*O(1)*).
+    The position of an item in the cache can be queried in *O(log n)* time.
     
     This policy has been shown to perform well in the presence of temporal
     locality in the request pattern. However, its performance drops under the
@@ -753,6 +1056,7 @@ class LruCache(Cache):
     @inheritdoc(Cache)
     def __init__(self, maxlen, **kwargs):
         self._cache = LinkedSet()
+        self._rank = RankIndex()
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
@@ -790,7 +1094,7 @@ class LruCache(Cache):
         """
         if not k in self._cache:
             raise ValueError('The item %s is not in the cache' % str(k))
-        return self._cache.index(k)
+        return self._rank.rank(k)
 
     @inheritdoc(Cache)
     def has(self, k):
@@ -803,6 +1107,7 @@ class LruCache(Cache):
         if k not in self._cache:
             return False
         self._cache.move_to_top(k)
+        self._rank.push_top(k)
         return True
     
     def put(self, k):
@@ -824,21 +1129,29 @@ class LruCache(Cache):
         # if content in cache, push it on top, no eviction
         if k in self._cache:
             self._cache.move_to_top(k)
+            self._rank.push_top(k)
             return None
         # if content not in cache append it on top
         self._cache.append_top(k)
-        return self._cache.pop_bottom() if len(self._cache) > self._maxlen else None
+        self._rank.push_top(k)
+        if len(self._cache) > self._maxlen:
+            evicted = self._cache.pop_bottom()
+            self._rank.remove(evicted)
+            return evicted
+        return None
         
     @inheritdoc(Cache)
     def remove(self, k):
         if k not in self._cache:
             return False
         self._cache.remove(k)
+        self._rank.remove(k)
         return True
 
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
+        self._rank.clear()
 
 
 @register_cache_policy('SLRU')
@@ -874,6 +1187,9 @@ class SegmentedLruCache(Cache):
         if not isinstance(segments, int) or segments <= 0 or segments > maxlen:
             raise ValueError('segments must be an integer and 0 < segments <= maxlen')
         self._segment = [LinkedSet() for _ in range(segments)]
+        # Order-statistics index of each segment, used to answer position
+        # queries without walking the segment
+        self._rank = [RankIndex() for _ in range(segments)]
         quotient = self._maxlen // segments
         self._segment_maxlen = [quotient for _ in range(segments)]
         for i in range(self._maxlen % segments):
@@ -897,22 +1213,38 @@ class SegmentedLruCache(Cache):
     @inheritdoc(Cache)
     def has(self, k):
         return k in self._cache
-            
-    @inheritdoc(Cache)
-    def get(self, k):
-        if k not in self._cache:
-            return False
+
+    def _promote(self, k):
+        """Promote an item already in the cache to the top of the segment
+        above, demoting the bottom item of that segment if it overflows.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item to promote
+        """
         seg = self._cache[k]
         if seg == 0:
             self._segment[seg].move_to_top(k)
+            self._rank[seg].push_top(k)
         else:
             self._segment[seg].remove(k)
+            self._rank[seg].remove(k)
             self._segment[seg - 1].append_top(k)
+            self._rank[seg - 1].push_top(k)
             self._cache[k] = seg - 1
             if len(self._segment[seg - 1]) > self._segment_maxlen[seg - 1]:
                 demoted = self._segment[seg - 1].pop_bottom()
+                self._rank[seg - 1].remove(demoted)
                 self._segment[seg].append_top(demoted)
+                self._rank[seg].push_top(demoted)
                 self._cache[demoted] = seg
+            
+    @inheritdoc(Cache)
+    def get(self, k):
+        if k not in self._cache:
+            return False
+        self._promote(k)
         return True
     
     def put(self, k):
@@ -933,24 +1265,16 @@ class SegmentedLruCache(Cache):
         """
         # if content in cache, promote it, no eviction
         if k in self._cache:
-            seg = self._cache[k]
-            if seg == 0:
-                self._segment[seg].move_to_top(k)
-            else:
-                self._segment[seg].remove(k)
-                self._segment[seg - 1].append_top(k)
-                self._cache[k] = seg - 1
-                if len(self._segment[seg - 1]) > self._segment_maxlen[seg - 1]:
-                    demoted = self._segment[seg - 1].pop_bottom()
-                    self._segment[seg].append_top(demoted)
-                    self._cache[demoted] = seg
+            self._promote(k)
             return None
         # if content not in cache append on top of probatory segment and
         # possibly evict LRU item
         self._segment[-1].append_top(k)
+        self._rank[-1].push_top(k)
         self._cache[k] = len(self._segment) - 1
         if len(self._segment[-1]) > self._segment_maxlen[-1]:
             evicted = self._segment[-1].pop_bottom()
+            self._rank[-1].remove(evicted)
             self._cache.pop(evicted)
             return evicted
 
@@ -960,6 +1284,7 @@ class SegmentedLruCache(Cache):
             return False
         seg = self._cache.pop(k)
         self._segment[seg].remove(k)
+        self._rank[seg].remove(k)
         return True
 
     def position(self, k):
@@ -983,7 +1308,7 @@ class SegmentedLruCache(Cache):
         if not k in self._cache:
             raise ValueError('The item %s is not in the cache' % str(k))
         seg = self._cache[k]
-        position = self._segment[seg].index(k)
+        position = self._rank[seg].rank(k)
         return sum(len(self._segment[i]) for i in range(seg)) + position
     
     @inheritdoc(Cache)
@@ -996,6 +1321,8 @@ class SegmentedLruCache(Cache):
         self._cache.clear()
         for s in self._segment:
             s.clear()
+        for r in self._rank:
+            r.clear()
 
 
 @register_cache_policy('LFU')
@@ -1006,23 +1333,29 @@ class LfuCache(Cache):
     counters are increased when the associated item is requested. Upon
     insertion of a new item, the cache evicts the one which was requested the
     least times in the past, i.e. the one whose associated value has the
-    smallest value.
+    smallest value. Ties are broken by evicting the item inserted first.
     
     This is an implementation of an In-Cache-LFU, i.e. a cache that keeps
     counters for items only as long as they are in cache and resets the
     counter of an item when it is evicted. This is different from a Perfect-LFU
-    policy in which a counter is maintained also when the content is evicted.
+    policy in which a counter is maintained also when the content is evicted
+    (see :class:`PerfectLfuCache`).
     
     In contrast to LRU, LFU has been shown to perform optimally under IRM
-    demands. However, its implementation is computationally expensive since it
-    cannot be implemented in such a way that both search and replacement tasks
-    can be executed in constant time. This makes it particularly unfit for
-    large caches and line speed operations.
+    demands. However, its implementation is computationally more expensive
+    since it cannot be implemented in such a way that both search and
+    replacement tasks can be executed in constant time. This implementation
+    keeps a lazy min-heap of *(frequency, insertion time)* pairs, whose
+    outdated entries are discarded upon eviction, so that both hits and
+    replacements are executed in *O(log n)* amortized time.
     """
     
     @inheritdoc(Cache)
     def __init__(self, maxlen, **kwargs):
         self._cache = {}
+        # Min-heap of (freq, t, k) entries. An entry is valid only if
+        # self._cache[k] == (freq, t), outdated entries are purged lazily
+        self._heap = []
         self.t = 0
         self._maxlen = int(maxlen)
         if self._maxlen <= 0:
@@ -1041,28 +1374,60 @@ class LfuCache(Cache):
     def dump(self):
         return sorted(self._cache, key=lambda x: self._cache[x], reverse=True) 
 
+    def _push(self, k):
+        """Insert in the heap the current counter of an item in cache.
+        
+        If the heap has grown too large because of outdated entries, it is
+        rebuilt from the valid entries only.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item whose counter is pushed
+        """
+        if len(self._heap) >= 2*self._maxlen:
+            self._heap = [(freq, t, x) for x, (freq, t) in self._cache.iteritems()]
+            heapq.heapify(self._heap)
+        else:
+            freq, t = self._cache[k]
+            heapq.heappush(self._heap, (freq, t, k))
+
+    def _evict(self):
+        """Evict the item with the smallest counter from the cache
+        
+        Returns
+        -------
+        evicted : any hashable type
+            The evicted item
+        """
+        while True:
+            freq, t, k = heapq.heappop(self._heap)
+            if self._cache.get(k) == (freq, t):
+                del self._cache[k]
+                return k
+
     @inheritdoc(Cache)
     def has(self, k):
         return k in self._cache
 
     @inheritdoc(Cache)
     def get(self, k):
-        if self.has(k):
+        if k in self._cache:
             freq, t = self._cache[k]
             self._cache[k] = freq+1, t 
+            self._push(k)
             return True
         else:
             return False
 
     @inheritdoc(Cache)
     def put(self, k):
-        if not self.has(k):
+        if k not in self._cache:
             self.t += 1
             self._cache[k] = (1, self.t)
+            self._push(k)
             if len(self._cache) > self._maxlen:
-                evicted = min(self._cache, key=lambda x: self._cache[x])
-                del self._cache[evicted]
-                return evicted
+                return self._evict()
         return None
     
     @inheritdoc(Cache)
@@ -1076,8 +1441,64 @@ class LfuCache(Cache):
     @inheritdoc(Cache)
     def clear(self):
         self._cache.clear()
+        self._heap = []
 
 
+@register_cache_policy('PERFECT_LFU')
+class PerfectLfuCache(LfuCache):
+    """Perfect Least Frequently Used (LFU) cache implementation
+    
+    Differently from the In-Cache-LFU implemented by :class:`LfuCache`, this
+    policy keeps the request counter of an item also after the item is
+    evicted, so that items re-inserted in the cache resume from the number of
+    requests observed in the past. Every lookup, both successful and
+    unsuccessful, increases the counter of the looked up item.
+    
+    As a result, a newly inserted item may be evicted straight away if it has
+    been requested fewer times than all the other items in the cache.
+    
+    The memory footprint of this policy grows with the number of distinct
+    items requested and not with the size of the cache.
+    """
+    
+    @inheritdoc(Cache)
+    def __init__(self, maxlen, **kwargs):
+        super(PerfectLfuCache, self).__init__(maxlen, **kwargs)
+        # Counters of all items ever requested, including those not in cache
+        self._counter = {}
+
+    @inheritdoc(Cache)
+    def get(self, k):
+        if k in self._counter:
+            freq, t = self._counter[k]
+            self._counter[k] = freq+1, t
+        else:
+            self.t += 1
+            self._counter[k] = (1, self.t)
+        if k in self._cache:
+            self._cache[k] = self._counter[k]
+            self._push(k)
+            return True
+        else:
+            return False
+
+    @inheritdoc(Cache)
+    def put(self, k):
+        if k not in self._cache:
+            if k not in self._counter:
+                self.t += 1
+                self._counter[k] = (1, self.t)
+            self._cache[k] = self._counter[k]
+            self._push(k)
+            if len(self._cache) > self._maxlen:
+                return self._evict()
+        return None
+
+    @inheritdoc(Cache)
+    def clear(self):
+        super(PerfectLfuCache, self).clear()
+        self._counter.clear()
+
 
 @register_cache_policy('FIFO')
 class FifoCache(Cache):
@@ -1096,6 +1517,7 @@ class FifoCache(Cache):
         self._cache = set()
         self._maxlen = int(maxlen)
         self._d = deque()
+        self._rank = RankIndex()
         if self._maxlen <= 0:
             raise ValueError('maxlen must be positive')
     
@@ -1134,26 +1556,25 @@ class FifoCache(Cache):
         position : int
             The current position of the item in the cache
         """
-        i = 0
-        for c in self._d:
-            if c == k:
-                return i
-            i += 1
-        raise ValueError('The item %s is not in the cache' % str(k))
+        if k not in self._cache:
+            raise ValueError('The item %s is not in the cache' % str(k))
+        return self._rank.rank(k)
                  
     @inheritdoc(Cache)
     def get(self, k):
-        return self.has(k)
+        return k in self._cache
              
     @inheritdoc(Cache)
     def put(self, k):
         evicted = None
-        if not self.has(k):
+        if k not in self._cache:
             self._cache.add(k)
             self._d.appendleft(k)
+            self._rank.push_top(k)
         if len(self._cache) > self.maxlen:
             evicted = self._d.pop()
             self._cache.remove(evicted)
+            self._rank.remove(evicted)
         return evicted
     
     @inheritdoc(Cache)
@@ -1161,6 +1582,7 @@ class FifoCache(Cache):
         if k in self._cache:
             self._cache.remove(k)
             self._d.remove(k)
+            self._rank.remove(k)
             return True
         else:
             return False
@@ -1169,6 +1591,7 @@ class FifoCache(Cache):
     def clear(self):
         self._cache.clear()
         self._d.clear()
+        self._rank.clear()
 
 
 @register_cache_policy('RAND')
@@ -1207,12 +1630,12 @@ class RandEvictionCache(Cache):
 
     @inheritdoc(Cache)
     def get(self, k):
-        return self.has(k)
+        return k in self._cache
 
     @inheritdoc(Cache)
     def put(self, k):
         evicted = None
-        if not self.has(k):
+        if k not in self._cache:
             if len(self._cache) == self._maxlen:
                 evicted_index = random.randint(0, self.maxlen-1)
                 evicted = self._a[evicted_index]
@@ -1307,9 +1730,11 @@ def keyval_cache(cache, size):
     cache = copy.deepcopy(cache)
     print "DFIB size in keyval cache is " + repr(size)
     cache._val = {}
-    n_success = {x:0 for x in range(0, size)}
-    n_lookups = {x:0 for x in range(0, size)}
-    n_quotas = {x:1.0 for x in range(0, size)}
+    # Slots of the items in the cache, from which samples are drawn
+    cache._slots = SlotIndex()
+    n_success = array.array('l', [0])*size
+    n_lookups = array.array('l', [0])*size
+    n_quotas = array.array('d', [1.0])*size
     k_put = cache.put
     k_get = cache.get
     k_has = cache.has # Onur added this
@@ -1405,8 +1830,10 @@ def keyval_cache(cache, size):
         """
         evicted = k_put(k)
         cache._val[k] = v
+        cache._slots.add(k)
         if evicted is not None:
             val = cache._val.pop(evicted)
+            cache._slots.remove(evicted)
             return evicted, val
         
     
@@ -1444,7 +1871,10 @@ def keyval_cache(cache, size):
             The value of the deleted object or *None* if it was not in the
             cache
         """
-        return cache._val.pop(k) if k_remove(k) else None
+        if not k_remove(k):
+            return None
+        cache._slots.remove(k)
+        return cache._val.pop(k)
         
     def dump():
         """Return a dump of all the elements currently in the cache possibly
@@ -1459,9 +1889,49 @@ def keyval_cache(cache, size):
         dump = k_dump()
         return [(k, cache._val[k]) for k in dump]
     
+    def probe(keys, rank=True):
+        """Look up several items and refresh the state of those found in the
+        cache in a single pass.
+        
+        Items are processed in the order they are given. For each item in the
+        cache, its position is read (if requested) and then the item is
+        retrieved as if *get(k)* were called. This is equivalent to calling
+        *position(k)* and *get(k)* for each item in the cache, in order.
+        
+        Parameters
+        ----------
+        keys : list
+            The items looked up in the cache
+        rank : bool, optional
+            If *True*, return the position of each item found and the quota
+            associated to that position
+        
+        Returns
+        -------
+        entries : list
+            A list with one element for each item looked up, which is *None*
+            if the item is not in the cache or a (value, position, quota)
+            tuple otherwise. If *rank* is *False*, position and quota are
+            *None*
+        """
+        val = cache._val
+        entries = []
+        for k in keys:
+            if k not in val:
+                entries.append(None)
+            elif rank:
+                position = k_position(k)
+                k_get(k)
+                entries.append((val[k], position, n_quotas[position]))
+            else:
+                k_get(k)
+                entries.append((val[k], None, None))
+        return entries
+
     def clear():
         k_clear()
         cache._val.clear()
+        cache._slots.clear()
 
     def value(k):
         """Return the value of item k
@@ -1481,6 +1951,28 @@ def keyval_cache(cache, size):
             cache
         """
         return cache._val[k] if k in cache._val else None
+    
+    def sample(n, rnd=random):
+        """Return items of the cache drawn uniformly at random, without
+        replacement.
+        
+        Calling this method does not change the internal state of the cache.
+        
+        Parameters
+        ----------
+        n : int
+            The number of items to draw. If the cache has fewer items, all
+            items are returned
+        rnd : Random, optional
+            The random number generator used to draw items
+        
+        Returns
+        -------
+        items : list of tuples
+            The list of drawn items represented as key, value pairs
+        """
+        val = cache._val
+        return [(k, val[k]) for k in cache._slots.sample(n, rnd)]
         
     cache.put = put
     cache.get = get
@@ -1490,6 +1982,8 @@ def keyval_cache(cache, size):
     cache.clear.__doc__ = k_clear.__doc__
     cache.value = value
     cache.has = has
+    cache.probe = probe
+    cache.sample = sample
     # Onur added the following
     cache.get_nlookups = get_nlookups
     cache.get_nsuccess = get_nsuccess
@@ -1499,7 +1993,369 @@ def keyval_cache(cache, size):
     return cache
     
 
-def ttl_cache(cache, f_time):
+class _KeyValNode(object):
+    """Node of the linked list of a KeyValCache, storing an item together
+    with its value
+    """
+    __slots__ = ('key', 'val', 'prev', 'next')
+
+    def __init__(self, key, val):
+        self.key = key
+        self.val = val
+        self.prev = self
+        self.next = self
+
+
+class KeyValCache(object):
+    """Least Recently Used (LRU) cache of key-value items, with per-rank
+    lookup statistics. It is used to implement Recently Served Name (RSN)
+    tables.
+    
+    This class provides the same interface as an LRU cache modified by
+    *keyval_cache*, but values are stored in the nodes of the linked list
+    ordering the items and per-rank quotas, lookups and successes are stored
+    in compact arrays, whose NumPy views are returned by *stats*.
+    """
+    __slots__ = ('_maxlen', '_size', '_map', '_head', '_rank', '_slots',
+                 '_quota', '_nlookups', '_nsuccess')
+
+    def __init__(self, maxlen, size=None):
+        """Constructor
+        
+        Parameters
+        ----------
+        maxlen : int
+            The maximum number of items the cache can store
+        size : int, optional
+            The number of ranks for which statistics are kept. If not
+            specified, it is equal to *maxlen*
+        """
+        self._maxlen = int(maxlen)
+        if self._maxlen <= 0:
+            raise ValueError('maxlen must be positive')
+        self._size = self._maxlen if size is None else int(size)
+        self._map = {}
+        # Sentinel node: the item after it is the most recently used and the
+        # item before it is the least recently used
+        self._head = _KeyValNode(None, None)
+        self._rank = RankIndex()
+        self._slots = SlotIndex()
+        self._quota = array.array('d', [1.0])*self._size
+        self._nlookups = array.array('l', [0])*self._size
+        self._nsuccess = array.array('l', [0])*self._size
+
+    def __len__(self):
+        return len(self._map)
+
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    def _unlink(self, node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
+
+    def _link_top(self, node):
+        head = self._head
+        node.prev = head
+        node.next = head.next
+        head.next.prev = node
+        head.next = node
+
+    def get_size(self):
+        """Return the number of ranks for which statistics are kept
+        """
+        return self._size
+
+    def get_quota(self):
+        """Return per-rank quota values
+        """
+        return self._quota
+
+    def get_nlookups(self):
+        """Return per-rank lookup statistics
+        """
+        return self._nlookups
+
+    def get_nsuccess(self):
+        """Return per-rank success statistics
+        """
+        return self._nsuccess
+
+    def stats(self):
+        """Return per-rank statistics as NumPy arrays sharing memory with
+        the arrays returned by *get_quota*, *get_nlookups* and *get_nsuccess*
+        
+        Returns
+        -------
+        quota : Numpy array
+            Per-rank quota values
+        nlookups : Numpy array
+            Per-rank number of lookups
+        nsuccess : Numpy array
+            Per-rank number of successes
+        """
+        return (np.frombuffer(self._quota, dtype=np.float64),
+                np.frombuffer(self._nlookups, dtype=np.int_),
+                np.frombuffer(self._nsuccess, dtype=np.int_))
+
+    def position(self, k):
+        """Return the current position of an item in the cache. Position *0*
+        refers to the head of cache (i.e. most recently used item), while
+        position *maxlen - 1* refers to the tail of the cache (i.e. the least
+        recently used item).
+        
+        This method does not change the internal state of the cache.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+            
+        Returns
+        -------
+        position : int
+            The current position of the item in the cache
+        """
+        if k not in self._map:
+            raise ValueError('The item %s is not in the cache' % str(k))
+        return self._rank.rank(k)
+
+    def has(self, k):
+        """Return the value of an item without changing the internal state of
+        the cache
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        v : any hashable type
+            The value of the requested object or *None* if it is not in the
+            cache
+        """
+        node = self._map.get(k)
+        return node.val if node is not None else None
+
+    value = has
+
+    def get(self, k):
+        """Retrieve an item from the cache, moving it to the top
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        v : any hashable type
+            The value of the requested object or *None* if it is not in the
+            cache
+        """
+        node = self._map.get(k)
+        if node is None:
+            return None
+        self._unlink(node)
+        self._link_top(node)
+        self._rank.push_top(k)
+        return node.val
+
+    def put(self, k, v):
+        """Insert an item in the cache or, if already present, update its
+        value and move it to the top.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The key of item to be inserted
+        v : any hashable type
+            The value of item to be inserted
+            
+        Returns
+        -------
+        evicted : tuple
+            The key, value tuple of the evicted object or *None* if no contents
+            were evicted.
+        """
+        node = self._map.get(k)
+        if node is not None:
+            node.val = v
+            self._unlink(node)
+            self._link_top(node)
+            self._rank.push_top(k)
+            return None
+        node = _KeyValNode(k, v)
+        self._map[k] = node
+        self._link_top(node)
+        self._rank.push_top(k)
+        self._slots.add(k)
+        if len(self._map) > self._maxlen:
+            evicted = self._head.prev
+            self._unlink(evicted)
+            del self._map[evicted.key]
+            self._rank.remove(evicted.key)
+            self._slots.remove(evicted.key)
+            return evicted.key, evicted.val
+        return None
+
+    def remove(self, k):
+        """Remove an item from the cache, if present
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The item looked up in the cache
+
+        Returns
+        -------
+        v : any hashable type
+            The value of the deleted object or *None* if it was not in the
+            cache
+        """
+        node = self._map.pop(k, None)
+        if node is None:
+            return None
+        self._unlink(node)
+        self._rank.remove(k)
+        self._slots.remove(k)
+        return node.val
+
+    def dump(self):
+        """Return all items in the cache, from the most to the least recently
+        used
+        
+        Returns
+        -------
+        cache_dump : list of tuples
+            The list of items currently stored in the cache represented as
+            key, value pairs
+        """
+        dump = []
+        head = self._head
+        node = head.next
+        while node is not head:
+            dump.append((node.key, node.val))
+            node = node.next
+        return dump
+
+    def probe(self, keys, rank=True):
+        """Look up several items and refresh those found in the cache in a
+        single pass.
+        
+        This is equivalent to calling *position(k)* and *get(k)* for each item
+        in the cache, in order.
+        
+        Parameters
+        ----------
+        keys : list
+            The items looked up in the cache
+        rank : bool, optional
+            If *True*, return the position of each item found and the quota
+            associated to that position
+        
+        Returns
+        -------
+        entries : list
+            A list with one element for each item looked up, which is *None*
+            if the item is not in the cache or a (value, position, quota)
+            tuple otherwise. If *rank* is *False*, position and quota are
+            *None*
+        """
+        nodes = self._map
+        index = self._rank
+        quota = self._quota
+        entries = []
+        for k in keys:
+            node = nodes.get(k)
+            if node is None:
+                entries.append(None)
+                continue
+            if rank:
+                position = index.rank(k)
+                entries.append((node.val, position, quota[position]))
+            else:
+                entries.append((node.val, None, None))
+            self._unlink(node)
+            self._link_top(node)
+            index.push_top(k)
+        return entries
+
+    def sample(self, n, rnd=random):
+        """Return items of the cache drawn uniformly at random, without
+        replacement, without changing the internal state of the cache.
+        
+        Parameters
+        ----------
+        n : int
+            The number of items to draw. If the cache has fewer items, all
+            items are returned
+        rnd : Random, optional
+            The random number generator used to draw items
+        
+        Returns
+        -------
+        items : list of tuples
+            The list of drawn items represented as key, value pairs
+        """
+        nodes = self._map
+        return [(k, nodes[k].val) for k in self._slots.sample(n, rnd)]
+
+    def clear(self):
+        """Empty the cache, without resetting per-rank statistics
+        """
+        self._map.clear()
+        self._head.prev = self._head.next = self._head
+        self._rank.clear()
+        self._slots.clear()
+
+
+def _push_expiry(cache, k, expires):
+    """Index the expiration time of an item of a TTL cache, compacting the
+    heap of expiration times if it mostly contains stale entries
+    
+    Parameters
+    ----------
+    cache : Cache
+        The TTL cache, whose *expiry* dict already maps the item to *expires*
+    k : any hashable type
+        The item
+    expires : float
+        The expiration time of the item
+    """
+    heap = cache._exp_heap
+    if len(heap) > 2 * len(cache.expiry) + 64:
+        heap[:] = [(e, i) for i, e in cache.expiry.iteritems()
+                   if e != np.infty]
+        heapq.heapify(heap)
+    # Items with infinite TTL never expire so they need not be indexed
+    if expires != np.infty:
+        heapq.heappush(heap, (expires, k))
+
+
+def _purge_expired(cache, expiry, remove):
+    """Purge all items of a TTL cache expired before a certain time
+    
+    Parameters
+    ----------
+    cache : Cache
+        The TTL cache
+    expiry : float
+        Cutoff expiration time
+    remove : callable
+        The function removing an item from the underlying cache
+    """
+    heap = cache._exp_heap
+    while heap and heap[0][0] < expiry:
+        expires, k = heapq.heappop(heap)
+        if cache.expiry.get(k) == expires:
+            cache.expiry.pop(k)
+            remove(k)
+
+
+def ttl_cache(cache, f_time, ttl=None):
     """Return a TTL cache.
     
     This function takes as a input a cache policy and returns a new policy
@@ -1518,6 +2374,9 @@ def ttl_cache(cache, f_time):
     f_time : callable
         A function that returns the current time (simulated or real). The
         return type must be a numerical value, e.g. float
+    ttl : float, optional
+        The default TTL of items inserted without specifying a TTL or an
+        expiration time. If not specified, such items have infinite TTL
         
     Returns
     -------
@@ -1531,7 +2390,13 @@ def ttl_cache(cache, f_time):
     normal caches are used with common routing and caching strategies.
     However, if other operations like *position* or *len* are executed,
     results may take into account also expired items. In such cases, it is then
-    advisable to execute a *purge* first.  
+    advisable to execute a *purge* first.
+    
+    Expiration times are indexed by a binary heap of (expiration time, key)
+    entries, so that inserting an item costs O(log n). Entries of removed
+    items or of items whose expiration time has been updated are not removed
+    from the heap but discarded when they reach its top. The heap is rebuilt
+    when stale entries outnumber valid ones.
     """
     if not isinstance(cache, Cache):
         raise TypeError('cache must be an instance of Cache or its subclasses')
@@ -1542,9 +2407,12 @@ def ttl_cache(cache, f_time):
     cache = copy.deepcopy(cache)
     
     cache.f_time = f_time
+    cache.ttl = default_ttl = ttl
     cache.expiry = {}
     
-    cache._exp_list = LinkedSet()
+    # Heap of (expiration time, key) entries. An entry is valid only if the
+    # item is still in the cache with the same expiration time
+    cache._exp_heap = []
     
     c_put = cache.put
     c_get = cache.get
@@ -1554,18 +2422,8 @@ def ttl_cache(cache, f_time):
     c_clear = cache.clear
     
     def _purge_till(expiry):
-        """Purge all entries expired before a certain time
-        
-        Parameters
-        ----------
-        expiry : float
-            Cutoff expiration time
-        """
-        while cache._exp_list.bottom is not None and \
-              cache.expiry[cache._exp_list.bottom] < expiry:
-            expired = cache._exp_list.pop_bottom()
-            cache.expiry.pop(expired)
-            c_remove(expired)
+        """Purge all entries expired before a certain time"""
+        _purge_expired(cache, expiry, c_remove)
         
     def purge():
         """Purge all expired items"""
@@ -1594,7 +2452,7 @@ def ttl_cache(cache, f_time):
         expires : float, optional
             The absolute expiration time of the item. It cannot be used in
             conjunction with ttl. If both ttl and expires are None, then the
-            inserted content has infinite TTL.
+            inserted content has the default TTL of the cache.
             
         Returns
         -------
@@ -1606,6 +2464,9 @@ def ttl_cache(cache, f_time):
             if expires is not None:
                 raise ValueError('Both expires and ttl parameters provided. '
                              'Only one can be provided.')
+        elif expires is None:
+            ttl = default_ttl
+        if ttl is not None:
             if ttl <= 0:
                 # if TTL is not positive, then do not cache the content at all
                 return None
@@ -1622,20 +2483,9 @@ def ttl_cache(cache, f_time):
         evicted = c_put(k)
         if evicted is not None:
             cache.expiry.pop(evicted)
-            cache._exp_list.remove(evicted)
         if k not in cache.expiry or cache.expiry[k] < expires:
             cache.expiry[k] = expires
-            if k in cache._exp_list:
-                cache._exp_list.remove(k)
-            if len(cache._exp_list) == 0:
-                cache._exp_list.append_top(k)
-            else:
-                for i in cache._exp_list:
-                    if expires >= cache.expiry[i]:
-                        cache._exp_list.insert_above(i, k)
-                        break
-                else:
-                    cache._exp_list.append_bottom(k)
+            _push_expiry(cache, k, expires)
         return evicted
     
     def has(k):
@@ -1644,7 +2494,6 @@ def ttl_cache(cache, f_time):
     def remove(k):
         c_remove(k)
         cache.expiry.pop(k)
-        cache._exp_list.remove(k)
         
     def dump():
         """Return a dump of all the elements currently in the cache possibly
@@ -1663,7 +2512,7 @@ def ttl_cache(cache, f_time):
     def clear():
         c_clear()
         cache.expiry.clear()
-        cache._exp_list.clear()
+        del cache._exp_heap[:]
 
     cache._purge_till = _purge_till
     
@@ -1678,5 +2527,227 @@ def ttl_cache(cache, f_time):
     
     return cache
 
-def ttl_keyval_cache():
-    pass
+
+@register_cache_policy('TTL_LRU')
+def ttl_lru_cache(maxlen, f_time, ttl=None, **kwargs):
+    """Return a Least Recently Used (LRU) cache whose items expire after a
+    TTL, as returned by *ttl_cache*.
+    
+    Parameters
+    ----------
+    maxlen : int
+        The maximum number of items the cache can store
+    f_time : callable
+        A function that returns the current time. When the cache is
+        instantiated by the network model, it returns the simulation time
+    ttl : float, optional
+        The default TTL of inserted items. If not specified, items inserted
+        without a TTL never expire
+        
+    Returns
+    -------
+    cache : Cache
+        The TTL cache
+    """
+    return ttl_cache(LruCache(maxlen), f_time, ttl)
+
+
+@register_cache_policy('TTL_FIFO')
+def ttl_fifo_cache(maxlen, f_time, ttl=None, **kwargs):
+    """Return a First In First Out (FIFO) cache whose items expire after a
+    TTL, as returned by *ttl_cache*.
+    
+    Parameters
+    ----------
+    maxlen : int
+        The maximum number of items the cache can store
+    f_time : callable
+        A function that returns the current time. When the cache is
+        instantiated by the network model, it returns the simulation time
+    ttl : float, optional
+        The default TTL of inserted items. If not specified, items inserted
+        without a TTL never expire
+        
+    Returns
+    -------
+    cache : Cache
+        The TTL cache
+    """
+    return ttl_cache(FifoCache(maxlen), f_time, ttl)
+
+def ttl_keyval_cache(cache, f_time, size=None, ttl=None):
+    """Return a key-value cache whose items expire.
+    
+    This function takes as input a cache policy and returns a key-value cache,
+    as returned by *keyval_cache*, where items are (optionally) labelled with
+    their expiration time when inserted and are automatically evicted when
+    their validity expires.
+    
+    Expiration times are indexed by a binary heap of (expiration time, key)
+    entries, like in *ttl_cache*. Expired items are purged in bulk before
+    each lookup or insertion, so that they are never returned and purging
+    costs O(log n) amortized per item.
+    
+    Parameters
+    ----------
+    cache : Cache
+        The instance of a cache to be changed to a key-value TTL cache
+    f_time : callable
+        A function that returns the current time (simulated or real). The
+        return type must be a numerical value, e.g. float
+    size : int, optional
+        The number of ranks for which lookup statistics are kept. If not
+        specified, it is equal to the maximum size of the cache
+    ttl : float, optional
+        The default TTL of items inserted without specifying a TTL or an
+        expiration time. If not specified, such items have infinite TTL
+        
+    Returns
+    -------
+    cache : Cache
+        The modified cache instance
+    """
+    if not hasattr(f_time, '__call__'):
+        raise TypeError('f_time must be callable')
+    cache = keyval_cache(cache, cache.maxlen if size is None else size)
+    
+    cache.f_time = f_time
+    cache.ttl = default_ttl = ttl
+    cache.expiry = {}
+    
+    # Heap of (expiration time, key) entries. An entry is valid only if the
+    # item is still in the cache with the same expiration time
+    cache._exp_heap = []
+    
+    kv_put = cache.put
+    kv_get = cache.get
+    kv_has = cache.has
+    kv_value = cache.value
+    kv_position = cache.position
+    kv_probe = cache.probe
+    kv_sample = cache.sample
+    kv_remove = cache.remove
+    kv_dump = cache.dump
+    kv_clear = cache.clear
+    
+    def _purge_till(expiry):
+        """Purge all entries expired before a certain time"""
+        _purge_expired(cache, expiry, kv_remove)
+    
+    def purge():
+        """Purge all expired items"""
+        cache._purge_till(cache.f_time())
+    
+    def put(k, v, ttl=None, expires=None):
+        """Insert an item in the cache, or replace its value and expiration
+        time if already inserted.
+        
+        Parameters
+        ----------
+        k : any hashable type
+            The key of item to be inserted
+        v : any hashable type
+            The value of item to be inserted
+        ttl : float, optional
+            The TTL of the item, i.e. its relative expiration time
+        expires : float, optional
+            The absolute expiration time of the item. It cannot be used in
+            conjunction with ttl. If both ttl and expires are None, then the
+            inserted item has the default TTL of the cache.
+            
+        Returns
+        -------
+        evicted : tuple
+            The key, value tuple of the evicted object or *None* if no
+            items were evicted.
+        """
+        now = cache.f_time()
+        if ttl is not None:
+            if expires is not None:
+                raise ValueError('Both expires and ttl parameters provided. '
+                             'Only one can be provided.')
+        elif expires is None:
+            ttl = default_ttl
+        if ttl is not None:
+            expires = now + ttl
+        elif expires is None:
+            expires = np.infty
+        if expires <= now:
+            # An already expired item is not inserted at all
+            return None
+        cache._purge_till(now)
+        evicted = kv_put(k, v)
+        if evicted is not None:
+            cache.expiry.pop(evicted[0])
+        if cache.expiry.get(k) != expires:
+            cache.expiry[k] = expires
+            _push_expiry(cache, k, expires)
+        return evicted
+    
+    def get(k):
+        cache._purge_till(cache.f_time())
+        return kv_get(k)
+    
+    def has(k):
+        cache._purge_till(cache.f_time())
+        return kv_has(k)
+    
+    def value(k):
+        cache._purge_till(cache.f_time())
+        return kv_value(k)
+    
+    def position(k):
+        cache._purge_till(cache.f_time())
+        return kv_position(k)
+    
+    def probe(keys, rank=True):
+        cache._purge_till(cache.f_time())
+        return kv_probe(keys, rank)
+    
+    def sample(n, rnd=random):
+        cache._purge_till(cache.f_time())
+        return kv_sample(n, rnd)
+    
+    def remove(k):
+        cache.expiry.pop(k, None)
+        return kv_remove(k)
+    
+    def dump():
+        """Return a dump of all the elements currently in the cache possibly
+        sorted according to the eviction policy.
+        
+        Returns
+        -------
+        cache_dump : list of tuples
+            The list of items currently stored in the cache represented as
+            (key, value, expiration time) tuples
+        """
+        cache.purge()
+        return [(k, v, cache.expiry[k]) for k, v in kv_dump()]
+    
+    def clear():
+        kv_clear()
+        cache.expiry.clear()
+        del cache._exp_heap[:]
+    
+    for f, kv_f in ((get, kv_get), (has, kv_has), (value, kv_value),
+                    (position, kv_position), (probe, kv_probe),
+                    (sample, kv_sample), (remove, kv_remove),
+                    (clear, kv_clear)):
+        f.__doc__ = kv_f.__doc__
+    
+    cache._purge_till = _purge_till
+    
+    cache.put = put
+    cache.get = get
+    cache.has = has
+    cache.value = value
+    cache.position = position
+    cache.probe = probe
+    cache.sample = sample
+    cache.remove = remove
+    cache.dump = dump
+    cache.clear = clear
+    cache.purge = purge
+    
+    return cache
@@ -5,10 +5,12 @@ from __future__ import division
 import random
 import abc
 import collections
+import itertools
 
 import networkx as nx
 
 from icarus.registry import register_strategy
+from icarus.models.cache import LinkedSet
 from icarus.util import inheritdoc, multicast_tree, path_links
 
 
@@ -48,6 +50,9 @@ class RsnNexthop(object):
     A nexthop entry along with its properties such as timestamp of insertion, 
     distance to the serving node, etc.
     """
+    __slots__ = ('nexthop', 'destination', 'distance', 'time_stamp',
+                 'used_before')
+
     def __init__(self, nexthop, dest, distance, time_stamp, used=False):
         """Constructor
 
@@ -132,7 +137,12 @@ def get_timestamp(rsn_nexthop_obj):
     return rsn_nexthop_obj.time_stamp
 
 class RsnEntry(object):
-    """An entry in the RSN table retrieved by using a content name as the index"""
+    """An entry in the RSN table retrieved by using a content name as the index
+    
+    Nexthops are indexed by their next-hop node and ordered from the freshest
+    to the oldest one in a linked set, so that the freshest nexthops can be
+    looked up and stale ones removed without scanning or sorting all of them.
+    """
     # self.expiration_interval = 0
 
     def __init__(self, fresh_interval = float("inf"), expiration_interval = float("inf")):
@@ -140,11 +150,13 @@ class RsnEntry(object):
         
         Parameters
         ----------
-        nexthops : a list of RsnNexthop objects,
         fresh_interval : the limit on the age of an entry for it to be considered fresh
         expiration_interval : the limit on the age of an entry; entry considered stale if age > expiration_interval
         """
-        self.nexthops = []
+        # Dictionary of RsnNexthop objects keyed by next-hop node
+        self._nexthops = {}
+        # Next-hop nodes, from the freshest (top) to the oldest (bottom)
+        self._order = LinkedSet()
         self.fresh_interval = fresh_interval
         self.expiration_interval = expiration_interval
         #RsnEntry.expiration_interval = expiration_interval
@@ -155,6 +167,23 @@ class RsnEntry(object):
         """
         return hash(repr(self))
 
+    def __len__(self):
+        return len(self._nexthops)
+
+    @property
+    def nexthops(self):
+        """List of RsnNexthop objects, from the freshest to the oldest"""
+        return [self._nexthops[nh] for nh in self._order]
+
+    def _freshest(self, excluded=()):
+        """Iterate over nexthops from the freshest to the oldest, skipping
+        those whose next-hop node is in excluded
+        """
+        nexthops = self._nexthops
+        for nh in self._order:
+            if nh not in excluded:
+                yield nexthops[nh]
+
     def get_nexthop(self, node):
         """
         Fetch the nexthop entry whose next-hop field is node
@@ -167,12 +196,7 @@ class RsnEntry(object):
         Return RsnNexthop whose nexthop property is node
         If there is no such RnsNexthop, then return None
         """
-        for nh in self.nexthops:
-            if nh.nexthop == node:
-                return nh
-        else:
-            return None
-
+        return self._nexthops.get(node)
 
     def delete_nexthop(self, nh):
         """ Delete a nexthop from the entry
@@ -181,7 +205,24 @@ class RsnEntry(object):
         ----------
         nh : node identifier; delete nexthop entry whose nexthop is nh
         """
-        self.nexthops = [x for x in self.nexthops if x.nexthop != nh] 
+        if self._nexthops.pop(nh, None) is not None:
+            self._order.remove(nh)
+
+    def purge(self, time):
+        """Remove stale nexthop entries, i.e. entries whose age is greater
+        than the expiration interval.
+
+        Stale entries are the oldest ones, so they are popped from the bottom
+        of the ordered nexthops.
+
+        Parameters
+        ----------
+        time : current time
+        """
+        order = self._order
+        while order.bottom is not None and \
+              self._nexthops[order.bottom].is_expired(time, self.expiration_interval):
+            del self._nexthops[order.pop_bottom()]
 
     def insert_nexthop(self, nexthop, dest, distance, time, is_used=False):
         """insert a nexthop entry along with distance and time of insertion attributes
@@ -197,19 +238,29 @@ class RsnEntry(object):
         if an entry exists with the same nexthop attr, update attr. and return the entry
         otherwise return the new entry inserted
         """
-        self.nexthops = [x for x in self.nexthops if not x.is_expired(time, self.expiration_interval)]
-        # check if there is a nexthop entry
-        for nh in self.nexthops:
-            if nh.nexthop == nexthop:
-                nh.time_stamp = time
-                nh.destination = dest
-                nh.distance = distance
-                nh.is_used = is_used
-                return nh
-
-        nexthop = RsnNexthop(nexthop, dest, distance, time, is_used)
-        self.nexthops.append(nexthop)
-        return nexthop
+        self.purge(time)
+        order = self._order
+        nh = self._nexthops.get(nexthop)
+        if nh is not None:
+            nh.time_stamp = time
+            nh.destination = dest
+            nh.distance = distance
+            # A trail used before remains so even if refreshed without use
+            if is_used:
+                nh.used_before = True
+            order.remove(nexthop)
+        else:
+            nh = RsnNexthop(nexthop, dest, distance, time, is_used)
+            self._nexthops[nexthop] = nh
+        # Timestamps are normally set to the current time, so the nexthop
+        # goes on top, but an older timestamp is placed in its order
+        for i in order:
+            if self._nexthops[i].time_stamp <= time:
+                order.insert_above(i, nexthop)
+                break
+        else:
+            order.append_bottom(nexthop)
+        return nh
  
     # this method prefers a "used" nexthop over other unused nexthop entries
     def get_best_k_entry(self, time, node, num_entries):
@@ -225,26 +276,20 @@ class RsnEntry(object):
         Used entry means that the trail has been used to retrieve content before.
 
         """
-
-        self.nexthops = [x for x in self.nexthops if not x.is_expired(time, self.expiration_interval)] # remove stale entries
-        
-        # list comprehension is a nice tool!
-        best_nexthops = [x for x in self.nexthops if x.is_used_and_fresh(time, self.fresh_interval)]
-        best_nexthops = [x for x in best_nexthops if x.nexthop != node]
-        
-        best_nexthops.sort(key=get_timestamp, reverse=True)
-        if (len(best_nexthops) >= num_entries):
-            return best_nexthops[0:num_entries]
-        
-        # Add freshest nexthops if there is still space 
-        filtered_nexthops = [x for x in self.nexthops if not x.is_used_and_fresh(time, self.fresh_interval)]
-        filtered_nexthops = [x for x in filtered_nexthops if x.nexthop != node]
-        
-        filtered_nexthops.sort(key=get_timestamp, reverse=True)
-        len_best_nexthops = len(best_nexthops)
-        for nh in filtered_nexthops[0:(num_entries-len_best_nexthops)]:
-            best_nexthops.append(nh)
-        
+        self.purge(time)
+        best_nexthops = []
+        other_nexthops = []
+        for nh in self._freshest((node,)):
+            if nh.is_used_and_fresh(time, self.fresh_interval):
+                best_nexthops.append(nh)
+                if len(best_nexthops) == num_entries:
+                    break
+            elif len(best_nexthops) + len(other_nexthops) < num_entries:
+                other_nexthops.append(nh)
+            elif not nh.is_fresh(time, self.fresh_interval):
+                # All remaining nexthops are older, hence not fresh
+                break
+        best_nexthops.extend(other_nexthops[:num_entries - len(best_nexthops)])
         return best_nexthops
 
     def get_freshest_entry(self, time):
@@ -258,14 +303,9 @@ class RsnEntry(object):
         freshest nexthop (i.e., with min age) entry that is not stale
         Otherwise, it returns None
         """
-        self.nexthops = [x for x in self.nexthops if not x.is_expired(time, self.expiration_interval)] # remove stale entries
-        
-        freshest = None
-        for n in self.nexthops:
-            if freshest is None or n.age(time) < freshest.age(time):
-                freshest = n
-
-        return freshest
+        self.purge(time)
+        top = self._order.top
+        return self._nexthops[top] if top is not None else None
     
     def get_freshest_except_node(self, time, node):
         """ 
@@ -278,16 +318,7 @@ class RsnEntry(object):
         freshest nexthop : freshest (i.e., with min age) entry that is not stale and whose node attr is not equal to node
         Otherwise, it returns None
         """
-        self.nexthops = [x for x in self.nexthops if not x.is_expired(time, self.expiration_interval)]
-        freshest = None
-        for n in self.nexthops:
-            if freshest is None or (n.age(time) < freshest.age(time) and n.nexthop != node):
-                freshest = n
-
-        if freshest is not None and freshest.nexthop == node:
-            freshest = None
-
-        return freshest
+        return self.get_freshest_except_nodes(time, (node,))
     
     def get_topk_freshest_except_node(self, time, node, k):
         """ 
@@ -301,20 +332,8 @@ class RsnEntry(object):
         -------
         list of k most freshest nexthops : freshest (i.e., with min age) entry that is not stale and whose node attr is not equal to node
         """
-        
-        self.nexthops = [x for x in self.nexthops if not x.is_expired(time, self.expiration_interval)]
-        # Sort the list of nexthops by their age
-        self.nexthops.sort(key=get_timestamp, reverse=True)
-        
-        filtered_nexthops = self.nexthops[:]
-        filtered_nexthops = [x for x in filtered_nexthops if x.nexthop != node]
-        return filtered_nexthops[0:k]
-
-        #nexthop_obj = self.nexthops[0] if len(self.nexthops) > 0 else None
-        #if nexthop_obj is not None and nexthop_obj.is_fresh(time, self.fresh_interval):
-        #    return [nexthop_obj]
-        #else:
-        #    return self.nexthops[0:k]
+        self.purge(time)
+        return list(itertools.islice(self._freshest((node,)), k))
 
     def get_freshest_except_nodes(self, time, nodes):
         """ 
@@ -328,16 +347,8 @@ class RsnEntry(object):
         freshest nexthop : freshest (i.e., with min age) entry that is not stale and whose node attr is not equal to node
         Otherwise, it returns None
         """
-        self.nexthops = [x for x in self.nexthops if not x.is_expired(time, self.expiration_interval)]
-        freshest = None
-        for n in self.nexthops:
-            if freshest is None or (n.age(time) < freshest.age(time) and n.nexthop not in nodes):
-                freshest = n
-        
-        if freshest is not None and freshest.nexthop in nodes:
-            freshest = None
-
-        return freshest
+        self.purge(time)
+        return next(self._freshest(nodes), None)
 
 
 class Strategy(object):
@@ -1427,7 +1438,7 @@ class LiraBcHybrid(Strategy):
                     rsn_nexthop_obj = rsn_entry.get_freshest_except_node(time, prev_hop)
                     rsn_hop = rsn_nexthop_obj.nexthop if rsn_nexthop_obj is not None else None
 
-                    if not len(rsn_entry.nexthops):
+                    if not len(rsn_entry):
                     # if the rsn entry's nexthops are  expired, remove
                         self.controller.remove_rsn(curr_hop)
                                     
@@ -1501,7 +1512,7 @@ class LiraBcHybrid(Strategy):
                 next_hop = path[hop + 1]
                 rsn_nexthop_objs = rsn_entry.get_best_k_entry(time, u, self.fan_out)
                 # if the rsn entry's nexthops are  expired, remove
-                if not len(rsn_entry.nexthops):
+                if not len(rsn_entry):
                     self.controller.remove_rsn(v)
                 for rsn_nexthop_obj in rsn_nexthop_objs:
                     rsn_hop = rsn_nexthop_obj.nexthop if rsn_nexthop_obj is not None else None
@@ -1556,7 +1567,8 @@ class LiraBcHybrid(Strategy):
                     rsn_entry = self.controller.get_rsn(prev_hop) if self.view.has_rsn_table(prev_hop) else None
                     rsn_entry = RsnEntry(self.rsn_fresh, self.rsn_timeout) if rsn_entry is None else rsn_entry
                     rsn_entry.insert_nexthop(curr_hop, curr_hop, len(path) - hop, time) 
-                    self.controller.put_rsn(prev_hop, rsn_entry)
+                    self.controller.put_rsn(prev_hop, rsn_entry,
+                                            expires=time + self.rsn_timeout)
                     # Insert content to cache
                     if self.view.has_cache(curr_hop):
                         if self.p == 1.0 or random.random() <= self.p:
@@ -1575,7 +1587,8 @@ class LiraBcHybrid(Strategy):
                     rsn_entry = self.controller.get_rsn(curr_hop) if self.view.has_rsn_table(curr_hop) else None
                     rsn_entry = RsnEntry(self.rsn_fresh, self.rsn_timeout) if rsn_entry is None else rsn_entry
                     rsn_entry.insert_nexthop(prev_hop, prev_hop, len(path) - hop, time, True)
-                    self.controller.put_rsn(curr_hop, rsn_entry)
+                    self.controller.put_rsn(curr_hop, rsn_entry,
+                                            expires=time + self.rsn_timeout)
                     # Forward the content
                     self.controller.forward_content_hop(prev_hop, curr_hop)
         self.controller.end_session()
@@ -1632,8 +1645,7 @@ class LiraDfibOph(Strategy):
     def form_key(self, content, node):
         """ form key to lookup content from RSN table
         """
-        key = repr(content) + "-" + repr(node)
-        return key
+        return self.view.rsn_key(content, node)
 
     # LIRA_DFIB_OPH
     def lookup_rsn_at_node(self, node, content=None, ignore=[], fan_out=1):
@@ -1657,44 +1669,17 @@ class LiraDfibOph(Strategy):
         if content is None:
             content = self.controller.session['content']
 
-        neighbors = self.view.get_neighbors(node)
-        neighbors = [n for n in neighbors if n not in ignore]
-        neighbors = [n for n in neighbors if n not in self.view.topology().sources()]
-        neighbors = [n for n in neighbors if n not in self.view.topology().receivers()]
+        neighbors = [n for n in self.view.router_neighbors(node) if n not in ignore]
         
         rsn_entries = []
-        for n in neighbors:
-            key = self.form_key(content, n) #repr(content) + "/" + repr(n)
-            nexthop = self.view.peek_rsn(node, key)
-            if nexthop is not None:
+        probed = self.controller.probe_rsn(node, neighbors, content)
+        for n, entry in zip(neighbors, probed):
+            if entry is not None:
+                nexthop, position, quota = entry
                 if nexthop != n:
-                    #print "Current node: " + repr(node) + " neighbor: " + repr(n) + " and nexthop: " + repr(nexthop) + " key: " + repr(key)
-                    #print "Neighbors: " + repr(neighbors)
                     raise RuntimeError('This should not happen in lookup_rsn_at_node')
-                position = self.view.get_rsn_position(node, key)
-                rsn_table = self.view.get_rsn_table(node)
-                #n_lookups = rsn_table.get_nlookups()
-                #n_success = rsn_table.get_nsuccess()
-                n_quotas = rsn_table.get_quota()
-                self.controller.get_rsn(node, key) #lookup to change the position now
-                success = 0.0
-                quota = n_quotas[position]
                 rsn_entries.append([nexthop, position, quota])
 
-                """
-                if n_lookups[position] < 3: # TODO create a parameter for a threshold
-                    dfib_size = rsn_table.get_size()
-                    success = 0.0 #(1.0 - ((1.0*position)/dfib_size))
-                    rsn_entries.append([nexthop, success, position])
-                else:
-                    success = (1.0*n_success[position])/n_lookups[position]
-                    rsn_entries.append([nexthop, success, position])
-                    if not self.first:
-                        print "Accumulated enough statistics!"
-                        self.first = True
-                    #print "Nexthop: " + repr(nexthop) + " pos: " + repr(position) + " succ: " + repr(success)
-                """
-
         # sort the entries by success rate (increasing order -- head is 0 and tail is size-1)
         rsn_entries.sort(key = lambda x : x[1])
         
@@ -2038,7 +2023,7 @@ class LiraDfib(Strategy):
                     rsn_nexthop_obj = rsn_entry.get_freshest_except_node(time, prev_hop)
                     rsn_hop = rsn_nexthop_obj.nexthop if rsn_nexthop_obj is not None else None
 
-                    if not len(rsn_entry.nexthops):
+                    if not len(rsn_entry):
                     # if the rsn entry's nexthops are  expired, remove
                         self.controller.remove_rsn(curr_hop)
                                     
@@ -2111,7 +2096,7 @@ class LiraDfib(Strategy):
                 next_hop = path[hop + 1]
                 rsn_nexthop_objs = rsn_entry.get_topk_freshest_except_node(time, u, self.fan_out)
                 # if the rsn entry's nexthops are  expired, remove
-                if not len(rsn_entry.nexthops):
+                if not len(rsn_entry):
                     self.controller.remove_rsn(v)
                 for rsn_nexthop_obj in rsn_nexthop_objs:
                     rsn_hop = rsn_nexthop_obj.nexthop if rsn_nexthop_obj is not None else None
@@ -2158,11 +2143,14 @@ class LiraDfib(Strategy):
                 rsn_entry = self.controller.get_rsn(prev_hop) if self.view.has_rsn_table(prev_hop) else None
                 rsn_entry = RsnEntry(self.rsn_fresh, self.rsn_timeout) if rsn_entry is None else rsn_entry
                 rsn_entry.insert_nexthop(curr_hop, curr_hop, len(path) - hop, time) 
-                self.controller.put_rsn(prev_hop, rsn_entry)
+                self.controller.put_rsn(prev_hop, rsn_entry,
+                                        expires=time + self.rsn_timeout)
                 # Update the rsn entry towards the direction of cache if such an entry existed (in the case of off-path hit)
                 rsn_entry = self.controller.get_rsn(curr_hop) if self.view.has_rsn_table(curr_hop) else None
                 if rsn_entry is not None and rsn_entry.get_nexthop(prev_hop) is not None:
                     rsn_entry.insert_nexthop(prev_hop, prev_hop, len(path) - hop, time)
+                    self.controller.put_rsn(curr_hop, rsn_entry,
+                                            expires=time + self.rsn_timeout)
                 # Insert content to cache
                 if self.view.has_cache(curr_hop):
                     if self.p == 1.0 or random.random() <= self.p:
@@ -2869,8 +2857,7 @@ class Tfib_sc(Strategy):
     def form_key(self, content, node):
         """ form key to lookup content from RSN table
         """
-        key = repr(content) + "-" + repr(node)
-        return key
+        return self.view.rsn_key(content, node)
     
     # T-FIB-SC
     def lookup_rsn_at_node(self, node, content=None, ignore=[], fan_out=1):
@@ -2894,42 +2881,16 @@ class Tfib_sc(Strategy):
         if content is None:
             content = self.controller.session['content']
 
-        neighbors = self.view.get_neighbors(node)
-        neighbors = [n for n in neighbors if n not in ignore]
-        neighbors = [n for n in neighbors if n not in self.view.topology().sources()]
-        neighbors = [n for n in neighbors if n not in self.view.topology().receivers()]
+        neighbors = [n for n in self.view.router_neighbors(node) if n not in ignore]
         
         rsn_entries = []
-        for n in neighbors:
-            key = self.form_key(content, n) #repr(content) + "/" + repr(n)
-            nexthop = self.view.peek_rsn(node, key)
-            if nexthop is not None:
+        probed = self.controller.probe_rsn(node, neighbors, content, rank=False)
+        for n, entry in zip(neighbors, probed):
+            if entry is not None:
+                nexthop = entry[0]
                 if nexthop != n:
-                    #print "Current node: " + repr(node) + " neighbor: " + repr(n) + " and nexthop: " + repr(nexthop) + " key: " + repr(key)
-                    #print "Neighbors: " + repr(neighbors)
                     raise RuntimeError('This should not happen in lookup_rsn_at_node')
-                #position = self.view.get_rsn_position(node, key)
-                position = 0
-                rsn_table = self.view.get_rsn_table(node)
-                #n_lookups = rsn_table.get_nlookups()
-                #n_success = rsn_table.get_nsuccess()
-                #n_quotas = rsn_table.get_quota()
-                self.controller.get_rsn(node, key) #lookup to change the position now
-                success = 0.0
-                rsn_entries.append([nexthop, position, 1])
-                """
-                if n_lookups[position] < 3: # TODO create a parameter for a threshold
-                    dfib_size = rsn_table.get_size()
-                    success = 0.0 #(1.0 - ((1.0*position)/dfib_size))
-                    rsn_entries.append([nexthop, success, position])
-                else:
-                    success = (1.0*n_success[position])/n_lookups[position]
-                    rsn_entries.append([nexthop, success, position])
-                    if not self.first:
-                        print "Accumulated enough statistics!"
-                        self.first = True
-                    #print "Nexthop: " + repr(nexthop) + " pos: " + repr(position) + " succ: " + repr(success)
-                """
+                rsn_entries.append([nexthop, 0, 1])
 
         # sort the entries by success rate (increasing order -- head is 0 tail is size-1)
         rsn_entries.sort(key = lambda x : x[1])
@@ -3210,8 +3171,7 @@ class LiraDfibSc(Strategy):
     def form_key(self, content, node):
         """ form key to lookup content from RSN table
         """
-        key = repr(content) + "-" + repr(node)
-        return key
+        return self.view.rsn_key(content, node)
 
     # LIRA_DFIB_SC
     def lookup_rsn_at_node(self, node, content=None, ignore=[], fan_out=1):
@@ -3235,42 +3195,16 @@ class LiraDfibSc(Strategy):
         if content is None:
             content = self.controller.session['content']
 
-        neighbors = self.view.get_neighbors(node)
-        neighbors = [n for n in neighbors if n not in ignore]
-        neighbors = [n for n in neighbors if n not in self.view.topology().sources()]
-        neighbors = [n for n in neighbors if n not in self.view.topology().receivers()]
+        neighbors = [n for n in self.view.router_neighbors(node) if n not in ignore]
         
         rsn_entries = []
-        for n in neighbors:
-            key = self.form_key(content, n) #repr(content) + "/" + repr(n)
-            nexthop = self.view.peek_rsn(node, key)
-            if nexthop is not None:
+        probed = self.controller.probe_rsn(node, neighbors, content, rank=False)
+        for n, entry in zip(neighbors, probed):
+            if entry is not None:
+                nexthop = entry[0]
                 if nexthop != n:
-                    #print "Current node: " + repr(node) + " neighbor: " + repr(n) + " and nexthop: " + repr(nexthop) + " key: " + repr(key)
-                    #print "Neighbors: " + repr(neighbors)
                     raise RuntimeError('This should not happen in lookup_rsn_at_node')
-                #position = self.view.get_rsn_position(node, key)
-                position = 0
-                rsn_table = self.view.get_rsn_table(node)
-                #n_lookups = rsn_table.get_nlookups()
-                #n_success = rsn_table.get_nsuccess()
-                #n_quotas = rsn_table.get_quota()
-                self.controller.get_rsn(node, key) #lookup to change the position now
-                success = 0.0
-                rsn_entries.append([nexthop, position, 1])
-                """
-                if n_lookups[position] < 3: # TODO create a parameter for a threshold
-                    dfib_size = rsn_table.get_size()
-                    success = 0.0 #(1.0 - ((1.0*position)/dfib_size))
-                    rsn_entries.append([nexthop, success, position])
-                else:
-                    success = (1.0*n_success[position])/n_lookups[position]
-                    rsn_entries.append([nexthop, success, position])
-                    if not self.first:
-                        print "Accumulated enough statistics!"
-                        self.first = True
-                    #print "Nexthop: " + repr(nexthop) + " pos: " + repr(position) + " succ: " + repr(success)
-                """
+                rsn_entries.append([nexthop, 0, 1])
 
         # sort the entries by success rate (increasing order -- head is 0 tail is size-1)
         rsn_entries.sort(key = lambda x : x[1])
@@ -3556,8 +3490,7 @@ class Tfib_dc(Strategy):
     def form_key(self, content, node):
         """ form key to lookup content from RSN table
         """
-        key = repr(content) + "-" + repr(node)
-        return key
+        return self.view.rsn_key(content, node)
     
     # T-FIB-DC
     def lookup_rsn_at_node(self, node, content=None, ignore=[], fan_out=1):
@@ -3581,31 +3514,17 @@ class Tfib_dc(Strategy):
         if content is None:
             content = self.controller.session['content']
 
-        neighbors = self.view.get_neighbors(node)
-        neighbors = [n for n in neighbors if n not in ignore]
-        neighbors = [n for n in neighbors if n not in self.view.topology().sources()]
-        neighbors = [n for n in neighbors if n not in self.view.topology().receivers()]
+        neighbors = [n for n in self.view.router_neighbors(node) if n not in ignore]
         
         rsn_entries = []
-        for n in neighbors:
-            key = self.form_key(content, n) #repr(content) + "/" + repr(n)
-            nexthop = self.view.peek_rsn(node, key)
-            if nexthop is not None:
+        probed = self.controller.probe_rsn(node, neighbors, content)
+        for n, entry in zip(neighbors, probed):
+            if entry is not None:
+                nexthop, position, quota = entry
                 if nexthop != n:
-                    #print "Current node: " + repr(node) + " neighbor: " + repr(n) + " and nexthop: " + repr(nexthop) + " key: " + repr(key)
-                    #print "Neighbors: " + repr(neighbors)
                     raise RuntimeError('This should not happen in lookup_rsn_at_node')
-                position = self.view.get_rsn_position(node, key)
-                rsn_table = self.view.get_rsn_table(node)
-                #n_lookups = rsn_table.get_nlookups()
-                #n_success = rsn_table.get_nsuccess()
-                n_quotas = rsn_table.get_quota()
-                self.controller.get_rsn(node, key) #lookup to change the position now
-                success = 0.0
-                quota = n_quotas[position]
                 rsn_entries.append([nexthop, position, quota])
 
-
         # sort the entries by rank (increasing order -- head is 0 and tail is size-1)
         rsn_entries.sort(key = lambda x : x[1])
         
@@ -9,6 +9,7 @@ else:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
 import collections
+import random
 
 import numpy as np
 
@@ -219,6 +220,147 @@ class TestLinkedSet(unittest.TestCase):
         self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, 1, 2])
         self.assertRaises(ValueError, cache.LinkedSet, iterable=[1, None, None])
         self.assertIsNotNone(cache.LinkedSet(iterable=[1, 0, None]))
+
+    def test_node_reuse(self):
+        c = cache.LinkedSet([1, 2, 3])
+        node = c._map[3]
+        self.assertEqual(c.pop_bottom(), 3)
+        c.append_top(4)
+        self.assertIs(node, c._map[4])
+        c.remove(2)
+        c.insert_below(4, 5)
+        self.assertEqual(list(c), [4, 5, 1])
+        self.assertTrue(self.link_consistency(c))
+        for i in range(100):
+            c.append_bottom(10 + i)
+        for i in range(100):
+            c.pop_top()
+        self.assertLessEqual(len(c._free), c._MAX_FREE_NODES)
+        self.assertEqual(list(c), range(107, 110))
+        self.assertTrue(self.link_consistency(c))
+
+    def test_random_operations(self):
+        c = cache.LinkedSet()
+        expected = []
+        rnd = random.Random(0)
+        for _ in range(2000):
+            k = rnd.randint(0, 20)
+            if k in expected:
+                op = rnd.choice(('remove', 'move_to_top', 'move_to_bottom'))
+                getattr(c, op)(k)
+                expected.remove(k)
+                if op == 'move_to_top':
+                    expected.insert(0, k)
+                elif op == 'move_to_bottom':
+                    expected.append(k)
+            elif rnd.random() < 0.5:
+                c.append_top(k)
+                expected.insert(0, k)
+            else:
+                c.append_bottom(k)
+                expected.append(k)
+            if expected and rnd.random() < 0.1:
+                self.assertEqual(expected.pop(), c.pop_bottom())
+            self.assertEqual(expected, list(c))
+        self.assertTrue(self.link_consistency(c))
+
+
+class TestRankIndex(unittest.TestCase):
+
+    def test_rank(self):
+        r = cache.RankIndex()
+        r.push_top(1)
+        r.push_top(2)
+        r.push_top(3)
+        self.assertEqual(len(r), 3)
+        self.assertEqual([r.rank(k) for k in (3, 2, 1)], [0, 1, 2])
+        r.push_top(1)
+        self.assertEqual([r.rank(k) for k in (1, 3, 2)], [0, 1, 2])
+        r.remove(3)
+        self.assertNotIn(3, r)
+        self.assertEqual([r.rank(k) for k in (1, 2)], [0, 1])
+        self.assertRaises(KeyError, r.rank, 3)
+        self.assertRaises(KeyError, r.remove, 3)
+        r.clear()
+        self.assertEqual(len(r), 0)
+
+    def test_compaction(self):
+        r = cache.RankIndex(capacity=4)
+        ls = cache.LinkedSet()
+        rand = random.Random(0)
+        for _ in range(1000):
+            k = rand.randint(0, 20)
+            if k in ls and rand.random() < 0.3:
+                ls.remove(k)
+                r.remove(k)
+            else:
+                if k in ls:
+                    ls.move_to_top(k)
+                else:
+                    ls.append_top(k)
+                r.push_top(k)
+            self.assertEqual([r.rank(k) for k in ls], list(range(len(ls))))
+
+
+class CountingRandom(random.Random):
+    """Random number generator counting the integers it draws"""
+
+    def __init__(self, seed=None):
+        random.Random.__init__(self, seed)
+        self.n_draws = 0
+
+    def randint(self, a, b):
+        self.n_draws += 1
+        return random.Random.randint(self, a, b)
+
+
+class TestSlotIndex(unittest.TestCase):
+
+    def test_add_remove(self):
+        s = cache.SlotIndex()
+        items = set()
+        rand = random.Random(0)
+        for _ in range(1000):
+            k = rand.randint(0, 20)
+            if k in items and rand.random() < 0.5:
+                items.remove(k)
+                s.remove(k)
+            else:
+                items.add(k)
+                s.add(k)
+            self.assertEqual(len(items), len(s))
+            self.assertEqual(items, set(s.sample(len(items) + 1)))
+        self.assertRaises(KeyError, s.remove, 21)
+        s.clear()
+        self.assertEqual(0, len(s))
+        self.assertEqual([], s.sample(4))
+
+    def test_sample_uniform(self):
+        s = cache.SlotIndex()
+        for k in range(10):
+            s.add(k)
+        rand = random.Random(0)
+        counts = collections.Counter()
+        for _ in range(10000):
+            sample = s.sample(3, rand)
+            self.assertEqual(3, len(set(sample)))
+            counts.update(sample)
+        for k in range(10):
+            self.assertAlmostEqual(0.3, counts[k]/10000, delta=0.02)
+        # Sampling does not move items
+        self.assertEqual(list(range(10)), s.sample(10))
+
+    def test_sample_draws(self):
+        # Drawing a sample does not depend on the number of items
+        for n_items in (10, 100000):
+            s = cache.SlotIndex()
+            for k in range(n_items):
+                s.add(k)
+            rand = CountingRandom(0)
+            self.assertEqual(5, len(set(s.sample(5, rand))))
+            self.assertEqual(5, rand.n_draws)
+
+
 class TestLruCache(unittest.TestCase):
 
     def test_lru(self):
@@ -273,6 +415,24 @@ class TestLruCache(unittest.TestCase):
         self.assertEqual(c.position(2), 1)
         self.assertEqual(c.position(3), 2)
         self.assertEqual(c.position(4), 3)
+        c.get(3)
+        self.assertEqual(c.dump(), [3, 1, 2, 4])
+        self.assertEqual([c.position(k) for k in c.dump()], [0, 1, 2, 3])
+        self.assertRaises(ValueError, c.position, 5)
+
+    def test_position_random(self):
+        c = cache.LruCache(10)
+        rand = random.Random(0)
+        for _ in range(1000):
+            k = rand.randint(0, 30)
+            if rand.random() < 0.5:
+                c.put(k)
+            elif rand.random() < 0.8:
+                c.get(k)
+            else:
+                c.remove(k)
+            self.assertEqual([c.position(k) for k in c.dump()],
+                             list(range(len(c))))
 
 class TestSlruCache(unittest.TestCase):
 
@@ -368,6 +528,20 @@ class TestSlruCache(unittest.TestCase):
         self.assertEqual(c.position(2), 1)
         self.assertEqual(c.position(3), 2)
         self.assertEqual(c.position(4), 3)
+
+    def test_position_random(self):
+        c = cache.SegmentedLruCache(10, 3)
+        rand = random.Random(0)
+        for _ in range(1000):
+            k = rand.randint(0, 30)
+            if rand.random() < 0.5:
+                c.put(k)
+            elif rand.random() < 0.8:
+                c.get(k)
+            else:
+                c.remove(k)
+            self.assertEqual([c.position(k) for k in c.dump()],
+                             list(range(len(c))))
         
     def test_has(self):
         c = cache.SegmentedLruCache(4, 2)
@@ -437,6 +611,21 @@ class TestFifoCache(unittest.TestCase):
         c.remove(5)
         self.assertEqual(len(c), 3)
         self.assertEqual(c.dump(), [4, 3, 1])
+
+    def test_position(self):
+        c = cache.FifoCache(4)
+        c.put(1)
+        c.put(2)
+        c.put(3)
+        c.get(1)
+        self.assertEqual(c.dump(), [3, 2, 1])
+        self.assertEqual([c.position(k) for k in (3, 2, 1)], [0, 1, 2])
+        c.put(4)
+        c.put(5)
+        c.remove(3)
+        self.assertEqual(c.dump(), [5, 4, 2])
+        self.assertEqual([c.position(k) for k in (5, 4, 2)], [0, 1, 2])
+        self.assertRaises(ValueError, c.position, 1)
         
 
 class TestRandCache(unittest.TestCase):
@@ -528,6 +717,72 @@ class TestLfuCache(unittest.TestCase):
         c.remove(5)
         self.assertEqual(len(c), 3)
         self.assertEqual(c.dump(), [4, 3, 1])
+
+    def test_eviction_order(self):
+        c = cache.LfuCache(5)
+        counters = {}
+        t = 0
+        rand = random.Random(0)
+        for _ in range(2000):
+            k = rand.randint(0, 15)
+            op = rand.random()
+            if op < 0.4:
+                hit = c.get(k)
+                self.assertEqual(hit, k in counters)
+                if hit:
+                    freq, ts = counters[k]
+                    counters[k] = freq + 1, ts
+            elif op < 0.9:
+                expected = None
+                if k not in counters:
+                    t += 1
+                    counters[k] = (1, t)
+                    if len(counters) > 5:
+                        expected = min(counters, key=lambda x: counters[x])
+                        del counters[expected]
+                self.assertEqual(c.put(k), expected)
+            else:
+                self.assertEqual(c.remove(k), counters.pop(k, None) is not None)
+            self.assertEqual(set(c.dump()), set(counters))
+
+
+class TestPerfectLfuCache(unittest.TestCase):
+
+    def test_perfect_lfu(self):
+        c = cache.PerfectLfuCache(2)
+        for _ in range(3):
+            c.get(1)
+        c.put(1)
+        c.get(2)
+        c.get(2)
+        c.put(2)
+        self.assertEqual(c.dump(), [1, 2])
+        # Item 3 has been requested fewer times than any item in cache
+        self.assertEqual(c.put(3), 3)
+        self.assertEqual(c.dump(), [1, 2])
+        for _ in range(3):
+            c.get(3)
+        self.assertEqual(c.put(3), 2)
+        self.assertEqual(c.dump(), [3, 1])
+        # Counters of evicted items are retained
+        for _ in range(3):
+            c.get(2)
+        self.assertEqual(c.put(2), 1)
+        self.assertEqual(c.dump(), [2, 3])
+
+    def test_remove(self):
+        c = cache.PerfectLfuCache(2)
+        c.put(1)
+        c.get(1)
+        c.put(2)
+        self.assertTrue(c.remove(1))
+        self.assertFalse(c.remove(1))
+        self.assertEqual(c.dump(), [2])
+        c.put(3)
+        self.assertEqual(c.put(1), 2)
+        self.assertEqual(c.dump(), [1, 3])
+        c.clear()
+        self.assertEqual(len(c), 0)
         
         
 class TestRandInsert(unittest.TestCase):
@@ -638,6 +893,114 @@ class TestKeyValCache(unittest.TestCase):
         for k, v in reqs:
             c.put(k, v)
 
+    def test_probe(self):
+        c = cache.keyval_cache(cache.LruCache(4), 4)
+        c.get_quota()[1] = 2.0
+        for k in (1, 2, 3, 4):
+            c.put(k, 10*k)
+        self.assertEqual(c.dump(), [(4, 40), (3, 30), (2, 20), (1, 10)])
+        entries = c.probe([5, 3, 1])
+        self.assertEqual(entries, [None, (30, 1, 2.0), (10, 3, 1.0)])
+        self.assertEqual(c.dump(), [(1, 10), (3, 30), (4, 40), (2, 20)])
+        entries = c.probe([2, 6], rank=False)
+        self.assertEqual(entries, [(20, None, None), None])
+        self.assertEqual(c.dump(), [(2, 20), (1, 10), (3, 30), (4, 40)])
+
+
+class TestKeyValCacheClass(unittest.TestCase):
+
+    def test_put_get_remove(self):
+        c = cache.KeyValCache(3)
+        self.assertIsNone(c.put(1, 11))
+        self.assertEqual(c.get(1), 11)
+        c.put(1, 12)
+        self.assertEqual(c.get(1), 12)
+        self.assertEqual(c.dump(), [(1, 12)])
+        c.put(2, 21)
+        c.put(3, 31)
+        self.assertEqual(c.has(2), 21)
+        self.assertEqual(c.put(4, 41), (1, 12))
+        self.assertIsNone(c.get(1))
+        self.assertEqual(c.dump(), [(4, 41), (3, 31), (2, 21)])
+        self.assertEqual(c.position(2), 2)
+        self.assertEqual(c.remove(3), 31)
+        self.assertIsNone(c.remove(3))
+        self.assertEqual(c.value(2), 21)
+        self.assertEqual(c.dump(), [(4, 41), (2, 21)])
+        self.assertRaises(ValueError, c.position, 3)
+        c.clear()
+        self.assertEqual(len(c), 0)
+        self.assertEqual(c.dump(), [])
+
+    def test_stats(self):
+        c = cache.KeyValCache(4)
+        self.assertEqual(c.get_size(), 4)
+        c.get_quota()[1] += 2
+        c.get_nlookups()[3] += 1
+        quota, nlookups, nsuccess = c.stats()
+        self.assertEqual(list(quota), [1.0, 3.0, 1.0, 1.0])
+        self.assertEqual(list(nlookups), [0, 0, 0, 1])
+        self.assertEqual(list(nsuccess), [0, 0, 0, 0])
+        nsuccess[2] = 5
+        self.assertEqual(c.get_nsuccess()[2], 5)
+
+    def test_probe(self):
+        c = cache.KeyValCache(4)
+        c.get_quota()[1] = 2.0
+        for k in (1, 2, 3, 4):
+            c.put(k, 10*k)
+        entries = c.probe([5, 3, 1])
+        self.assertEqual(entries, [None, (30, 1, 2.0), (10, 3, 1.0)])
+        self.assertEqual(c.dump(), [(1, 10), (3, 30), (4, 40), (2, 20)])
+        entries = c.probe([2, 6], rank=False)
+        self.assertEqual(entries, [(20, None, None), None])
+        self.assertEqual(c.dump(), [(2, 20), (1, 10), (3, 30), (4, 40)])
+
+    def test_sample(self):
+        for c in (cache.KeyValCache(8),
+                  cache.keyval_cache(cache.LruCache(8), 8)):
+            for k in range(6):
+                c.put(k, 10*k)
+            dump = c.dump()
+            sample = c.sample(4, random.Random(0))
+            self.assertEqual(4, len(sample))
+            self.assertEqual(4, len(set(sample)))
+            self.assertTrue(set(sample) <= set(dump))
+            self.assertEqual(sample, c.sample(4, random.Random(0)))
+            self.assertEqual(sorted(dump), sorted(c.sample(10)))
+            self.assertEqual(dump, c.dump())
+
+    def test_sample_large(self):
+        for c in (cache.KeyValCache(100000, 8),
+                  cache.keyval_cache(cache.LruCache(100000), 8)):
+            for k in range(100000):
+                c.put(k, 10*k)
+            for k in range(0, 100000, 2):
+                c.remove(k)
+            rand = CountingRandom(0)
+            sample = c.sample(8, rand)
+            self.assertEqual(8, rand.n_draws)
+            self.assertEqual(8, len(set(sample)))
+            for k, v in sample:
+                self.assertEqual(1, k % 2)
+                self.assertEqual(10*k, v)
+
+    def test_keyval_lru_equivalence(self):
+        c = cache.KeyValCache(5)
+        kvc = cache.keyval_cache(cache.LruCache(5), 5)
+        rnd = random.Random(0)
+        for _ in range(2000):
+            k = rnd.randint(0, 10)
+            op = rnd.choice(('put', 'get', 'remove', 'probe'))
+            if op == 'put':
+                self.assertEqual(kvc.put(k, -k), c.put(k, -k))
+            elif op == 'probe':
+                keys = [k, rnd.randint(0, 10)]
+                self.assertEqual(kvc.probe(keys), c.probe(keys))
+            else:
+                self.assertEqual(getattr(kvc, op)(k), getattr(c, op)(k))
+            self.assertEqual(kvc.dump(), c.dump())
+
 
 class TestTtlCache(unittest.TestCase):
     
@@ -765,3 +1128,132 @@ class TestTtlCache(unittest.TestCase):
         self.assertFalse(c.has(1))
         c.put(3)
         self.assertFalse(ttl_c.has(3))
+
+    def test_default_ttl(self):
+        curr_time = 1
+        f_time = lambda: curr_time
+        c = cache.ttl_cache(cache.FifoCache(4), f_time, ttl=5)
+        c.put(1)
+        c.put(2, ttl=10)
+        c.put(3, expires=4)
+        self.assertEqual(c.dump(), [(3, 4), (2, 11), (1, 6)])
+        curr_time = 7
+        self.assertEqual(c.dump(), [(2, 11)])
+
+    def test_purge_order(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_cache(cache.LruCache(100), f_time)
+        expiry = {k: (k * 37) % 101 + 1 for k in range(100)}
+        for k in range(100):
+            c.put(k, expires=expiry[k])
+        for k in range(0, 100, 3):
+            c.remove(k)
+        for k in range(1, 100, 3):
+            c.put(k, expires=expiry[k] + 50)
+            expiry[k] += 50
+        for curr_time in range(0, 160, 5):
+            c.purge()
+            self.assertEqual(sorted(k for k in expiry if k % 3 != 0 and
+                                    expiry[k] >= curr_time),
+                             sorted(k for k, _ in c.dump()))
+
+    def test_heap_compaction(self):
+        c = cache.ttl_cache(cache.LruCache(2), lambda: 0)
+        for i in range(1000):
+            c.put(i % 3, ttl=i + 1)
+        self.assertEqual(2, len(c.dump()))
+        self.assertLessEqual(len(c._exp_heap), 2 * 2 + 64 + 1)
+
+    def test_policies(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_lru_cache(2, f_time=f_time, ttl=10)
+        c.put(1)
+        c.put(2)
+        c.get(1)
+        self.assertEqual(2, c.put(3))
+        c = cache.ttl_fifo_cache(2, f_time=f_time, ttl=10)
+        c.put(1)
+        c.put(2)
+        c.get(1)
+        self.assertEqual(1, c.put(3))
+        curr_time = 11
+        self.assertFalse(c.has(2))
+        self.assertFalse(c.has(3))
+
+
+class TestTtlKeyValCache(unittest.TestCase):
+
+    def test_put_get_expire(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_keyval_cache(cache.LruCache(3), f_time)
+        c.put(1, 11, ttl=5)
+        c.put(2, 22, expires=3)
+        c.put(3, 33)
+        self.assertEqual(11, c.get(1))
+        self.assertEqual([(1, 11, 5), (3, 33, np.infty), (2, 22, 3)],
+                         c.dump())
+        curr_time = 4
+        self.assertFalse(c.has(2))
+        self.assertIsNone(c.value(2))
+        self.assertEqual(1, c.position(3))
+        self.assertEqual(2, len(c))
+        curr_time = 6
+        self.assertIsNone(c.get(1))
+        self.assertEqual([(3, 33, np.infty)], c.dump())
+
+    def test_replace_expiry(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_keyval_cache(cache.LruCache(3), f_time, ttl=2)
+        c.put(1, 11)
+        c.put(1, 12, ttl=10)
+        curr_time = 5
+        self.assertEqual(12, c.value(1))
+        c.put(1, 13, ttl=1)
+        curr_time = 7
+        self.assertIsNone(c.value(1))
+        self.assertLessEqual(len(c._exp_heap), 1)
+
+    def test_eviction(self):
+        c = cache.ttl_keyval_cache(cache.LruCache(2), lambda: 0)
+        c.put(1, 11, ttl=5)
+        c.put(2, 22, ttl=5)
+        self.assertEqual((1, 11), c.put(3, 33, ttl=5))
+        self.assertNotIn(1, c.expiry)
+        self.assertIsNone(c.put(4, 44, ttl=-1))
+        self.assertIsNone(c.remove(1))
+        self.assertEqual(22, c.remove(2))
+        self.assertEqual([(3, 33, 5)], c.dump())
+        c.clear()
+        self.assertEqual([], c.dump())
+        self.assertEqual([], c._exp_heap)
+
+    def test_probe_stats(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_keyval_cache(cache.LruCache(4), f_time, size=4)
+        c.put(1, 11, ttl=2)
+        c.put(2, 22, ttl=8)
+        self.assertEqual(4, c.get_size())
+        self.assertEqual([(11, 1, 1.0), (22, 1, 1.0)], c.probe([1, 2]))
+        curr_time = 3
+        self.assertEqual([None, (22, 0, 1.0)], c.probe([1, 2]))
+
+    def test_sample(self):
+        curr_time = 0
+        f_time = lambda: curr_time
+        c = cache.ttl_keyval_cache(cache.LruCache(4), f_time)
+        c.put(1, 11, ttl=2)
+        c.put(2, 22, ttl=8)
+        self.assertEqual([(1, 11), (2, 22)], sorted(c.sample(4)))
+        curr_time = 3
+        self.assertEqual([(2, 22)], c.sample(1))
+
+    def test_incorrect_params(self):
+        self.assertRaises(TypeError, cache.ttl_keyval_cache,
+                          cache.LruCache(4), 'function')
+        c = cache.ttl_keyval_cache(cache.LruCache(4), lambda: 0)
+        self.assertRaises(ValueError, c.put, 1, 2, ttl=2, expires=8)
@@ -10,6 +10,8 @@ del sys
 import fnss
 
 import icarus.models as strategy
+from icarus.models.strategy import RsnEntry
+from icarus.scenarios import IcnTopology
 from icarus.execution import NetworkModel, NetworkView, NetworkController, TestCollector
 
 
@@ -104,6 +106,33 @@ def rsn_topology():
         fnss.add_stack(topology, v, 'router', {})
     return topology
 
+def tfib_topology():
+    """Return topology for testing T-FIB-based strategies
+    """
+    # Topology sketch
+    #
+    # 6 (RECV) -- 0 ---- 1 ---- 8 (SRC)
+    #            /        \
+    #           5          2
+    #            \        /
+    #             4 ---- 3 -- 7 (RECV)
+    #
+    # All routers (0-5) have both a cache and a T-FIB
+    topology = fnss.ring_topology(6)
+    topology.add_edge(0, 6)
+    topology.add_edge(3, 7)
+    topology.add_edge(1, 8)
+    source = 8
+    receivers = (6, 7)
+    routers = range(6)
+    contents = range(10)
+    fnss.add_stack(topology, source, 'source', {'contents': contents})
+    for v in receivers:
+        fnss.add_stack(topology, v, 'receiver', {})
+    for v in routers:
+        fnss.add_stack(topology, v, 'router', {'cache_size': 1, 'rsn_size': 4})
+    return IcnTopology(topology)
+
 def nrr_topology():
     """Return topology for testing NRR caching strategies
     """
@@ -729,4 +758,160 @@ class TestLira(unittest.TestCase):
         cont_hops = summary['content_hops']
         self.assertListEqual(exp_req_hops, req_hops)
         self.assertListEqual(exp_cont_hops, cont_hops)
-        self.assertEqual(10, summary['serving_node'])
\ No newline at end of file
+        self.assertEqual(10, summary['serving_node'])
+
+    def test_lira_dfib_ttl(self):
+        model = NetworkModel(rsn_topology(), cache_policy={'name': 'TTL_LRU'})
+        view = NetworkView(model)
+        controller = NetworkController(model)
+        collector = TestCollector(view)
+        controller.attach_collector(collector)
+        s = strategy.LiraDfib(view, controller, rsn_timeout=10)
+        # receiver 6 requests 2, expect miss but leave content in 5 and
+        # trails expiring at 11 in 2, 3, 4, 7, 8, 9
+        s.process_event(1, 6, 2, True)
+        for v in (2, 3, 4, 7, 8, 9):
+            self.assertEqual([11], [e for _, _, e in view.rsn_dump(v)])
+        # receiver 0 requests 2, expect hit at 5 after following the trail
+        # from 2 and trails refreshed at time 5 to expire at 15
+        s.process_event(5, 0, 2, True)
+        summary = collector.session_summary()
+        self.assertListEqual([(0, 1), (1, 2), (2, 3), (3, 4), (4, 5)],
+                             summary['request_hops'])
+        for v in (2, 3, 4, 7, 8, 9):
+            self.assertEqual([15], [e for _, _, e in view.rsn_dump(v)])
+        model.time = 16
+        for v in (2, 3, 4, 7, 8, 9):
+            self.assertEqual([], view.rsn_dump(v))
+
+
+class TestTfib(unittest.TestCase):
+
+    def setUp(self):
+        topology = tfib_topology()
+        model = NetworkModel(topology, cache_policy={'name': 'LRU'})
+        self.model = model
+        self.view = NetworkView(model)
+        self.controller = NetworkController(model)
+        self.collector = TestCollector(self.view)
+        self.controller.attach_collector(self.collector)
+
+    def test_rsn_key(self):
+        keys = set(self.view.rsn_key(c, v) for c in range(10) for v in range(9))
+        self.assertEqual(len(keys), 90)
+        for c in (0, 3, 9):
+            for v in (0, 4, 8):
+                key = self.view.rsn_key(c, v)
+                self.assertIsInstance(key, int)
+                self.assertEqual((c, v), self.model.split_rsn_key(key))
+        key = self.view.rsn_key('a', 2)
+        self.assertEqual(('a', 2), self.model.split_rsn_key(key))
+
+    def test_router_neighbors(self):
+        self.assertIsInstance(self.view.router_neighbors(0), tuple)
+        self.assertSetEqual(set([1, 5]), set(self.view.router_neighbors(0)))
+        self.assertSetEqual(set([0, 2]), set(self.view.router_neighbors(1)))
+        self.assertSetEqual(set([0]), set(self.view.router_neighbors(6)))
+        self.assertEqual((1,), self.view.router_neighbors(8))
+
+    def test_probe_rsn(self):
+        self.controller.start_session(1, 6, 3, True)
+        self.controller.put_rsn(0, 1, self.view.rsn_key(3, 1))
+        self.controller.put_rsn(0, 5, self.view.rsn_key(3, 5))
+        self.assertEqual([(1, 1, 1.0), None, (5, 1, 1.0)],
+                         self.controller.probe_rsn(0, [1, 2, 5]))
+        self.assertEqual([None, None], self.controller.probe_rsn(6, [0, 1]))
+        self.controller.end_session()
+
+    def test_lira_dfib_oph(self):
+        s = strategy.LiraDfibOph(self.view, self.controller)
+        # receiver 6 requests 2, expect miss and trail towards 0 at node 1
+        s.process_event(1, 6, 2, True)
+        summary = self.collector.session_summary()
+        self.assertEqual(8, summary['serving_node'])
+        self.assertEqual([(self.view.rsn_key(2, 0), 0)], self.view.rsn_dump(1))
+        # receiver 7 requests 2, expect hit at node 1 and trails towards it
+        s.process_event(2, 7, 2, True)
+        summary = self.collector.session_summary()
+        self.assertEqual(1, summary['serving_node'])
+        self.assertListEqual([(7, 3), (3, 2), (2, 1)], summary['request_hops'])
+        self.assertEqual([(self.view.rsn_key(2, 1), 1)], self.view.rsn_dump(2))
+        self.assertEqual([(self.view.rsn_key(2, 2), 2)], self.view.rsn_dump(3))
+
+
+class TestRsnEntry(unittest.TestCase):
+
+    def test_purge(self):
+        entry = RsnEntry(expiration_interval=10)
+        entry.insert_nexthop(1, 1, 2, 0)
+        entry.insert_nexthop(2, 2, 2, 5)
+        entry.insert_nexthop(3, 3, 2, 8)
+        entry.insert_nexthop(1, 1, 2, 9)
+        self.assertEqual(1, entry.get_freshest_entry(12).nexthop)
+        self.assertEqual(3, len(entry.nexthops))
+        self.assertEqual(1, entry.get_freshest_entry(16).nexthop)
+        self.assertEqual([1, 3], sorted(nh.nexthop for nh in entry.nexthops))
+        self.assertIsNone(entry.get_freshest_entry(20))
+        self.assertEqual([], entry.nexthops)
+
+    def test_no_expiration(self):
+        entry = RsnEntry()
+        entry.insert_nexthop(1, 1, 2, 0)
+        entry.insert_nexthop(2, 2, 2, 1)
+        self.assertEqual(2, entry.get_freshest_entry(1e9).nexthop)
+        self.assertEqual(2, len(entry.nexthops))
+
+    def test_freshest_order(self):
+        entry = RsnEntry(fresh_interval=3)
+        for nh, time in ((1, 0), (2, 1), (3, 2), (4, 3), (2, 4)):
+            entry.insert_nexthop(nh, nh, 1, time)
+        self.assertEqual([2, 4, 3, 1], [nh.nexthop for nh in entry.nexthops])
+        self.assertEqual(2, entry.get_freshest_entry(5).nexthop)
+        self.assertEqual(4, entry.get_freshest_except_node(5, 2).nexthop)
+        self.assertEqual(3, entry.get_freshest_except_nodes(5, [2, 4]).nexthop)
+        self.assertIsNone(entry.get_freshest_except_nodes(5, [1, 2, 3, 4]))
+        self.assertEqual([4, 3], [nh.nexthop for nh in
+                                  entry.get_topk_freshest_except_node(5, 2, 2)])
+        entry.delete_nexthop(4)
+        entry.delete_nexthop(5)
+        self.assertEqual(3, len(entry))
+        self.assertIsNone(entry.get_nexthop(4))
+        self.assertEqual(2, entry.get_nexthop(3).time_stamp)
+
+    def test_freshest_except_first(self):
+        entry = RsnEntry()
+        entry.insert_nexthop(1, 1, 1, 0)
+        entry.insert_nexthop(2, 2, 1, 1)
+        entry.insert_nexthop(1, 1, 1, 2)
+        # Excluding the first nexthop inserted does not hide the others
+        self.assertEqual(2, entry.get_freshest_except_node(2, 1).nexthop)
+        self.assertEqual(2, entry.get_freshest_except_nodes(2, [1, 3]).nexthop)
+        self.assertIsNone(entry.get_freshest_except_nodes(2, [1, 2]))
+
+    def test_used_flag(self):
+        entry = RsnEntry(fresh_interval=3)
+        entry.insert_nexthop(1, 1, 1, 0, True)
+        entry.insert_nexthop(2, 2, 1, 0)
+        # Refreshing a used trail without using it keeps it used
+        entry.insert_nexthop(1, 1, 1, 2)
+        entry.insert_nexthop(2, 2, 1, 3)
+        self.assertTrue(entry.get_nexthop(1).used_before)
+        self.assertFalse(entry.get_nexthop(2).used_before)
+        self.assertEqual([1], [nh.nexthop for nh in
+                               entry.get_best_k_entry(3, 3, 1)])
+        entry.insert_nexthop(2, 2, 1, 4, True)
+        self.assertTrue(entry.get_nexthop(2).used_before)
+
+    def test_best_k_entry(self):
+        entry = RsnEntry(fresh_interval=3)
+        entry.insert_nexthop(1, 1, 1, 0, True)
+        entry.insert_nexthop(2, 2, 1, 4)
+        entry.insert_nexthop(3, 3, 1, 5, True)
+        entry.insert_nexthop(4, 4, 1, 6)
+        entry.insert_nexthop(5, 5, 1, 7, True)
+        self.assertEqual([5, 3, 4], [nh.nexthop for nh in
+                                     entry.get_best_k_entry(7, 2, 3)])
+        self.assertEqual([5, 4, 2], [nh.nexthop for nh in
+                                     entry.get_best_k_entry(7, 3, 3)])
+        self.assertEqual([5], [nh.nexthop for nh in
+                               entry.get_best_k_entry(7, 3, 1)])
@@ -5,6 +5,7 @@ of parameters specified in the user-provided settings, schedule experiment
 execution on various
 """
 from __future__ import division
+import os
 import time
 import collections
 import multiprocessing as mp
@@ -13,20 +14,29 @@ import copy
 import sys
 import signal
 import traceback
+import hashlib
 
-from icarus.execution import exec_experiment
+from icarus.execution import exec_experiment, fork_experiments, ShortestPaths
 from icarus.registry import TOPOLOGY_FACTORY, CACHE_PLACEMENT, CONTENT_PLACEMENT, \
                             JOINT_CACHE_RSN_PLACEMENT, RSN_PLACEMENT, CACHE_POLICY, \
                             WORKLOAD, DATA_COLLECTOR, STRATEGY
 from icarus.results import ResultSet
-from icarus.util import SequenceNumber, timestr
+from icarus.scenarios import TopologyCache, shortest_path_predecessors
+from icarus.util import SequenceNumber, Tree, timestr, all_pairs_order
 
 
-__all__ = ['Orchestrator', 'run_scenario']
+__all__ = ['Orchestrator', 'prepare_topologies', 'run_scenario',
+           'run_scenario_group']
 
 
 logger = logging.getLogger('orchestration')
 
+# Shortest path predecessors computed by prepare_topologies and the order of
+# nodes indexing them, keyed by topology specification. Since they are
+# computed before worker processes are forked, workers inherit them and share
+# their memory pages with the parent process as long as they are not modified.
+_PREPARED_TOPOLOGIES = {}
+
 
 class Orchestrator(object):
     """Orchestrator.
@@ -35,7 +45,8 @@ class Orchestrator(object):
     aggregate results.
     """
 
-    def __init__(self, settings, summary_freq=4):
+    def __init__(self, settings, summary_freq=4, results=None,
+                 results_log=None):
         """Constructor
         
         Parameters
@@ -45,15 +56,26 @@ class Orchestrator(object):
         summary_freq : int
             Frequency (in number of experiment) at which summary messages
             are displayed
+        results : ResultSet, optional
+            Results of experiments already completed, e.g. by an interrupted
+            run being resumed. These experiments are not executed again
+        results_log : ResultsLog, optional
+            Log to which the results of each experiment are appended as soon
+            as it completes
         """
         self.settings = settings
-        self.results = ResultSet()
+        self.results = results if results is not None else ResultSet()
+        self.results_log = results_log
         self.seq = SequenceNumber()
         self.exp_durations = collections.deque(maxlen=30)
         self.n_success = 0
         self.n_fail = 0
         self.summary_freq = summary_freq
         self._stop = False
+        # Topologies must be prepared before forking worker processes
+        if 'PREPARE_TOPOLOGIES' in settings and settings.PREPARE_TOPOLOGIES \
+                and 'EXPERIMENT_QUEUE' in settings:
+            prepare_topologies(settings, settings.EXPERIMENT_QUEUE)
         if settings.PARALLEL_EXECUTION:
             self.pool = mp.Pool(settings.N_PROCESSES)
     
@@ -76,27 +98,32 @@ class Orchestrator(object):
         if 'EXPERIMENT_QUEUE' not in self.settings:
             logger.error('No EXPERIMENT_QUEUE setting found. Exiting')
             sys.exit(-1)
-        queue = collections.deque(self.settings.EXPERIMENT_QUEUE)
+        queue = collections.deque(self._pending(self.settings.EXPERIMENT_QUEUE))
         # Calculate number of experiments and number of processes
-        self.n_exp = len(queue) * self.settings.N_REPLICATIONS 
+        self.n_exp = sum(n for _, n in queue)
+        n_skipped = len(queue) * self.settings.N_REPLICATIONS - self.n_exp
+        if n_skipped > 0:
+            logger.info('Skipping %d experiments already completed', n_skipped)
         self.n_proc = self.settings.N_PROCESSES \
                       if self.settings.PARALLEL_EXECUTION \
                       else 1
         logger.info('Starting simulations: %d experiments, %d process(es)' 
                     % (self.n_exp, self.n_proc))
         
-        if self.settings.PARALLEL_EXECUTION:
+        if 'FORK_AFTER_WARMUP' in self.settings and self.settings.FORK_AFTER_WARMUP:
+            self.run_groups(queue)
+        elif self.settings.PARALLEL_EXECUTION:
             # This job queue is used only to keep track of which jobs have
             # finished and which are still running. Currently this information
             # is used only to handle keyboard interrupts correctly
             job_queue = collections.deque()
             # Schedule experiments from the queue
             while queue:
-                experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
+                experiment, n_replications = queue.popleft()
+                for replication in self._replications(n_replications):
                     job_queue.append(self.pool.apply_async(run_scenario,
                             args=(self.settings, experiment,
-                                  self.seq.assign(), self.n_exp),
+                                  self.seq.assign(), self.n_exp, replication),
                             callback=self.experiment_callback))
             self.pool.close()
             # This solution is probably not optimal, but at least makes
@@ -117,11 +144,11 @@ class Orchestrator(object):
         
         else: # Single-process execution
             while queue:
-                experiment = queue.popleft()
-                for _ in range(self.settings.N_REPLICATIONS):
+                experiment, n_replications = queue.popleft()
+                for replication in self._replications(n_replications):
                     self.experiment_callback(run_scenario(self.settings, 
                                             experiment, self.seq.assign(),
-                                            self.n_exp))
+                                            self.n_exp, replication))
                     if self._stop:
                         self.stop()
 
@@ -129,6 +156,108 @@ class Orchestrator(object):
                     self.n_exp, self.n_fail + self.n_success, self.n_success, self.n_fail)
         
 
+    def run_groups(self, queue):
+        """Run experiments grouped by shared warm-up configuration, executing
+        the warm-up once per group and forking a process for each experiment
+        after it.
+        
+        Parameters
+        ----------
+        queue : deque
+            The queue of (experiment, replications) pairs
+        """
+        n_pending = {id(experiment): n for experiment, n in queue}
+        groups = _group_experiments([experiment for experiment, _ in queue])
+        logger.info('Experiments grouped in %d groups sharing warm-up'
+                    % len(groups))
+        # Replications of each group, only including experiments whose
+        # replication has not been completed yet
+        replications = []
+        for group in groups:
+            for replication in range(self.settings.N_REPLICATIONS):
+                pending = [e for e in group if replication in
+                           self._replications(n_pending[id(e)])]
+                if pending:
+                    replications.append((replication, pending))
+        if self.settings.PARALLEL_EXECUTION:
+            job_queue = collections.deque()
+            for replication, group in replications:
+                job_queue.append(self.pool.apply_async(run_scenario_group,
+                        args=(self.settings, group,
+                              [self.seq.assign() for _ in group],
+                              self.n_exp, replication),
+                        callback=self.group_callback))
+            self.pool.close()
+            try:
+                while job_queue:
+                    job = job_queue.popleft()
+                    while not job.ready():
+                        time.sleep(5)
+            except KeyboardInterrupt:
+                self.pool.terminate()
+            self.pool.join()
+        else:
+            for replication, group in replications:
+                self.group_callback(run_scenario_group(self.settings,
+                                    group, [self.seq.assign() for _ in group],
+                                    self.n_exp, replication))
+                if self._stop:
+                    self.stop()
+
+    def _replications(self, n_pending):
+        """Return the indices of the pending replications of an experiment,
+        i.e. the last *n_pending* ones, since completed replications are
+        counted from the first one.
+        
+        Parameters
+        ----------
+        n_pending : int
+            The number of pending replications
+        
+        Returns
+        -------
+        replications : list
+            The indices of the pending replications
+        """
+        return range(self.settings.N_REPLICATIONS - n_pending,
+                     self.settings.N_REPLICATIONS)
+
+    def _pending(self, queue):
+        """Return the number of replications of each experiment of a queue
+        which are not among the results already completed.
+        
+        Parameters
+        ----------
+        queue : iterable
+            The queue of experiments
+        
+        Returns
+        -------
+        pending : list
+            List of (experiment, replications) pairs
+        """
+        completed = collections.Counter(_experiment_key(params)
+                                        for params, _ in self.results)
+        pending = []
+        for experiment in queue:
+            key = _experiment_key(experiment)
+            n_skipped = min(completed[key], self.settings.N_REPLICATIONS)
+            completed[key] -= n_skipped
+            pending.append((experiment,
+                            self.settings.N_REPLICATIONS - n_skipped))
+        return pending
+
+    def group_callback(self, results):
+        """Callback method called by run_scenario_group
+        
+        Parameters
+        ----------
+        results : list
+            List of the return values of the experiments of the group
+        """
+        for args in results:
+            self.experiment_callback(args)
+
     def experiment_callback(self, args):
         """Callback method called by run_scenario
         
@@ -147,6 +276,8 @@ class Orchestrator(object):
         self.n_success += 1
         # Store results
         self.results.add(params, results)
+        if self.results_log is not None:
+            self.results_log.add(params, results)
         self.exp_durations.append(duration)
         if self.n_success % self.summary_freq == 0:
             # Number of experiments scheduled to be executed
@@ -160,7 +291,279 @@ class Orchestrator(object):
                         self.n_success, self.n_fail, n_scheduled, eta)
         
 
-def run_scenario(settings, params, curr_exp, n_exp):
+def _topology_key(name, spec):
+    """Return a key identifying a topology specification
+    """
+    return repr((name, sorted(spec.items())))
+
+
+def _experiment_key(params):
+    """Return a key identifying the parameters of an experiment.
+    
+    Since derived parameters are added before computing the key, the
+    parameters of an experiment queue and those stored with its results have
+    the same key.
+    """
+    paths = Tree(_derived_params(params)).paths()
+    return hashlib.sha1(repr(sorted(paths.items()))).hexdigest()
+
+
+def _derived_params(params):
+    """Return a copy of the parameters of an experiment to which parameters
+    derived from them are added, i.e. the RSN/cache size ratio of RSN
+    placements, which are stored with the results of the experiment.
+    """
+    params = copy.deepcopy(params)
+    if 'cache_placement' in params and 'rsn_placement' in params:
+        spec = params['rsn_placement']
+        if 'rsn_cache_ratio' not in spec:
+            network_cache = params['cache_placement']['network_cache']
+            spec['rsn_cache_ratio'] = spec['network_rsn']/network_cache
+    if 'joint_cache_rsn_placement' in params:
+        spec = params['joint_cache_rsn_placement']
+        if 'rsn_cache_ratio' not in spec:
+            spec['rsn_cache_ratio'] = spec['network_rsn']/spec['network_cache']
+    return params
+
+
+def _warmup_key(params):
+    """Return a key identifying the warm-up configuration of an experiment,
+    i.e. all its parameters except those only affecting the measured phase
+    """
+    paths = Tree(params).paths()
+    spec = sorted((path, val) for path, val in paths.items()
+                  if path[0] not in ('strategy', 'desc')
+                  and path != ('workload', 'n_measured'))
+    return hashlib.sha1(repr(spec)).hexdigest()
+
+
+def _group_experiments(queue):
+    """Group the experiments of a queue which only differ in the parameters
+    of the strategy used after warm-up, preserving their order.
+    """
+    groups = collections.OrderedDict()
+    for experiment in queue:
+        key = (_warmup_key(experiment), experiment['workload']['n_measured'])
+        groups.setdefault(key, []).append(experiment)
+    return groups.values()
+
+
+def prepare_topologies(settings, queue):
+    """Compute the shortest paths of each distinct topology specification of
+    an experiment queue.
+    
+    Experiments of the queue are grouped by topology specification and the
+    shortest paths of each topology are computed only once. They are stored
+    in a module-level dictionary from which *run_scenario* takes them. If this
+    function is called before forking worker processes, workers share the
+    prepared shortest paths instead of computing them for each experiment.
+    
+    Topologies themselves are still built by each experiment, because copies
+    of a topology may iterate nodes and neighbors in a different order, which
+    would change the results of the experiment. If a topology cache is
+    configured, shortest paths are also stored in the cache and the prepared
+    ones are memory-mapped from it.
+    
+    Parameters
+    ----------
+    settings : Settings
+        The simulator settings
+    queue : iterable
+        The experiment queue
+    """
+    groups = collections.defaultdict(int)
+    specs = {}
+    for experiment in queue:
+        topology_spec = copy.deepcopy(experiment['topology'])
+        topology_name = topology_spec.pop('name')
+        key = _topology_key(topology_name, topology_spec)
+        groups[key] += 1
+        specs[key] = (topology_name, topology_spec)
+    for key, n in groups.iteritems():
+        if key in _PREPARED_TOPOLOGIES:
+            continue
+        topology_name, topology_spec = specs[key]
+        if topology_name not in TOPOLOGY_FACTORY:
+            # The error is reported by run_scenario
+            continue
+        logger.info('Preparing topology %s for %d experiment(s)', key, n)
+        if 'TOPOLOGY_CACHE_DIR' in settings:
+            topo_cache = TopologyCache(settings.TOPOLOGY_CACHE_DIR)
+            _, nodes, predecessors = topo_cache.get(topology_name,
+                                                    **topology_spec)
+        else:
+            topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+            nodes = all_pairs_order(topology)
+            predecessors = shortest_path_predecessors(topology, nodes)
+        _PREPARED_TOPOLOGIES[key] = (nodes, predecessors)
+
+
+def _setup_scenario(settings, params, logger, replication=0):
+    """Build all the components of a scenario experiment
+    
+    Parameters
+    ----------
+    settings : Settings
+        The simulator settings
+    params : Tree
+        experiment parameters tree
+    logger : Logger
+        The logger on which errors are reported
+    replication : int, optional
+        The index of the replication of the experiment
+    
+    Returns
+    -------
+    scenario : dict
+        The arguments of *exec_experiment*, keyed by name, or *None* if the
+        scenario could not be built
+    """
+    # Get list of metrics required
+    metrics = settings.DATA_COLLECTORS
+    
+    # Copy parameters so that they can be manipulated
+    tree = copy.deepcopy(params)
+    
+    # Set topology
+    topology_spec = tree['topology']
+    topology_name = topology_spec.pop('name')
+    if topology_name not in TOPOLOGY_FACTORY:
+        logger.error('No topology factory implementation for %s was found.'
+                     % topology_name)
+        return None
+    topology_key = _topology_key(topology_name, topology_spec)
+    if topology_key in _PREPARED_TOPOLOGIES:
+        # Shortest paths are shared, while the topology is built again
+        # because placement functions modify it and copies of it may iterate
+        # nodes in a different order
+        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+        nodes, predecessors = _PREPARED_TOPOLOGIES[topology_key]
+    elif 'TOPOLOGY_CACHE_DIR' in settings:
+        # Reuse the shortest paths stored by previous experiments with the
+        # same topology specification
+        topo_cache = TopologyCache(settings.TOPOLOGY_CACHE_DIR)
+        topology, nodes, predecessors = topo_cache.get(topology_name, **topology_spec)
+    else:
+        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
+        predecessors = None
+    # Nodes are in the order of all_pairs_order on the topology from which
+    # predecessors were computed
+    shortest_path = ShortestPaths(topology, nodes=nodes, order=nodes,
+                                  predecessors=predecessors) \
+                    if predecessors is not None else None
+    
+    workload_spec = tree['workload']
+    workload_name = workload_spec.pop('name')
+    if workload_name not in WORKLOAD:
+        logger.error('No workload implementation named %s was found.'
+                     % workload_name)
+        return None
+    workload = WORKLOAD[workload_name](topology, **workload_spec)
+    
+    # Assign caches to nodes
+    if 'cache_placement' in tree:
+        cachepl_spec = tree['cache_placement']
+        cachepl_name = cachepl_spec.pop('name')
+        if cachepl_name not in CACHE_PLACEMENT:
+            logger.error('No cache placement named %s was found.'
+                         % cachepl_name)
+            return None
+        network_cache = cachepl_spec.pop('network_cache')
+        # Cache budget is the cumulative number of cache entries across
+        # the whole network
+        cachepl_spec['cache_budget'] = workload.n_contents * network_cache
+        CACHE_PLACEMENT[cachepl_name](topology, **cachepl_spec)
+        
+        if 'rsn_placement' in tree:
+            rsnpl_spec = tree['rsn_placement']
+            rsnpl_name = rsnpl_spec.pop('name')
+            if rsnpl_name not in RSN_PLACEMENT:
+                logger.error('No RSN placement named %s was found.' % rsnpl_name)
+                return None
+            network_rsn = rsnpl_spec.pop('network_rsn')
+            rsnpl_spec['rsn_budget'] = workload.n_contents * network_rsn
+            RSN_PLACEMENT[rsnpl_name](topology, **rsnpl_spec)
+        
+    if 'joint_cache_rsn_placement' in tree:
+        cache_rsn_spec = tree['joint_cache_rsn_placement']
+        cache_rsn_name = cache_rsn_spec.pop('name')
+        if cache_rsn_name not in JOINT_CACHE_RSN_PLACEMENT:
+            logger.error('No joint cache/RSN placement named %s was found.' % cache_rsn_name)
+            return None
+        if 'cache_placement' in tree or 'rsn_placement' in tree:
+            logger.error('You cannot set a joint RSN-cache placement strategy '
+                         'and separate cache and RSN deployment strategies together')
+            return None
+        network_cache = cache_rsn_spec.pop('network_cache')
+        cache_rsn_spec['cache_budget'] = workload.n_contents * network_cache
+        network_rsn = cache_rsn_spec.pop('network_rsn')
+        cache_rsn_spec['rsn_budget'] = workload.n_contents * network_rsn
+        JOINT_CACHE_RSN_PLACEMENT[cache_rsn_name](topology, **cache_rsn_spec)
+    
+    # Assign contents to sources
+    # If there are many contents, after doing this, performing operations
+    # requiring a topology deep copy, i.e. to_directed/undirected, will
+    # take long.
+    contpl_spec = tree['content_placement']
+    contpl_name = contpl_spec.pop('name')
+    if contpl_name not in CONTENT_PLACEMENT:
+        logger.error('No content placement implementation named %s was found.'
+                     % contpl_name)
+        return None
+    CONTENT_PLACEMENT[contpl_name](topology, workload.contents, **contpl_spec)
+
+    # caching and routing strategy definition
+    strategy = tree['strategy']
+    warmup_strategy = tree['warmup_strategy']
+    if strategy['name'] not in STRATEGY:
+        logger.error('No implementation of strategy %s was found.' % strategy['name'])
+        return None
+    if warmup_strategy['name'] not in STRATEGY:
+        logger.error('No implementation of warm-up strategy %s was found.' % warmup_strategy['name'])
+        return None
+    
+    # cache eviction policy definition
+    cache_policy = tree['cache_policy']
+    if cache_policy['name'] not in CACHE_POLICY:
+        logger.error('No implementation of cache policy %s was found.' % cache_policy['name'])
+        return None
+    
+    # Configuration parameters of network model
+    netconf = tree['netconf']
+    if shortest_path is not None:
+        netconf['shortest_path'] = shortest_path
+    
+    if any(m not in DATA_COLLECTOR for m in metrics):
+        logger.error('There are no implementations for at least one data collector specified')
+        return None
+
+    collectors = {m: {} for m in metrics}
+    
+    fast_warmup = 'FAST_WARMUP' in settings and settings.FAST_WARMUP
+    
+    # Path of the snapshot of the network state after warm-up, shared by
+    # the same replication of all experiments with the same warm-up
+    # configuration. Without a workload seed, replications must not share
+    # the state of random number generators, so no snapshot is used
+    warmup_snapshot = None
+    if 'WARMUP_SNAPSHOT_DIR' in settings and \
+            params['workload'].get('seed') is not None:
+        try:
+            os.makedirs(settings.WARMUP_SNAPSHOT_DIR)
+        except OSError:
+            if not os.path.isdir(settings.WARMUP_SNAPSHOT_DIR):
+                raise
+        warmup_snapshot = os.path.join(settings.WARMUP_SNAPSHOT_DIR,
+                                       '%s-%d.pickle' % (_warmup_key(params),
+                                                         replication))
+    
+    return dict(topology=topology, workload=workload, netconf=netconf,
+                strategy=strategy, cache_policy=cache_policy,
+                collectors=collectors, warmup_strategy=warmup_strategy,
+                fast_warmup=fast_warmup, warmup_snapshot=warmup_snapshot)
+
+
+def run_scenario(settings, params, curr_exp, n_exp, replication=0):
     """Run a single scenario experiment
     
     Parameters
@@ -173,6 +576,8 @@ def run_scenario(settings, params, curr_exp, n_exp):
         sequence number of the experiment
     n_exp : int
         Number of scheduled experiments
+    replication : int, optional
+        The index of the replication of the experiment
     
     Returns
     -------
@@ -188,122 +593,20 @@ def run_scenario(settings, params, curr_exp, n_exp):
         proc_name = mp.current_process().name
         logger = logging.getLogger('runner-%s' % proc_name)
     
-        # Get list of metrics required
-        metrics = settings.DATA_COLLECTORS
-        
-        # Copy parameters so that they can be manipulated
-        tree = copy.deepcopy(params)
-        
-        # Set topology
-        topology_spec = tree['topology']
-        topology_name = topology_spec.pop('name')
-        if topology_name not in TOPOLOGY_FACTORY:
-            logger.error('No topology factory implementation for %s was found.'
-                         % topology_name)
-            return None
-        topology = TOPOLOGY_FACTORY[topology_name](**topology_spec)
-        
-        workload_spec = tree['workload']
-        workload_name = workload_spec.pop('name')
-        if workload_name not in WORKLOAD:
-            logger.error('No workload implementation named %s was found.'
-                         % workload_name)
-            return None
-        workload = WORKLOAD[workload_name](topology, **workload_spec)
-        
-        # Assign caches to nodes
-        if 'cache_placement' in tree:
-            cachepl_spec = tree['cache_placement']
-            cachepl_name = cachepl_spec.pop('name')
-            if cachepl_name not in CACHE_PLACEMENT:
-                logger.error('No cache placement named %s was found.'
-                             % cachepl_name)
-                return None
-            network_cache = cachepl_spec.pop('network_cache')
-            # Cache budget is the cumulative number of cache entries across
-            # the whole network
-            cachepl_spec['cache_budget'] = workload.n_contents * network_cache
-            CACHE_PLACEMENT[cachepl_name](topology, **cachepl_spec)
-            
-            if 'rsn_placement' in tree:
-                rsnpl_spec = tree['rsn_placement']
-                rsnpl_name = rsnpl_spec.pop('name')
-                if rsnpl_name not in RSN_PLACEMENT:
-                    logger.error('No RSN placement named %s was found.' % rsnpl_name)
-                    return None
-                network_rsn = rsnpl_spec.pop('network_rsn')
-                rsnpl_spec['rsn_budget'] = workload.n_contents * network_rsn
-                if 'rsn_cache_ratio' not in params['rsn_placement']:
-                    params['rsn_placement']['rsn_cache_ratio'] =  network_rsn/network_cache
-                RSN_PLACEMENT[rsnpl_name](topology, **rsnpl_spec)
-            
-        if 'joint_cache_rsn_placement' in tree:
-            cache_rsn_spec = tree['joint_cache_rsn_placement']
-            cache_rsn_name = cache_rsn_spec.pop('name')
-            if cache_rsn_name not in JOINT_CACHE_RSN_PLACEMENT:
-                logger.error('No joint cache/RSN placement named %s was found.' % cache_rsn_name)
-                return None
-            if 'cache_placement' in tree or 'rsn_placement' in tree:
-                logger.error('You cannot set a joint RSN-cache placement strategy '
-                             'and separate cache and RSN deployment strategies together')
-                return None
-            network_cache = cache_rsn_spec.pop('network_cache')
-            cache_rsn_spec['cache_budget'] = workload.n_contents * network_cache
-            network_rsn = cache_rsn_spec.pop('network_rsn')
-            cache_rsn_spec['rsn_budget'] = workload.n_contents * network_rsn
-            JOINT_CACHE_RSN_PLACEMENT[cache_rsn_name](topology, **cache_rsn_spec)
-            if 'rsn_cache_ratio' not in params['joint_cache_rsn_placement']:
-                params['joint_cache_rsn_placement']['rsn_cache_ratio'] = network_rsn/network_cache
-        
-        # Assign contents to sources
-        # If there are many contents, after doing this, performing operations
-        # requiring a topology deep copy, i.e. to_directed/undirected, will
-        # take long.
-        contpl_spec = tree['content_placement']
-        contpl_name = contpl_spec.pop('name')
-        if contpl_name not in CONTENT_PLACEMENT:
-            logger.error('No content placement implementation named %s was found.'
-                         % contpl_name)
-            return None
-        CONTENT_PLACEMENT[contpl_name](topology, workload.contents, **contpl_spec)
-
-        # caching and routing strategy definition
-        strategy = tree['strategy']
-        warmup_strategy = tree['warmup_strategy']
-        if strategy['name'] not in STRATEGY:
-            logger.error('No implementation of strategy %s was found.' % strategy['name'])
-            return None
-        if warmup_strategy['name'] not in STRATEGY:
-            logger.error('No implementation of warm-up strategy %s was found.' % warmup_strategy['name'])
+        scenario = _setup_scenario(settings, params, logger, replication)
+        if scenario is None:
             return None
         
-        # cache eviction policy definition
-        cache_policy = tree['cache_policy']
-        if cache_policy['name'] not in CACHE_POLICY:
-            logger.error('No implementation of cache policy %s was found.' % cache_policy['name'])
-            return None
-        
-        # Configuration parameters of network model
-        netconf = tree['netconf']
-        
         # Text description of the scenario run to print on screen
-        scenario = tree['desc'] if 'desc' in tree else "Description N/A"
-
-        logger.info('Experiment %d/%d | Preparing scenario: %s', curr_exp, n_exp, scenario)
-        
-        if any(m not in DATA_COLLECTOR for m in metrics):
-            logger.error('There are no implementations for at least one data collector specified')
-            return None
-    
-        collectors = {m: {} for m in metrics}
-
+        desc = params['desc'] if 'desc' in params else "Description N/A"
+        logger.info('Experiment %d/%d | Preparing scenario: %s', curr_exp, n_exp, desc)
         logger.info('Experiment %d/%d | Start simulation', curr_exp, n_exp)
-        results = exec_experiment(topology, workload, netconf, strategy, cache_policy, collectors, warmup_strategy)
+        results = exec_experiment(**scenario)
         
         duration = time.time() - start_time
         logger.info('Experiment %d/%d | End simulation | Duration %s.', 
                     curr_exp, n_exp, timestr(duration, True))
-        return (params, results, duration)
+        return (_derived_params(params), results, duration)
     except KeyboardInterrupt:
         logger.error('Received keyboard interrupt. Terminating')
         sys.exit(-signal.SIGINT)
@@ -313,3 +616,79 @@ def run_scenario(settings, params, curr_exp, n_exp):
         logger.error('Experiment %d/%d | Failed | %s: %s\n%s',
                      curr_exp, n_exp, err_type, err_message,
                      traceback.format_exc())
+
+
+def run_scenario_group(settings, params_list, curr_exps, n_exp,
+                       replication=0):
+    """Run a group of scenario experiments sharing everything but the
+    parameters of the strategy used after warm-up.
+    
+    The scenario and the warm-up are executed once and then a child process
+    is forked for each experiment, which inherits the network state after
+    warm-up.
+    
+    Parameters
+    ----------
+    settings : Settings
+        The simulator settings
+    params_list : list of Tree
+        experiment parameters trees, which must only differ in their
+        *strategy* and *desc* parameters
+    curr_exps : list of int
+        sequence numbers of the experiments
+    n_exp : int
+        Number of scheduled experiments
+    replication : int, optional
+        The index of the replication of the experiments
+    
+    Returns
+    -------
+    results : list of 3-tuples
+        The (params, results, duration) 3-tuple of each experiment, as
+        returned by *run_scenario*, or *None* for failed experiments. The
+        duration of each experiment is the duration of the whole group divided
+        by the number of experiments
+    """
+    exp_range = '%d-%d' % (curr_exps[0], curr_exps[-1])
+    try:
+        start_time = time.time()
+        proc_name = mp.current_process().name
+        logger = logging.getLogger('runner-%s' % proc_name)
+        
+        scenario = _setup_scenario(settings, params_list[0], logger,
+                                   replication)
+        if scenario is None:
+            return [None]*len(params_list)
+        del scenario['strategy']
+        strategies = []
+        for params in params_list:
+            strategy = copy.deepcopy(params['strategy'])
+            if strategy['name'] not in STRATEGY:
+                logger.error('No implementation of strategy %s was found.' % strategy['name'])
+                return [None]*len(params_list)
+            strategies.append(strategy)
+        
+        logger.info('Experiments %s/%d | Start simulation of %d experiments '
+                    'after shared warm-up', exp_range, n_exp, len(params_list))
+        max_children = settings.FORK_MAX_CHILDREN \
+                       if 'FORK_MAX_CHILDREN' in settings else 1
+        results = fork_experiments(strategies=strategies,
+                                   max_children=max_children, **scenario)
+        
+        duration = time.time() - start_time
+        logger.info('Experiments %s/%d | End simulation | Duration %s.', 
+                    exp_range, n_exp, timestr(duration, True))
+        duration /= len(params_list)
+        return [(_derived_params(params), r, duration)
+                if r is not None else None
+                for params, r in zip(params_list, results)]
+    except KeyboardInterrupt:
+        logger.error('Received keyboard interrupt. Terminating')
+        sys.exit(-signal.SIGINT)
+    except Exception as e:
+        err_type = str(type(e)).split("'")[1].split(".")[1]
+        err_message = e.message
+        logger.error('Experiments %s/%d | Failed | %s: %s\n%s',
+                     exp_range, n_exp, err_type, err_message,
+                     traceback.format_exc())
+        return [None]*len(params_list)
@@ -2,18 +2,29 @@
 """
 import collections
 import copy
+import os
+import time
 try:
     import cPickle as pickle
 except ImportError:
     import pickle
+
+import numpy as np
+
 from icarus.util import Tree
 from icarus.registry import register_results_reader, register_results_writer
 
 
 __all__ = [
     'ResultSet',
+    'ResultsLog',
     'write_results_pickle',
-    'read_results_pickle'
+    'read_results_pickle',
+    'write_results_log',
+    'read_results_log',
+    'NpzResults',
+    'write_results_npz',
+    'read_results_npz'
            ]
 
 class ResultSet(object):
@@ -22,6 +33,12 @@ class ResultSet(object):
     
     All operations that write data are thread-safe so that this object can 
     be shared by different processes.
+    
+    Queries on experiment parameters are answered using a columnar index,
+    built on the first query and then updated as results are added. Each
+    flattened parameter path is a column storing the value of that parameter
+    for each result (*None* if not present), with a hash index mapping each
+    value to the results having it.
     """
     
     def __init__(self, attr=None):
@@ -35,6 +52,18 @@ class ResultSet(object):
         self._results = collections.deque()
         # Dict of global attributes common to all experiments
         self.attr = attr if attr is not None else {}
+        self._index = None
+    
+    def __getstate__(self):
+        # The index is not pickled, since it can be rebuilt from results
+        state = self.__dict__.copy()
+        state['_index'] = None
+        return state
+    
+    def __setstate__(self, state):
+        # Resultsets pickled before the index was introduced do not have it
+        self.__dict__.update(state)
+        self._index = None
     
     def __len__(self):
         """Returns the number of results in the resultset
@@ -110,6 +139,8 @@ class ResultSet(object):
         if not isinstance(results, Tree):
             results = Tree(results)
         self._results.append((parameters, results))
+        if self._index is not None:
+            self._index.add(parameters, results)
     
     def dump(self):
         """Dump all results.
@@ -124,6 +155,15 @@ class ResultSet(object):
         return list(self._results)
 
     
+    def _get_index(self):
+        """Return the columnar index of the resultset, building it if needed
+        """
+        if self._index is None:
+            self._index = _ColumnIndex()
+            for parameters, results in self._results:
+                self._index.add(parameters, results)
+        return self._index
+    
     def filter(self, condition):
         """Return subset of results matching specific conditions
         
@@ -144,12 +184,157 @@ class ResultSet(object):
             tree of all experiment parameters and the second value is 
             a tree with experiment results.
         """
+        index = self._get_index()
         filtered_resultset = ResultSet()
-        for parameters, results in self._results:
-            parameters = Tree(parameters)
-            if parameters.match(condition):
-                filtered_resultset.add(parameters, results)
+        for i in index.match(condition):
+            filtered_resultset.add(*index.rows[i])
         return filtered_resultset
+    
+    def values(self, path, condition=None):
+        """Return the distinct values of a parameter, in order of first
+        appearance.
+        
+        Parameters
+        ----------
+        path : tuple
+            The path of the parameter in the parameters tree
+        condition : dict, optional
+            If specified, only results matching it are considered
+        
+        Returns
+        -------
+        values : list
+            The distinct values of the parameter
+        """
+        return self.group_by(path, condition).keys()
+    
+    def group_by(self, path, condition=None):
+        """Group results by the value of a parameter.
+        
+        Parameters
+        ----------
+        path : tuple
+            The path of the parameter in the parameters tree
+        condition : dict, optional
+            If specified, only results matching it are grouped
+        
+        Returns
+        -------
+        groups : OrderedDict
+            Dictionary mapping each value of the parameter, in order of first
+            appearance, to the ResultSet of results having it. Results not
+            having the parameter are grouped under *None*
+        """
+        index = self._get_index()
+        rows = index.match(condition) if condition else xrange(len(index.rows))
+        column = index.column(tuple(path))
+        groups = collections.OrderedDict()
+        for i in rows:
+            val = column[i]
+            if val not in groups:
+                groups[val] = ResultSet()
+            groups[val].add(*index.rows[i])
+        return groups
+    
+    def select(self, metric, group_by, condition=None):
+        """Return the values of a metric for each value of a parameter, e.g.
+        the mean cache hit ratio for each value of the cache size.
+        
+        Parameters
+        ----------
+        metric : tuple
+            The path of the metric in the results tree, e.g.
+            ('CACHE_HIT_RATIO', 'MEAN')
+        group_by : tuple
+            The path of the parameter in the parameters tree
+        condition : dict, optional
+            If specified, only results matching it are considered
+        
+        Returns
+        -------
+        values : OrderedDict
+            Dictionary mapping each value of the parameter, in order of first
+            appearance, to the list of values of the metric of results having
+            it, one per result (e.g. per replication)
+        """
+        index = self._get_index()
+        rows = index.match(condition) if condition else xrange(len(index.rows))
+        column = index.column(tuple(group_by))
+        values = collections.OrderedDict()
+        for i in rows:
+            values.setdefault(column[i], []).append(
+                                        index.rows[i][1].getval(metric))
+        return values
+
+
+class _ColumnIndex(object):
+    """Columnar index of the parameters of a list of results
+    """
+    
+    def __init__(self):
+        # List of (parameters, results) tuples indexed by row
+        self.rows = []
+        # Values of each parameter path, one per row
+        self.columns = {}
+        # Rows having each value, keyed by parameter path and value
+        self.index = {}
+        # Paths of columns storing unhashable values, which are not indexed
+        self.unhashable = set()
+    
+    def _new_column(self, path):
+        """Add a column for a path not found in the results added so far
+        """
+        n = len(self.rows) - 1
+        self.columns[path] = [None]*n
+        self.index[path] = {None: range(n)} if n > 0 else {}
+    
+    def add(self, parameters, results):
+        """Add a result to the index
+        """
+        self.rows.append((parameters, results))
+        row = len(self.rows) - 1
+        paths = dict(iter(parameters))
+        for path in paths:
+            if path not in self.columns:
+                self._new_column(path)
+        for path, column in self.columns.iteritems():
+            val = paths.get(path)
+            column.append(val)
+            if path in self.unhashable:
+                continue
+            try:
+                self.index[path].setdefault(val, []).append(row)
+            except TypeError:
+                self.unhashable.add(path)
+                del self.index[path]
+    
+    def column(self, path):
+        """Return the values of a parameter, one per row
+        """
+        if path in self.columns:
+            return self.columns[path]
+        return [parameters.getval(path) for parameters, _ in self.rows]
+    
+    def match(self, condition):
+        """Return the sorted list of rows whose parameters match a condition,
+        with the same semantics of *Tree.match*
+        """
+        rows = None
+        for path, val in Tree(condition).paths().iteritems():
+            if path in self.index:
+                try:
+                    matched = self.index[path].get(val, ())
+                except TypeError:
+                    matched = ()
+            else:
+                matched = [i for i, v in enumerate(self.column(path))
+                           if v == val]
+            rows = set(matched) if rows is None else rows.intersection(matched)
+            if not rows:
+                return []
+        if rows is None:
+            return range(len(self.rows))
+        return sorted(rows)
 
 
 @register_results_writer('PICKLE')
@@ -182,4 +367,450 @@ def read_results_pickle(path):
         The read result set
     """
     with open(path, 'rb') as pickle_file:
-        return pickle.load(pickle_file)
\ No newline at end of file
+        return pickle.load(pickle_file)
+
+
+def _read_log_records(log_file):
+    """Read the records of a results log from its beginning.
+    
+    Parameters
+    ----------
+    log_file : file
+        The log file, opened for binary reading
+    
+    Returns
+    -------
+    records : list
+        The list of (parameters, results) records
+    offset : int
+        The offset of the end of the last complete record. A record after it,
+        if any, was truncated while being written
+    """
+    records = []
+    offset = 0
+    while True:
+        try:
+            records.append(pickle.load(log_file))
+        except EOFError:
+            break
+        except (pickle.UnpicklingError, ValueError, KeyError, IndexError,
+                AttributeError, ImportError, TypeError):
+            # Truncated record, written by a process killed while writing it
+            break
+        offset = log_file.tell()
+    return records, offset
+
+
+class ResultsLog(object):
+    """Append-only log of experiment results.
+    
+    Each result is pickled and appended to the log file as soon as it is
+    added, and the file is flushed so that results survive the termination
+    of the process. Since fsync calls are expensive, the file is only
+    synchronized to disk every *sync_every* results or *sync_interval*
+    seconds, whichever comes first, and when the log is closed.
+    
+    If the process is killed while a result is being written, the log ends
+    with a truncated record, which is ignored when the log is read and
+    overwritten when it is reopened for appending.
+    """
+    
+    def __init__(self, path, append=False, sync_every=16, sync_interval=60.0):
+        """Constructor
+        
+        Parameters
+        ----------
+        path : str
+            The path of the log file
+        append : bool, optional
+            If *True*, results are appended to those of an existing log,
+            otherwise the log is overwritten
+        sync_every : int, optional
+            The maximum number of results added between two fsync calls
+        sync_interval : float, optional
+            The maximum time (in seconds) elapsed between the addition of a
+            result and the fsync call synchronizing it to disk
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        if append and os.path.isfile(path):
+            with open(path, 'rb') as log_file:
+                _, offset = _read_log_records(log_file)
+            self._file = open(path, 'r+b')
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        else:
+            self._file = open(path, 'wb')
+        self._n_unsynced = 0
+        self._last_sync = time.time()
+    
+    def add(self, parameters, results):
+        """Append a result to the log.
+        
+        Parameters
+        ----------
+        parameters : Tree
+            Tree of experiment parameters
+        results : Tree
+            Tree of experiment results
+        """
+        pickle.dump((parameters, results), self._file,
+                    pickle.HIGHEST_PROTOCOL)
+        self._file.flush()
+        self._n_unsynced += 1
+        if self._n_unsynced >= self.sync_every or \
+                time.time() - self._last_sync >= self.sync_interval:
+            self.sync()
+    
+    def sync(self):
+        """Synchronize all results added to the log to disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._n_unsynced = 0
+        self._last_sync = time.time()
+    
+    def close(self):
+        """Synchronize the log to disk and close it
+        """
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+@register_results_writer('LOG')
+def write_results_log(results, path):
+    """Write a resultset to a results log file
+    
+    Parameters
+    ----------
+    results : ResultSet
+        The set of results
+    path : str
+        The path of the file to which write
+    """
+    log = ResultsLog(path)
+    for parameters, result in results:
+        log.add(parameters, result)
+    log.close()
+
+
+@register_results_reader('LOG')
+def read_results_log(path):
+    """Reads a resultset from a results log file, ignoring a truncated last
+    record, if any.
+    
+    Parameters
+    ----------
+    path : str
+        The file path from which results are read
+    
+    Returns
+    -------
+    results : ResultSet
+        The read result set
+    """
+    results = ResultSet()
+    with open(path, 'rb') as log_file:
+        records, _ = _read_log_records(log_file)
+    for parameters, result in records:
+        results.add(parameters, result)
+    return results
+
+
+def _is_scalar(val):
+    """Return *True* if a result value can be stored in a scalar column
+    """
+    return isinstance(val, (bool, int, long, float, np.bool_, np.integer,
+                            np.floating))
+
+
+def _to_bytes(obj):
+    """Pickle an object into an array of bytes which can be stored in a npz
+    file without requiring numpy to unpickle it
+    """
+    return np.frombuffer(pickle.dumps(obj, pickle.HIGHEST_PROTOCOL),
+                         dtype=np.uint8)
+
+
+def _from_bytes(arr):
+    """Unpickle an object stored by *_to_bytes*
+    """
+    return pickle.loads(arr.tobytes())
+
+
+def _split_results(results, root=()):
+    """Split a results tree into scalar values, which are stored in columns,
+    and chunks, which are stored separately.
+    
+    Subtrees whose keys are not all strings, like per-link or per-node
+    results, are stored as a single chunk.
+    
+    Returns
+    -------
+    scalars : list
+        List of (path, value) tuples
+    chunks : list
+        List of (path, value) tuples
+    """
+    scalars = []
+    chunks = []
+    for k, v in results.iteritems():
+        path = root + (k,)
+        if isinstance(v, dict) and v and \
+                all(isinstance(k_child, basestring) for k_child in v.keys()):
+            sub_scalars, sub_chunks = _split_results(v, path)
+            scalars.extend(sub_scalars)
+            chunks.extend(sub_chunks)
+        elif _is_scalar(v):
+            scalars.append((path, v))
+        else:
+            chunks.append((path, v))
+    return scalars, chunks
+
+
+def _has_prefix(path, prefixes):
+    """Return *True* if a path starts with any of the given prefixes
+    """
+    return prefixes is None or \
+           any(path[:len(prefix)] == prefix for prefix in prefixes)
+
+
+@register_results_writer('NPZ')
+def write_results_npz(results, path):
+    """Write a resultset to a npz file.
+    
+    The parameters of all experiments are stored together, while scalar
+    metrics are stored as typed columns with one value per experiment. Columns
+    whose values are not all of the same type, e.g. ints and floats, are
+    pickled, so that values are not coerced to a common type. Other values,
+    like CDFs and per-link or per-node results, are stored in a separate chunk
+    each, which can be loaded independently by *read_results_npz* or
+    *NpzResults*.
+    
+    Parameters
+    ----------
+    results : ResultSet
+        The set of results
+    path : str
+        The path of the file to which write
+    """
+    n = len(results)
+    arrays = {}
+    columns = collections.OrderedDict()
+    chunks = []
+    for i, (_, result) in enumerate(results):
+        scalars, row_chunks = _split_results(result)
+        for col_path, val in scalars:
+            columns.setdefault(col_path, {})[i] = val
+        row_meta = []
+        for chunk_path, val in row_chunks:
+            key = 'c%d_%d' % (i, len(row_meta))
+            if isinstance(val, np.ndarray) and val.dtype != object:
+                arrays[key] = val
+                kind = 'array'
+            elif isinstance(val, tuple) and val and \
+                    all(isinstance(v, np.ndarray) and v.dtype != object
+                        for v in val):
+                for j, v in enumerate(val):
+                    arrays['%s_%d' % (key, j)] = v
+                kind = len(val)
+            else:
+                arrays[key] = _to_bytes(val)
+                kind = 'pickle'
+            row_meta.append((chunk_path, key, kind))
+        chunks.append(row_meta)
+    column_meta = []
+    for j, (col_path, vals) in enumerate(columns.iteritems()):
+        key = 's%d' % j
+        types = set(type(v) for v in vals.itervalues())
+        # Longs are pickled as well, since they may not fit in an int64 and
+        # would be read as ints
+        if len(types) == 1 and long not in types:
+            col = np.array(vals.values())
+            values = np.zeros(n, dtype=col.dtype)
+            values[vals.keys()] = col
+            arrays[key] = values
+            kind = 'array'
+        else:
+            arrays[key] = _to_bytes([vals.get(i) for i in range(n)])
+            kind = 'pickle'
+        if len(vals) < n:
+            mask = np.zeros(n, dtype=bool)
+            mask[vals.keys()] = True
+            arrays[key + '_mask'] = mask
+        column_meta.append((col_path, key, kind, len(vals) < n))
+    arrays['meta'] = _to_bytes({'attr': results.attr,
+                                'parameters': [p for p, _ in results],
+                                'columns': column_meta,
+                                'chunks': chunks})
+    # Passing a file rather than a path prevents numpy from appending a .npz
+    # extension to the path
+    with open(path, 'wb') as npz_file:
+        np.savez(npz_file, **arrays)
+
+
+class NpzResults(object):
+    """Lazy reader of a results file written in npz format.
+    
+    Parameters, the list of metrics and scalar columns are read when
+    needed, while each chunk is only read when requested.
+    """
+    
+    def __init__(self, path):
+        """Constructor
+        
+        Parameters
+        ----------
+        path : str
+            The path of the npz file
+        """
+        self._npz = np.load(path)
+        meta = _from_bytes(self._npz['meta'])
+        self.attr = meta['attr']
+        self.parameters = meta['parameters']
+        self._columns = collections.OrderedDict(
+                    (col_path, (key, kind, masked))
+                    for col_path, key, kind, masked in meta['columns'])
+        self._chunks = [collections.OrderedDict((chunk_path, (key, kind))
+                                                for chunk_path, key, kind in row)
+                        for row in meta['chunks']]
+    
+    def __len__(self):
+        return len(self.parameters)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self):
+        """Close the underlying file
+        """
+        self._npz.close()
+    
+    def columns(self):
+        """Return the paths of all scalar metrics
+        """
+        return self._columns.keys()
+    
+    def column(self, path):
+        """Return the values of a scalar metric for all experiments
+        
+        Parameters
+        ----------
+        path : tuple
+            The path of the metric in the results tree
+        
+        Returns
+        -------
+        values : array
+            The values of the metric, one per experiment. If values are not
+            all of the same type, it is an array of objects
+        mask : array
+            Boolean array which is *True* for the experiments having the
+            metric
+        """
+        key, kind, masked = self._columns[tuple(path)]
+        if kind == 'pickle':
+            col = _from_bytes(self._npz[key])
+            values = np.empty(len(col), dtype=object)
+            values[:] = col
+        else:
+            values = self._npz[key]
+        if masked:
+            return values, self._npz[key + '_mask']
+        return values, np.ones(len(values), dtype=bool)
+    
+    def chunks(self, i):
+        """Return the paths of all chunks of an experiment
+        """
+        return self._chunks[i].keys()
+    
+    def chunk(self, i, path):
+        """Read a chunk of an experiment
+        
+        Parameters
+        ----------
+        i : int
+            The index of the experiment
+        path : tuple
+            The path of the chunk in the results tree
+        
+        Returns
+        -------
+        value : any type
+            The value of the chunk
+        """
+        key, kind = self._chunks[i][tuple(path)]
+        if kind == 'array':
+            return self._npz[key]
+        if kind == 'pickle':
+            return _from_bytes(self._npz[key])
+        return tuple(self._npz['%s_%d' % (key, j)] for j in range(kind))
+    
+    def resultset(self, metrics=None):
+        """Return the results as a ResultSet
+        
+        Parameters
+        ----------
+        metrics : list, optional
+            List of paths of the metrics, or of their subtrees, to read, e.g.
+            [('LATENCY', 'MEAN'), ('LINK_LOAD',)]. If not specified, all
+            metrics are read
+        
+        Returns
+        -------
+        results : ResultSet
+            The read result set
+        """
+        if metrics is not None:
+            metrics = [tuple(m) for m in metrics]
+        n = len(self)
+        trees = [Tree() for _ in range(n)]
+        
+        def put(tree, path, val):
+            for k in path[:-1]:
+                tree = tree[k]
+            tree[path[-1]] = val
+        
+        for col_path in self.columns():
+            if not _has_prefix(col_path, metrics):
+                continue
+            values, mask = self.column(col_path)
+            for i in np.flatnonzero(mask):
+                val = values[i]
+                put(trees[i], col_path,
+                    val.item() if values.dtype != object else val)
+        for i in range(n):
+            for chunk_path in self.chunks(i):
+                if _has_prefix(chunk_path, metrics):
+                    put(trees[i], chunk_path, self.chunk(i, chunk_path))
+        results = ResultSet(copy.deepcopy(self.attr))
+        for parameters, tree in zip(self.parameters, trees):
+            results.add(parameters, tree)
+        return results
+
+
+@register_results_reader('NPZ')
+def read_results_npz(path, metrics=None):
+    """Reads a resultset from a npz file.
+    
+    Parameters
+    ----------
+    path : str
+        The file path from which results are read
+    metrics : list, optional
+        List of paths of the metrics, or of their subtrees, to read, e.g.
+        [('LATENCY', 'MEAN'), ('LINK_LOAD',)]. Other metrics are not read from
+        the file. If not specified, all metrics are read
+    
+    Returns
+    -------
+    results : ResultSet
+        The read result set
+    """
+    with NpzResults(path) as npz:
+        return npz.resultset(metrics)
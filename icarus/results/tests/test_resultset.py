@@ -7,8 +7,16 @@ else:
     except ImportError:
         raise ImportError("The unittest2 package is needed to run the tests.") 
 del sys
+import os
+import pickle
+import shutil
+import tempfile
 
-from icarus.results import ResultSet
+import numpy as np
+
+from icarus.results import ResultSet, ResultsLog, read_results_log, \
+                           NpzResults, write_results_npz, read_results_npz
+from icarus.util import Tree
 
 class TestResultSet(unittest.TestCase):
 
@@ -55,4 +63,195 @@ class TestResultSet(unittest.TestCase):
     def test_filter_no_match(self):
         filtered_rs = self.rs.filter({'gamma': 3})
         self.assertEquals(3, len(filtered_rs))
-        
\ No newline at end of file
+        
+
+
+class TestResultSetQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.rs = ResultSet()
+        for size in (0.1, 0.2):
+            for name in ('LCE', 'LCD'):
+                for i in range(2):
+                    self.rs.add({'strategy': {'name': name},
+                                 'cache_size': size},
+                                {'HIT': {'MEAN': size + i}})
+        self.rs.add({'strategy': {'name': 'LCE', 'p': 0.5},
+                     'extra': [1, 2]},
+                    {'HIT': {'MEAN': 1}})
+
+    def brute_filter(self, condition):
+        return [(p, r) for p, r in self.rs if p.match(condition)]
+
+    def test_filter(self):
+        for condition in ({'strategy': {'name': 'LCE'}},
+                          {'strategy': {'name': 'LCE'}, 'cache_size': 0.1},
+                          {'strategy': {'name': 'LCE', 'p': 0.5}},
+                          {'strategy': {'name': 'PROB_CACHE'}},
+                          {'cache_size': None},
+                          {'extra': [1, 2]},
+                          {'extra': [1, 3]},
+                          {'missing': 1},
+                          {}):
+            self.assertEqual(self.brute_filter(condition),
+                             self.rs.filter(condition).dump())
+
+    def test_add_after_filter(self):
+        self.assertEqual(5, len(self.rs.filter({'strategy': {'name': 'LCE'}})))
+        self.rs.add({'strategy': {'name': 'LCE'}, 'seed': 1}, {})
+        self.assertEqual(6, len(self.rs.filter({'strategy': {'name': 'LCE'}})))
+        self.assertEqual(1, len(self.rs.filter({'seed': 1})))
+        self.assertEqual(9, len(self.rs.filter({'seed': None})))
+
+    def test_group_by(self):
+        groups = self.rs.group_by(('cache_size',), {'strategy': {'name': 'LCD'}})
+        self.assertEqual([0.1, 0.2], groups.keys())
+        self.assertEqual(2, len(groups[0.1]))
+        self.assertEqual([0.1, 0.2, None], self.rs.values(('cache_size',)))
+
+    def test_select(self):
+        values = self.rs.select(('HIT', 'MEAN'), ('cache_size',),
+                                {'strategy': {'name': 'LCE'}})
+        self.assertEqual([(0.1, [0.1, 1.1]), (0.2, [0.2, 1.2]), (None, [1])],
+                         values.items())
+
+    def test_pickle(self):
+        self.rs.filter({'cache_size': 0.1})
+        rs = pickle.loads(pickle.dumps(self.rs))
+        self.assertIsNone(rs._index)
+        self.assertEqual(self.rs.filter({'cache_size': 0.1}).dump(),
+                         rs.filter({'cache_size': 0.1}).dump())
+
+
+class TestResultsLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'results.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_add_read(self):
+        log = ResultsLog(self.path, sync_every=2)
+        for i in range(5):
+            log.add({'i': i}, {'m': {'MEAN': i / 2.0}})
+            self.assertEqual(i + 1, len(read_results_log(self.path)))
+        log.close()
+        rs = read_results_log(self.path)
+        self.assertEqual([Tree({'i': i}) for i in range(5)],
+                         [params for params, _ in rs])
+        self.assertEqual(2.0, rs[4][1]['m']['MEAN'])
+
+    def test_truncated_record(self):
+        log = ResultsLog(self.path)
+        log.add({'i': 0}, {'m': 0})
+        log.add({'i': 1}, {'m': 1})
+        log.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        self.assertEqual(1, len(read_results_log(self.path)))
+        log = ResultsLog(self.path, append=True)
+        log.add({'i': 2}, {'m': 2})
+        log.close()
+        rs = read_results_log(self.path)
+        self.assertEqual([Tree({'i': 0}), Tree({'i': 2})],
+                         [params for params, _ in rs])
+        log = ResultsLog(self.path)
+        log.close()
+        self.assertEqual(0, len(read_results_log(self.path)))
+
+
+class TestNpzResults(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'results.npz')
+        self.rs = ResultSet({'seed': 1})
+        for i in range(3):
+            results = {'CACHE_HIT_RATIO': {'MEAN': i / 4.0, 'COUNT': i,
+                                           'PER_NODE': {1: 0.5, 2: i}},
+                       'LATENCY': {'MEAN': 10.0 + i,
+                                   'CDF': (np.arange(i + 1.0),
+                                           np.linspace(0, 1, i + 1))},
+                       'LINK_LOAD': {'PER_LINK': {(1, 2): 0.1 * i}}}
+            if i == 1:
+                results['SAT_RATE'] = {'MEAN': np.float64(0.9)}
+            self.rs.add({'strategy': {'name': 'LCE'}, 'i': i}, results)
+        write_results_npz(self.rs, self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assertTreeEqual(self, expected, actual):
+        expected = expected.paths()
+        actual = actual.paths()
+        self.assertEqual(sorted(expected), sorted(actual))
+        for path, val in expected.items():
+            if isinstance(val, tuple):
+                for v_expected, v_actual in zip(val, actual[path]):
+                    np.testing.assert_array_equal(v_expected, v_actual)
+            else:
+                self.assertEqual(val, actual[path])
+
+    def test_write_read(self):
+        self.assertTrue(os.path.isfile(self.path))
+        rs = read_results_npz(self.path)
+        self.assertEqual({'seed': 1}, rs.attr)
+        self.assertEqual(len(self.rs), len(rs))
+        for (params, results), (exp_params, exp_results) in zip(rs, self.rs):
+            self.assertEqual(exp_params, params)
+            self.assertTreeEqual(exp_results, results)
+        self.assertIsInstance(rs[2][1]['CACHE_HIT_RATIO']['COUNT'], int)
+        self.assertNotIn('SAT_RATE', rs[0][1])
+
+    def test_read_metrics(self):
+        rs = read_results_npz(self.path, [('LATENCY', 'MEAN'), ('LINK_LOAD',)])
+        self.assertEqual([{'LATENCY': {'MEAN': 10.0 + i},
+                           'LINK_LOAD': {'PER_LINK': {(1, 2): 0.1 * i}}}
+                          for i in range(3)],
+                         [results for _, results in rs])
+
+    def test_lazy_reader(self):
+        with NpzResults(self.path) as npz:
+            self.assertEqual(3, len(npz))
+            values, mask = npz.column(('SAT_RATE', 'MEAN'))
+            self.assertEqual([False, True, False], list(mask))
+            self.assertEqual(0.9, values[1])
+            values, mask = npz.column(('LATENCY', 'MEAN'))
+            self.assertEqual([10.0, 11.0, 12.0], list(values))
+            self.assertTrue(mask.all())
+            self.assertEqual({1: 0.5, 2: 2},
+                             npz.chunk(2, ('CACHE_HIT_RATIO', 'PER_NODE')))
+
+    def test_mixed_types(self):
+        rs = ResultSet()
+        for i, (mean, hit) in enumerate([(1, True), (0.5, 2), (2L, False)]):
+            results = {'LATENCY': {'MEAN': mean},
+                       'CACHE_HIT_RATIO': {'HIT': hit}}
+            if i > 0:
+                results['SAT_RATE'] = {'MEAN': [1, 0.5][i - 1]}
+            rs.add({'i': i}, results)
+        write_results_npz(rs, self.path)
+        rs = read_results_npz(self.path)
+        expected = [(1, int, True, bool), (0.5, float, 2, int),
+                    (2L, long, False, bool)]
+        for (_, results), (mean, mean_type, hit, hit_type) in zip(rs, expected):
+            self.assertEqual(mean, results['LATENCY']['MEAN'])
+            self.assertIs(mean_type, type(results['LATENCY']['MEAN']))
+            self.assertEqual(hit, results['CACHE_HIT_RATIO']['HIT'])
+            self.assertIs(hit_type, type(results['CACHE_HIT_RATIO']['HIT']))
+        self.assertNotIn('SAT_RATE', rs[0][1])
+        self.assertIs(int, type(rs[1][1]['SAT_RATE']['MEAN']))
+        self.assertIs(float, type(rs[2][1]['SAT_RATE']['MEAN']))
+        with NpzResults(self.path) as npz:
+            values, mask = npz.column(('SAT_RATE', 'MEAN'))
+            self.assertEqual([False, True, True], list(mask))
+            self.assertEqual([1, 0.5], list(values[mask]))
+
+    def test_long(self):
+        rs = ResultSet()
+        rs.add({'i': 0}, {'CACHE_HIT_RATIO': {'COUNT': 2L ** 70}})
+        write_results_npz(rs, self.path)
+        results = read_results_npz(self.path)[0][1]
+        self.assertEqual(2L ** 70, results['CACHE_HIT_RATIO']['COUNT'])
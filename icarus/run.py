@@ -9,10 +9,11 @@ import logging
 
 from icarus.util import Settings, config_logging
 from icarus.registry import RESULTS_WRITER
+from icarus.results import ResultsLog, read_results_log
 from icarus.orchestration import Orchestrator
 
 
-__all__ = ['run', 'handler']
+__all__ = ['run', 'handler', 'results_log_path']
 
 
 logger = logging.getLogger('main')
@@ -36,16 +37,38 @@ def handler(settings, orch, output, signum=None, frame=None):
         The output file
     """
     logger.error('Received signal %d. Terminating' % signum)
+    if orch.results_log is not None:
+        orch.results_log.close()
     RESULTS_WRITER[settings.RESULTS_FORMAT](orch.results, output)
     logger.info('Saved intermediate results to file %s' % os.path.abspath(output))
     orch.stop()
     sys.exit(-signum)
 
-def run(config_file, output, config_override):
+def results_log_path(output):
+    """Return the path of the log to which results are appended while
+    experiments complete
+    
+    Parameters
+    ----------
+    output : str
+        The file name where results will be saved
+    
+    Returns
+    -------
+    path : str
+        The path of the results log
+    """
+    return output + '.log'
+
+def run(config_file, output, config_override, resume=False):
     """ 
     Run function. It starts the simulator.
     experiments
     
+    The results of each experiment are appended to a log (see
+    *results_log_path*) as soon as the experiment completes, so that they
+    are not lost if the simulator is killed.
+    
     Parameters
     ----------
     config : str
@@ -54,6 +77,9 @@ def run(config_file, output, config_override):
         The file name where results will be saved
     config_override : dict, optional
         Configuration parameters overriding parameters in the file
+    resume : bool, optional
+        If *True*, experiments whose results are in the log of a previous run
+        with the same output file are not executed again
     """
     # Read settings from file and save them in icarus.conf.settings
     settings = Settings()
@@ -68,13 +94,22 @@ def run(config_file, output, config_override):
     settings.freeze()
     # Config logger
     config_logging(settings.LOG_LEVEL)
+    # Read the results of a previous run to resume and open the results log
+    log_path = results_log_path(output)
+    results = None
+    if resume and os.path.isfile(log_path):
+        results = read_results_log(log_path)
+        logger.info('Resuming from %d results in %s'
+                    % (len(results), os.path.abspath(log_path)))
+    results_log = ResultsLog(log_path, append=resume)
     # set up orchestration
-    orch = Orchestrator(settings)
+    orch = Orchestrator(settings, results=results, results_log=results_log)
     for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGQUIT, signal.SIGABRT):
         signal.signal(sig, functools.partial(handler, settings, orch, output))
     logger.info('Launching orchestrator')
     orch.run()
     logger.info('Orchestrator finished')
+    results_log.close()
     results = orch.results
     RESULTS_WRITER[settings.RESULTS_FORMAT](results, output)
     logger.info('Saved results to file %s' % os.path.abspath(output))
@@ -0,0 +1,92 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.") 
+del sys
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import networkx as nx
+import fnss
+
+import icarus.scenarios as topology
+from icarus.execution import ShortestPaths
+from icarus.execution.network import symmetrify_paths
+
+
+class TestShortestPathPredecessors(unittest.TestCase):
+
+    def test_predecessors(self):
+        topo = fnss.ring_topology(5)
+        topo.add_edge(0, 5)
+        nodes = topo.nodes()
+        pred = topology.shortest_path_predecessors(topo, nodes)
+        self.assertEqual((6, 6), pred.shape)
+        for t in nodes:
+            paths = nx.single_source_dijkstra_path(topo, t)
+            for s in nodes:
+                if s == t:
+                    self.assertEqual(-1, pred[t][s])
+                else:
+                    self.assertEqual(paths[s][-2], nodes[pred[t][s]])
+
+
+class TestTopologyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_key(self):
+        cache = topology.TopologyCache(self.cache_dir)
+        self.assertEqual(cache.key('PATH', n=5), cache.key('PATH', n=5))
+        self.assertNotEqual(cache.key('PATH', n=5), cache.key('PATH', n=6))
+        self.assertNotEqual(cache.key('PATH', n=5), cache.key('TREE', n=5))
+
+    def test_get(self):
+        cache = topology.TopologyCache(self.cache_dir)
+        topo, nodes, pred = cache.get('PATH', n=5)
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+        self.assertEqual(5, topo.number_of_nodes())
+        self.assertEqual(sorted(nodes), range(5))
+        self.assertIsInstance(pred, np.memmap)
+        self.assertTrue(np.array_equal(pred,
+                        topology.shortest_path_predecessors(topo, nodes)))
+        # Cached topologies are independent copies
+        fnss.add_stack(topo, 2, 'router', {'cache_size': 3})
+        topo2, nodes2, pred2 = cache.get('PATH', n=5)
+        self.assertEqual(1, len(os.listdir(self.cache_dir)))
+        self.assertNotIn('cache_size', topo2.node[2]['stack'][1])
+        self.assertEqual(nodes, nodes2)
+        self.assertTrue(np.array_equal(pred, pred2))
+        cache.get('PATH', n=6)
+        self.assertEqual(2, len(os.listdir(self.cache_dir)))
+
+    def test_paths(self):
+        # Topologies and paths must be those of an uncached topology, including
+        # the order in which nodes and neighbors are iterated
+        cache = topology.TopologyCache(self.cache_dir)
+        uncached = topology.topology_geant()
+        expected = symmetrify_paths(nx.all_pairs_dijkstra_path(uncached))
+        for _ in range(2):
+            topo, nodes, pred = cache.get('GEANT')
+            self.assertEqual(uncached.nodes(), topo.nodes())
+            self.assertEqual(uncached.edges(), topo.edges())
+            paths = ShortestPaths(topo, nodes=nodes, order=nodes,
+                                  predecessors=pred)
+            for s in uncached.nodes_iter():
+                for t in uncached.nodes_iter():
+                    self.assertEqual(expected[s][t], paths.path(s, t))
+
+    def test_unknown_topology(self):
+        cache = topology.TopologyCache(self.cache_dir)
+        self.assertRaises(ValueError, cache.get, 'NONEXISTENT')
+        self.assertEqual([], os.listdir(self.cache_dir))
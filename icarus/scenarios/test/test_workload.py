@@ -0,0 +1,111 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import os
+import shutil
+import tempfile
+
+import fnss
+
+import icarus.scenarios as workload
+
+
+def star_topology():
+    topology = fnss.star_topology(4)
+    fnss.add_stack(topology, 0, 'router')
+    fnss.add_stack(topology, 1, 'source')
+    for v in (2, 3, 4):
+        fnss.add_stack(topology, v, 'receiver')
+    return topology
+
+
+class TestStationaryWorkload(unittest.TestCase):
+
+    def check_events(self, events, n_warmup, n_measured, n_contents):
+        self.assertEqual(n_warmup + n_measured, len(events))
+        self.assertEqual([False]*n_warmup + [True]*n_measured,
+                         [event['log'] for _, event in events])
+        times = [t for t, _ in events]
+        self.assertEqual(sorted(times), times)
+        for _, event in events:
+            self.assertIn(event['receiver'], (2, 3, 4))
+            self.assertIn(event['content'], range(1, n_contents + 1))
+
+    def test_chunks(self):
+        wl = workload.StationaryWorkload(star_topology(), 10, 0.8,
+                                         n_warmup=30, n_measured=70,
+                                         seed=3, chunk_size=16)
+        events = list(wl)
+        self.check_events(events, 30, 70, 10)
+        self.assertIsInstance(events[0][1]['content'], int)
+        self.assertIsInstance(events[0][0], float)
+
+    def test_chunks_reproducible(self):
+        topology = star_topology()
+        wl_1 = workload.StationaryWorkload(topology, 10, 0.8, beta=0.5,
+                                           n_warmup=30, n_measured=70,
+                                           seed=3, chunk_size=16)
+        wl_2 = workload.StationaryWorkload(topology, 10, 0.8, beta=0.5,
+                                           n_warmup=30, n_measured=70,
+                                           seed=3, chunk_size=16)
+        self.assertEqual(list(wl_1), list(wl_1))
+        self.check_events(list(wl_1), 30, 70, 10)
+        self.assertEqual(list(wl_1), list(wl_2))
+
+    def test_no_chunks(self):
+        wl = workload.StationaryWorkload(star_topology(), 10, 0.8,
+                                         n_warmup=30, n_measured=70,
+                                         seed=3, chunk_size=None)
+        self.check_events(list(wl), 30, 70, 10)
+
+
+class TestColumnarWorkload(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_read(self):
+        topology = star_topology()
+        wl = workload.StationaryWorkload(topology, 10, 0.8, beta=0.5,
+                                         n_warmup=30, n_measured=70,
+                                         seed=3, chunk_size=16)
+        path = os.path.join(self.tmp_dir, 'wl')
+        self.assertEqual(100, workload.write_columnar_workload(wl, path))
+        replay = workload.ColumnarWorkload(topology, path, chunk_size=16)
+        self.assertEqual(wl.contents, replay.contents)
+        self.assertEqual(10, replay.n_contents)
+        self.assertEqual(30, replay.n_warmup)
+        self.assertEqual(70, replay.n_measured)
+        self.assertEqual(list(wl), list(replay))
+
+    def test_n_warmup_measured(self):
+        topology = star_topology()
+        wl = workload.StationaryWorkload(topology, 10, 0.8, n_warmup=30,
+                                         n_measured=70, seed=3)
+        workload.write_columnar_workload(wl, self.tmp_dir)
+        replay = workload.ColumnarWorkload(topology, self.tmp_dir,
+                                           n_warmup=10, n_measured=20)
+        events = list(replay)
+        expected = [(t, dict(e, log=i >= 10))
+                    for i, (t, e) in enumerate(list(wl)[:30])]
+        self.assertEqual(expected, events)
+        self.assertRaises(ValueError, workload.ColumnarWorkload, topology,
+                          self.tmp_dir, n_warmup=50, n_measured=51)
+
+    def test_missing_receiver(self):
+        topology = star_topology()
+        wl = workload.StationaryWorkload(topology, 10, 0.8, n_warmup=30,
+                                         n_measured=70, seed=3)
+        workload.write_columnar_workload(wl, self.tmp_dir)
+        topology.remove_node(2)
+        self.assertRaises(ValueError, workload.ColumnarWorkload, topology,
+                          self.tmp_dir)
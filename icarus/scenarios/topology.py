@@ -4,16 +4,25 @@ experiments.
 """
 from __future__ import division
 
+import os
 from os import path
+import shutil
+import tempfile
+import hashlib
+import cPickle as pickle
 
+import numpy as np
 import networkx as nx
 import fnss
 
-from icarus.registry import register_topology_factory
+from icarus.registry import register_topology_factory, TOPOLOGY_FACTORY
+from icarus.util import all_pairs_order
 
 
 __all__ = [
         'IcnTopology',
+        'TopologyCache',
+        'shortest_path_predecessors',
         'topology_binary_tree',
         'topology_path',
         'topology_geant',
@@ -642,4 +651,157 @@ def topology_generic_rocketfuel_latency(asn, source_ratio, ext_delay, **kwargs):
     for v in routers:
         fnss.add_stack(topology, v, 'router')
     return IcnTopology(topology)
+
+
+def shortest_path_predecessors(topology, nodes=None):
+    """Return the matrix of predecessors of the Dijkstra shortest path trees
+    rooted at each node of a topology.
+    
+    *ShortestPaths* selects from these trees the same symmetric paths of
+    *symmetrify_paths*, provided that it is given the order of nodes returned
+    by *all_pairs_order* on the same topology object.
     
+    Parameters
+    ----------
+    topology : fnss.Topology
+        The topology object
+    nodes : list, optional
+        The nodes of the topology, in the order used to index the matrix. If
+        not specified, the order of *topology.nodes()* is used
+        
+    Returns
+    -------
+    predecessors : 2-d array
+        Matrix such that *predecessors[t][s]* is the index of the node
+        following *s* in the path from *s* to *t* of the tree rooted at *t* or
+        *-1* if there is no such node
+    """
+    if nodes is None:
+        nodes = topology.nodes()
+    index = {v: i for i, v in enumerate(nodes)}
+    predecessors = np.empty((len(nodes), len(nodes)), dtype=np.int32)
+    predecessors.fill(-1)
+    for t in nodes:
+        row = predecessors[index[t]]
+        for s, p in nx.single_source_dijkstra_path(topology, t).iteritems():
+            if len(p) > 1:
+                row[index[s]] = index[p[-2]]
+    return predecessors
+
+
+# Version of the format of entries of TopologyCache, included in their keys so
+# that entries written by previous versions are not reused
+_CACHE_VERSION = 3
+
+
+class TopologyCache(object):
+    """On-disk cache of the shortest paths of topologies generated by
+    topology factories.
+    
+    Each entry is addressed by a digest of the name and arguments of the
+    topology factory and is stored in its own directory, containing the
+    pickled list of nodes and the matrix of shortest path predecessors in
+    NumPy format. The matrix is memory-mapped when loaded, so that its pages
+    are shared by all processes using it.
+    
+    Topologies themselves are not stored but generated again by their factory,
+    because an unpickled topology may iterate nodes and neighbors in a
+    different order, which changes the results of experiments.
+    
+    Entries are written to a temporary directory and then moved to their final
+    location, so that a cache directory can be safely shared by concurrent
+    processes.
+    """
+    
+    def __init__(self, cache_dir):
+        """Constructor
+        
+        Parameters
+        ----------
+        cache_dir : str
+            The directory where entries are stored. It is created if it does
+            not exist
+        """
+        self.cache_dir = path.abspath(cache_dir)
+        if not path.isdir(self.cache_dir):
+            try:
+                os.makedirs(self.cache_dir)
+            except OSError:
+                # Another process may have just created it
+                if not path.isdir(self.cache_dir):
+                    raise
+
+    def key(self, name, **kwargs):
+        """Return the key of the entry of a topology
+        
+        Parameters
+        ----------
+        name : str
+            The name of the topology factory
+        **kwargs : keyworded arguments
+            The arguments of the topology factory
+            
+        Returns
+        -------
+        key : str
+            The key of the entry
+        """
+        spec = repr((_CACHE_VERSION, name, sorted(kwargs.items())))
+        return '%s-%s' % (name, hashlib.sha1(spec).hexdigest())
+
+    def get(self, name, **kwargs):
+        """Return a topology and its shortest path predecessors, computing and
+        storing them if they are not in the cache
+        
+        Parameters
+        ----------
+        name : str
+            The name of the topology factory
+        **kwargs : keyworded arguments
+            The arguments of the topology factory
+            
+        Returns
+        -------
+        topology : fnss.Topology
+            The topology object, generated by its factory at each call, so it
+            can be freely modified by the caller
+        nodes : list
+            The nodes of the topology in the order returned by
+            *all_pairs_order*, which is also the order used to index the
+            predecessors matrix
+        predecessors : 2-d array
+            The read-only matrix of predecessors returned by
+            *shortest_path_predecessors*
+        """
+        if name not in TOPOLOGY_FACTORY:
+            raise ValueError('No topology factory implementation for %s was '
+                             'found.' % name)
+        topology = TOPOLOGY_FACTORY[name](**kwargs)
+        entry_dir = path.join(self.cache_dir, self.key(name, **kwargs))
+        if not path.isdir(entry_dir):
+            self._store(entry_dir, topology)
+        with open(path.join(entry_dir, 'nodes.pickle'), 'rb') as f:
+            nodes = pickle.load(f)
+        predecessors = np.load(path.join(entry_dir, 'predecessors.npy'),
+                               mmap_mode='r')
+        return topology, nodes, predecessors
+
+    def _store(self, entry_dir, topology):
+        """Compute the shortest paths of a topology and store them in the
+        cache
+        """
+        nodes = all_pairs_order(topology)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            with open(path.join(tmp_dir, 'nodes.pickle'), 'wb') as f:
+                pickle.dump(nodes, f, pickle.HIGHEST_PROTOCOL)
+            np.save(path.join(tmp_dir, 'predecessors.npy'),
+                    shortest_path_predecessors(topology, nodes))
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another process stored the same entry in the meantime
+            if not path.isdir(entry_dir):
+                raise
+        finally:
+            if path.isdir(tmp_dir):
+                shutil.rmtree(tmp_dir)
@@ -9,9 +9,14 @@ method that is called to return a new event.
 Each workload must expose the 'contents' attribute which is an iterable of
 all content identifiers. This is need for content placement
 """
+import os
 import random
 import csv
+import numbers
+import array
+import cPickle as pickle
 
+import numpy as np
 import networkx as nx
 
 from icarus.tools import TruncatedZipfDist
@@ -20,7 +25,9 @@ from icarus.registry import register_workload
 __all__ = [
         'StationaryWorkload',
         'GlobetraffWorkload',
-        'TraceDrivenWorkload'
+        'TraceDrivenWorkload',
+        'ColumnarWorkload',
+        'write_columnar_workload'
            ]
 
 
@@ -65,6 +72,13 @@ class StationaryWorkload(object):
         not logged)
     n_measured : int
         The number of logged requests after the warmup
+    seed : int, optional
+        The seed used for random number generation
+    chunk_size : int, optional
+        The number of events whose inter-arrival times, receivers and contents
+        are drawn at once as NumPy arrays. Each iteration restarts from
+        *seed*, so the same seed always yields the same sequence. If None or
+        0, events are drawn one at a time from the *random* module instead
     
     Returns
     -------
@@ -74,7 +88,8 @@ class StationaryWorkload(object):
         dictionary of event attributes.
     """
     def __init__(self, topology, n_contents, alpha, beta=0, rate=12.0,
-                    n_warmup=10**5, n_measured=4*10**5, seed=None, **kwargs):
+                    n_warmup=10**5, n_measured=4*10**5, seed=None,
+                    chunk_size=2**16, **kwargs):
         if alpha < 0:
             raise ValueError('alpha must be positive')
         if beta < 0:
@@ -88,6 +103,8 @@ class StationaryWorkload(object):
         self.rate = rate
         self.n_warmup = n_warmup
         self.n_measured = n_measured
+        self.seed = seed
+        self.chunk_size = chunk_size
         random.seed(seed)
         self.beta = beta
         if beta != 0:
@@ -96,6 +113,43 @@ class StationaryWorkload(object):
             self.receiver_dist = TruncatedZipfDist(beta, len(self.receivers))
         
     def __iter__(self):
+        if self.chunk_size:
+            return self._iter_chunks()
+        return self._iter_events()
+
+    def _rng(self):
+        """Return a NumPy random number generator seeded with *seed*
+        """
+        seed = self.seed
+        if seed is not None and not isinstance(seed, numbers.Integral):
+            seed = hash(seed)
+        if seed is not None:
+            seed &= 0xffffffff
+        return np.random.RandomState(seed)
+
+    def _iter_chunks(self):
+        rng = self._rng()
+        n_events = self.n_warmup + self.n_measured
+        req_counter = 0
+        t_event = 0.0
+        while req_counter < n_events:
+            size = min(self.chunk_size, n_events - req_counter)
+            times = t_event + np.cumsum(rng.exponential(1.0/self.rate, size))
+            if self.beta == 0:
+                receivers = rng.randint(0, len(self.receivers), size)
+            else:
+                receivers = self.receiver_dist.rvs(size, rng) - 1
+            contents = self.zipf.rvs(size, rng)
+            for t_event, receiver, content in zip(times.tolist(),
+                                                  receivers.tolist(),
+                                                  contents.tolist()):
+                log = (req_counter >= self.n_warmup)
+                event = {'receiver': self.receivers[receiver],
+                         'content': content, 'log': log}
+                yield (t_event, event)
+                req_counter += 1
+
+    def _iter_events(self):
         req_counter = 0
         t_event = 0.0
         while req_counter < self.n_warmup + self.n_measured:
@@ -228,6 +282,12 @@ class TraceDrivenWorkload(object):
         Iterator of events. Each event is a 2-tuple where the first element is
         the timestamp at which the event occurs and the second element is a
         dictionary of event attributes.
+    
+    Notes
+    -----
+    The requests file is read in blocks of *buffering* bytes, each read by
+    opening the file again, so that iterators copied by forking a process
+    (e.g. by *fork_experiments*) do not share a file offset.
     """
     def __init__(self, topology, reqs_file, contents_file, n_contents,
                  n_warmup, n_measured, rate=12.0, beta=0, **kwargs):
@@ -258,17 +318,169 @@ class TraceDrivenWorkload(object):
     def __iter__(self):
         req_counter = 0
         t_event = 0.0
-        with open(self.reqs_file, 'r', buffering=self.buffering) as f:
-            for content in f:
-                t_event += (random.expovariate(self.rate))
-                if self.beta == 0:
-                    receiver = random.choice(self.receivers)
-                else:
-                    receiver = self.receivers[self.receiver_dist.rv()-1]
+        for content in _read_lines(self.reqs_file, self.buffering):
+            t_event += (random.expovariate(self.rate))
+            if self.beta == 0:
+                receiver = random.choice(self.receivers)
+            else:
+                receiver = self.receivers[self.receiver_dist.rv()-1]
+            log = (req_counter >= self.n_warmup)
+            event = {'receiver': receiver, 'content': content, 'log': log}
+            yield (t_event, event)
+            req_counter += 1
+            if(req_counter >= self.n_warmup + self.n_measured):
+                raise StopIteration()
+        raise ValueError("Trace did not contain enough requests")
+
+
+def _read_lines(path, block_size):
+    """Iterate over the lines of a text file, read in blocks of about
+    *block_size* bytes.
+    
+    The file is opened again to read each block, at the offset where the
+    previous block ended. Processes forked while iterating hence read the
+    remaining lines independently, whereas they would share the offset of a
+    file opened before forking.
+    """
+    offset = 0
+    while True:
+        with open(path, 'r') as f:
+            f.seek(offset)
+            lines = f.readlines(block_size)
+            offset = f.tell()
+        if not lines:
+            return
+        for line in lines:
+            yield line
+
+
+@register_workload('COLUMNAR')
+class ColumnarWorkload(object):
+    """Replay requests from a columnar workload directory written by
+    *write_columnar_workload*.
+    
+    Timestamps, receivers and contents are stored as packed NumPy arrays which
+    are memory-mapped rather than parsed, so that all experiments of a sweep
+    can replay exactly the same request sequence at negligible cost.
+    
+    Parameters
+    ----------
+    topology : fnss.Topology
+        The topology to which the workload refers. It must have all receivers
+        referenced by the workload
+    path : str
+        The path of the workload directory
+    n_warmup : int, optional
+        The number of warmup requests (i.e. requests executed to fill cache but
+        not logged). If not specified, the number of warmup requests of the
+        stored workload is used
+    n_measured : int, optional
+        The number of logged requests after the warmup. If not specified, all
+        remaining requests of the stored workload are replayed
+    chunk_size : int, optional
+        The number of events read from the arrays at once
+        
+    Returns
+    -------
+    events : iterator
+        Iterator of events. Each event is a 2-tuple where the first element is
+        the timestamp at which the event occurs and the second element is a
+        dictionary of event attributes.
+    """
+    def __init__(self, topology, path, n_warmup=None, n_measured=None,
+                 chunk_size=2**16, **kwargs):
+        """Constructor"""
+        with open(os.path.join(path, 'workload.pickle'), 'rb') as f:
+            meta = pickle.load(f)
+        for v in meta['receivers']:
+            if v not in topology.node or \
+                    topology.node[v]['stack'][0] != 'receiver':
+                raise ValueError('Node %s is not a receiver of the topology'
+                                 % str(v))
+        self.receivers = meta['receivers']
+        self.contents = meta['contents']
+        self.n_contents = meta['n_contents']
+        self.times = np.load(os.path.join(path, 'times.npy'), mmap_mode='r')
+        self.receiver_index = np.load(os.path.join(path, 'receivers.npy'),
+                                      mmap_mode='r')
+        self.content_ids = np.load(os.path.join(path, 'contents.npy'),
+                                   mmap_mode='r')
+        n_events = len(self.times)
+        self.n_warmup = meta['n_warmup'] if n_warmup is None else n_warmup
+        self.n_measured = n_events - self.n_warmup if n_measured is None \
+                          else n_measured
+        if self.n_warmup + self.n_measured > n_events:
+            raise ValueError("Workload did not contain enough requests")
+        self.chunk_size = chunk_size
+
+    def __iter__(self):
+        req_counter = 0
+        n_events = self.n_warmup + self.n_measured
+        for start in range(0, n_events, self.chunk_size):
+            end = min(start + self.chunk_size, n_events)
+            for t_event, receiver, content in zip(
+                            self.times[start:end].tolist(),
+                            self.receiver_index[start:end].tolist(),
+                            self.content_ids[start:end].tolist()):
                 log = (req_counter >= self.n_warmup)
-                event = {'receiver': receiver, 'content': content, 'log': log}
+                event = {'receiver': self.receivers[receiver],
+                         'content': content, 'log': log}
                 yield (t_event, event)
                 req_counter += 1
-                if(req_counter >= self.n_warmup + self.n_measured):
-                    raise StopIteration()
-            raise ValueError("Trace did not contain enough requests")
+
+
+def write_columnar_workload(workload, path):
+    """Write all events of a workload to a directory that can be replayed by
+    *ColumnarWorkload*
+    
+    Parameters
+    ----------
+    workload : iterable
+        Any workload object, e.g. an instance of a registered workload class.
+        Content identifiers must be integers
+    path : str
+        The path of the workload directory. It is created if it does not
+        exist and existing files are overwritten
+    
+    Returns
+    -------
+    n_events : int
+        The number of events written
+    """
+    times = array.array('d')
+    receiver_index = array.array('l')
+    content_ids = array.array('l')
+    receivers = []
+    receiver_ids = {}
+    n_warmup = 0
+    for t_event, event in workload:
+        receiver = event['receiver']
+        if receiver not in receiver_ids:
+            receiver_ids[receiver] = len(receivers)
+            receivers.append(receiver)
+        if not isinstance(event['content'], numbers.Integral):
+            raise ValueError('Columnar workloads require integer content '
+                             'identifiers')
+        if not event.get('log', True):
+            if n_warmup != len(times):
+                raise ValueError('Warmup requests must precede all logged '
+                                 'requests')
+            n_warmup += 1
+        times.append(float(t_event))
+        receiver_index.append(receiver_ids[receiver])
+        content_ids.append(event['content'])
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    np.save(os.path.join(path, 'times.npy'),
+            np.frombuffer(times, dtype=np.float64))
+    np.save(os.path.join(path, 'receivers.npy'),
+            np.frombuffer(receiver_index, dtype=np.int_).astype(np.int32))
+    np.save(os.path.join(path, 'contents.npy'),
+            np.frombuffer(content_ids, dtype=np.int_).astype(np.int64))
+    meta = {'receivers': receivers,
+            'contents': list(workload.contents),
+            'n_contents': workload.n_contents,
+            'n_warmup': n_warmup}
+    with open(os.path.join(path, 'workload.pickle'), 'wb') as f:
+        pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return len(times)
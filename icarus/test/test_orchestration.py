@@ -0,0 +1,305 @@
+import sys
+if sys.version_info[:2] >= (2, 7):
+    import unittest
+else:
+    try:
+        import unittest2 as unittest
+    except ImportError:
+        raise ImportError("The unittest2 package is needed to run the tests.")
+del sys
+import copy
+import collections
+import os
+import random
+import shutil
+import tempfile
+
+import icarus.orchestration as orchestration
+from icarus.results import ResultsLog, read_results_log
+from icarus.util import Settings, Tree
+
+
+def base_settings():
+    """Return settings running a small experiment queue
+    """
+    settings = Settings()
+    settings.PARALLEL_EXECUTION = False
+    settings.N_PROCESSES = 1
+    settings.N_REPLICATIONS = 1
+    settings.DATA_COLLECTORS = ['CACHE_HIT_RATIO', 'LATENCY']
+    queue = collections.deque()
+    experiment = Tree()
+    experiment['topology'] = {'name': 'PATH', 'n': 6}
+    experiment['workload'] = {'name': 'STATIONARY', 'n_contents': 20,
+                              'alpha': 0.8, 'n_warmup': 50,
+                              'n_measured': 100, 'seed': 1}
+    experiment['cache_placement'] = {'name': 'UNIFORM', 'network_cache': 0.2}
+    experiment['content_placement']['name'] = 'UNIFORM'
+    experiment['cache_policy']['name'] = 'LRU'
+    experiment['strategy']['name'] = 'LCE'
+    experiment['warmup_strategy']['name'] = 'LCE'
+    for n in (6, 6, 7):
+        e = copy.deepcopy(experiment)
+        e['topology']['n'] = n
+        queue.append(e)
+    settings.EXPERIMENT_QUEUE = queue
+    return settings
+
+
+class TestPrepareTopologies(unittest.TestCase):
+
+    def setUp(self):
+        orchestration._PREPARED_TOPOLOGIES.clear()
+
+    def tearDown(self):
+        orchestration._PREPARED_TOPOLOGIES.clear()
+
+    def test_prepare_topologies(self):
+        settings = base_settings()
+        orchestration.prepare_topologies(settings, settings.EXPERIMENT_QUEUE)
+        self.assertEqual(2, len(orchestration._PREPARED_TOPOLOGIES))
+        key = orchestration._topology_key('PATH', {'n': 6})
+        nodes, predecessors = orchestration._PREPARED_TOPOLOGIES[key]
+        self.assertEqual(range(6), sorted(nodes))
+        self.assertEqual((6, 6), predecessors.shape)
+
+    def run_queue(self, settings):
+        results = []
+        for i, experiment in enumerate(settings.EXPERIMENT_QUEUE):
+            random.seed(i)
+            results.append(orchestration.run_scenario(settings, experiment,
+                                                      i + 1, 3)[1])
+        return results
+
+    def geant_settings(self):
+        settings = base_settings()
+        # GEANT has many equal-cost paths, so prepared or cached shortest
+        # paths must break ties as if paths were computed on an unprepared
+        # topology
+        experiment = copy.deepcopy(settings.EXPERIMENT_QUEUE[0])
+        experiment['topology'] = {'name': 'GEANT'}
+        settings.EXPERIMENT_QUEUE.append(experiment)
+        for experiment in settings.EXPERIMENT_QUEUE:
+            experiment['content_placement']['seed'] = 1
+        return settings
+
+    def test_run_scenario(self):
+        settings = self.geant_settings()
+        expected = self.run_queue(settings)
+        orchestration.prepare_topologies(settings, settings.EXPERIMENT_QUEUE)
+        self.assertEqual(3, len(orchestration._PREPARED_TOPOLOGIES))
+        results = self.run_queue(settings)
+        for r in results:
+            self.assertIn('CACHE_HIT_RATIO', r)
+        self.assertEqual(expected, results)
+
+    def test_run_scenario_cache_dir(self):
+        settings = self.geant_settings()
+        expected = self.run_queue(settings)
+        settings.TOPOLOGY_CACHE_DIR = tempfile.mkdtemp()
+        try:
+            # The first run stores topologies, the second one loads them
+            for _ in range(2):
+                self.assertEqual(expected, self.run_queue(settings))
+            self.assertEqual(3, len(os.listdir(settings.TOPOLOGY_CACHE_DIR)))
+        finally:
+            shutil.rmtree(settings.TOPOLOGY_CACHE_DIR)
+
+    def test_run_scenario_prepared_cache_dir(self):
+        settings = self.geant_settings()
+        expected = self.run_queue(settings)
+        settings.TOPOLOGY_CACHE_DIR = tempfile.mkdtemp()
+        try:
+            orchestration.prepare_topologies(settings,
+                                             settings.EXPERIMENT_QUEUE)
+            self.assertEqual(3, len(orchestration._PREPARED_TOPOLOGIES))
+            self.assertEqual(3, len(os.listdir(settings.TOPOLOGY_CACHE_DIR)))
+            self.assertEqual(expected, self.run_queue(settings))
+        finally:
+            shutil.rmtree(settings.TOPOLOGY_CACHE_DIR)
+
+
+class TestWarmupKey(unittest.TestCase):
+
+    def test_warmup_key(self):
+        experiment = base_settings().EXPERIMENT_QUEUE[0]
+        key = orchestration._warmup_key(experiment)
+        e = copy.deepcopy(experiment)
+        e['strategy']['name'] = 'LCD'
+        e['workload']['n_measured'] = 1000
+        e['desc'] = 'Another experiment'
+        self.assertEqual(key, orchestration._warmup_key(e))
+        e['warmup_strategy']['name'] = 'LCD'
+        self.assertNotEqual(key, orchestration._warmup_key(e))
+        e = copy.deepcopy(experiment)
+        e['workload']['n_warmup'] = 60
+        self.assertNotEqual(key, orchestration._warmup_key(e))
+
+
+class TestWarmupSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_replications(self, seed, fork=False, snapshot=True):
+        settings = base_settings()
+        settings.N_REPLICATIONS = 3
+        if snapshot:
+            settings.WARMUP_SNAPSHOT_DIR = self.tmp_dir
+        settings.FORK_AFTER_WARMUP = fork
+        experiment = settings.EXPERIMENT_QUEUE[0]
+        experiment['workload']['n_measured'] = 1000
+        experiment['workload']['seed'] = seed
+        settings.EXPERIMENT_QUEUE = [experiment]
+        orch = orchestration.Orchestrator(settings)
+        orch.run()
+        self.assertEqual(3, orch.n_success)
+        return [results['CACHE_HIT_RATIO']['MEAN']
+                for _, results in orch.results]
+
+    def test_unseeded_workload(self):
+        # Without a workload seed, each replication runs its own warm-up and
+        # no snapshot is saved
+        hit_ratios = self.run_replications(None)
+        # Two replications may still have the same hit ratio by chance
+        self.assertGreater(len(set(hit_ratios)), 1)
+        self.assertEqual([], os.listdir(self.tmp_dir))
+
+    def check_replications(self, fork):
+        expected = self.run_replications(1, fork, False)
+        # Each replication saves the state after its own warm-up and then
+        # restores it
+        for _ in range(2):
+            self.assertEqual(expected, self.run_replications(1, fork))
+            self.assertEqual(3, len(os.listdir(self.tmp_dir)))
+
+    def test_replications(self):
+        self.check_replications(False)
+
+    def test_replications_groups(self):
+        self.check_replications(True)
+
+
+class TestForkAfterWarmup(unittest.TestCase):
+
+    def settings(self):
+        settings = base_settings()
+        queue = collections.deque()
+        for strategy in ('LCE', 'LCD', 'PROB_CACHE'):
+            e = copy.deepcopy(settings.EXPERIMENT_QUEUE[0])
+            e['content_placement']['seed'] = 1
+            e['strategy']['name'] = strategy
+            e['desc'] = strategy
+            queue.append(e)
+        settings.EXPERIMENT_QUEUE = queue
+        return settings
+
+    def test_group_experiments(self):
+        settings = base_settings()
+        groups = orchestration._group_experiments(settings.EXPERIMENT_QUEUE)
+        self.assertEqual([2, 1], [len(g) for g in groups])
+        groups = orchestration._group_experiments(
+                                    self.settings().EXPERIMENT_QUEUE)
+        self.assertEqual([3], [len(g) for g in groups])
+
+    def test_run_scenario_group(self):
+        settings = self.settings()
+        settings.FORK_MAX_CHILDREN = 2
+        queue = list(settings.EXPERIMENT_QUEUE)
+        results = orchestration.run_scenario_group(settings, queue,
+                                                   [1, 2, 3], 3)
+        self.assertEqual(3, len(results))
+        for i, (params, res, duration) in enumerate(results):
+            expected = orchestration.run_scenario(settings, queue[i], i + 1, 3)
+            self.assertEqual(queue[i], params)
+            self.assertEqual(expected[1], res)
+
+    def test_orchestrator(self):
+        settings = self.settings()
+        settings.FORK_AFTER_WARMUP = True
+        orch = orchestration.Orchestrator(settings)
+        orch.run()
+        self.assertEqual(3, orch.n_success)
+        self.assertEqual(0, orch.n_fail)
+        self.assertEqual(3, len(orch.results))
+
+
+class TestResume(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def check_resume(self, make_settings):
+        # Each run reads the configuration again
+        settings = make_settings()
+        settings.N_REPLICATIONS = 2
+        path = os.path.join(self.tmp_dir, 'results.log')
+        log = ResultsLog(path)
+        orch = orchestration.Orchestrator(settings, results_log=log)
+        orch.run()
+        log.close()
+        self.assertEqual(6, len(read_results_log(path)))
+        # Only the first two results survived the interruption of a run
+        log = ResultsLog(path)
+        for params, results in list(orch.results)[:2]:
+            log.add(params, results)
+        log.close()
+        completed = read_results_log(path)
+        settings = make_settings()
+        settings.N_REPLICATIONS = 2
+        log = ResultsLog(path, append=True)
+        orch = orchestration.Orchestrator(settings, results=completed,
+                                          results_log=log)
+        orch.run()
+        log.close()
+        self.assertEqual(4, orch.n_success)
+        self.assertEqual(6, len(orch.results))
+        self.assertEqual(6, len(read_results_log(path)))
+        counts = collections.Counter(orchestration._experiment_key(params)
+                                     for params, _ in orch.results)
+        self.assertEqual([2, 4], sorted(counts.values()))
+        return settings
+
+    def test_resume(self):
+        self.check_resume(base_settings)
+
+    def test_resume_groups(self):
+        def make_settings():
+            settings = base_settings()
+            settings.FORK_AFTER_WARMUP = True
+            return settings
+        self.check_resume(make_settings)
+
+    def rsn_settings(self):
+        settings = base_settings()
+        for experiment in settings.EXPERIMENT_QUEUE:
+            del experiment['cache_placement']
+            experiment['joint_cache_rsn_placement'] = {
+                        'name': 'CACHE_ALL_RSN_ALL', 'network_cache': 0.2,
+                        'network_rsn': 0.4}
+        return settings
+
+    def test_resume_rsn_placement(self):
+        # The RSN/cache ratio derived while setting up experiments is stored
+        # with their results but must not prevent matching them
+        settings = self.check_resume(self.rsn_settings)
+        for params, _ in read_results_log(os.path.join(self.tmp_dir,
+                                                       'results.log')):
+            self.assertEqual(2.0, params['joint_cache_rsn_placement']
+                                        ['rsn_cache_ratio'])
+        for experiment in settings.EXPERIMENT_QUEUE:
+            self.assertNotIn('rsn_cache_ratio',
+                             experiment['joint_cache_rsn_placement'])
+
+    def test_resume_rsn_placement_groups(self):
+        def make_settings():
+            settings = self.rsn_settings()
+            settings.FORK_AFTER_WARMUP = True
+            return settings
+        self.check_resume(make_settings)
@@ -17,6 +17,7 @@ __all__ = [
        'proportions_confidence_interval',
        'cdf',
        'pdf',
+       'QuantileSketch',
            ]
 
 
@@ -89,6 +90,28 @@ class DiscreteDist(object):
         # random value. Worst case time complexity is O(log2(n))
         return int(np.searchsorted(self._cdf, rv) + 1)
 
+    def rvs(self, size, rng=None):
+        """Get an array of random values from the distribution
+
+        Parameters
+        ----------
+        size : int
+            The number of values to draw
+        rng : numpy.random.RandomState, optional
+            The random number generator to use. If not specified, the uniform
+            samples are drawn from the *random* module like in *rv*
+
+        Returns
+        -------
+        rvs : Numpy array
+            Array of *size* random values in {1, ..., N}
+        """
+        if rng is None:
+            rv = np.array([random.random() for _ in range(size)])
+        else:
+            rv = rng.random_sample(size)
+        return np.searchsorted(self._cdf, rv) + 1
+
 
 class TruncatedZipfDist(DiscreteDist):
     """Implements a truncated Zipf distribution, i.e. a Zipf distribution with
@@ -258,4 +281,141 @@ def pdf(data, n_bins):
             pdf[section] += 1
     # Normalize pdf
     pdf = (pdf * n_bins) / (np.sum(pdf) * (data_max - data_min))
-    return x, pdf
\ No newline at end of file
+    return x, pdf
+
+
+class QuantileSketch(object):
+    """Mergeable sketch of the distribution of non-negative 1D data, from
+    which quantiles and the CDF can be computed with bounded relative error.
+    
+    Values are counted in buckets whose boundaries grow geometrically, so that
+    all values of a bucket are within a relative error *rel_err* from its
+    representative value. Memory is therefore proportional to the logarithm
+    of the ratio between the largest and smallest values rather than to the
+    number of values. Values equal to 0 are counted separately.
+    
+    Sketches with the same relative error can be merged, e.g. to compute the
+    CDF of the values of all replications of an experiment, by adding them,
+    e.g. *sum(sketches)*.
+    """
+    
+    def __init__(self, rel_err=0.01):
+        """Constructor
+        
+        Parameters
+        ----------
+        rel_err : float, optional
+            The maximum relative error of quantiles
+        """
+        if not 0 < rel_err < 1:
+            raise ValueError('rel_err must be greater than 0 and smaller '
+                             'than 1')
+        self.rel_err = rel_err
+        self._gamma = (1 + rel_err)/(1 - rel_err)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = collections.defaultdict(int)
+        self._zero_count = 0
+        self.count = 0
+    
+    def __len__(self):
+        return self.count
+    
+    def add(self, value, count=1):
+        """Add a value to the sketch
+        
+        Parameters
+        ----------
+        value : float
+            The value, which must be non-negative
+        count : int, optional
+            The number of occurrences of the value
+        """
+        if value > 0:
+            self._buckets[int(math.ceil(math.log(value)/self._log_gamma))] \
+                    += count
+        elif value == 0:
+            self._zero_count += count
+        else:
+            raise ValueError('value must be non-negative')
+        self.count += count
+    
+    def merge(self, sketch):
+        """Add all values of another sketch to this sketch
+        
+        Parameters
+        ----------
+        sketch : QuantileSketch
+            The sketch to merge, which must have the same relative error
+        """
+        if sketch.rel_err != self.rel_err:
+            raise ValueError('Only sketches with the same relative error can '
+                             'be merged')
+        for i, count in sketch._buckets.iteritems():
+            self._buckets[i] += count
+        self._zero_count += sketch._zero_count
+        self.count += sketch.count
+    
+    def __add__(self, sketch):
+        merged = QuantileSketch(self.rel_err)
+        merged.merge(self)
+        merged.merge(sketch)
+        return merged
+    
+    def __radd__(self, other):
+        # Makes sum(sketches) work, since sum starts from 0
+        if other == 0:
+            return self + QuantileSketch(self.rel_err)
+        return NotImplemented
+    
+    def _values(self):
+        """Return the representative values of all non-empty buckets, in
+        increasing order, and their counts
+        """
+        indices = sorted(self._buckets)
+        values = [2*self._gamma**i/(self._gamma + 1) for i in indices]
+        counts = [self._buckets[i] for i in indices]
+        if self._zero_count > 0:
+            values.insert(0, 0.0)
+            counts.insert(0, self._zero_count)
+        return np.array(values), np.array(counts, dtype=float)
+    
+    def quantile(self, q):
+        """Return an estimate of a quantile of the values added
+        
+        Parameters
+        ----------
+        q : float
+            The quantile, between 0 and 1
+        
+        Returns
+        -------
+        value : float
+            The estimated value of the quantile
+        """
+        if self.count < 1:
+            raise TypeError("the sketch must have at least one value")
+        if not 0 <= q <= 1:
+            raise ValueError('q must be between 0 and 1')
+        values, counts = self._values()
+        rank = q*(self.count - 1)
+        i = np.searchsorted(np.cumsum(counts), rank, side='right')
+        return values[min(i, len(values) - 1)]
+    
+    def cdf(self):
+        """Return the estimated CDF of the values added, in the same format
+        returned by *cdf*
+        
+        Returns
+        -------
+        x : array
+            The representative values of the buckets, sorted 
+        cdf : array
+            The CDF of data.
+            More specifically cdf[i] is the probability that x < x[i]
+        """
+        if self.count < 1:
+            raise TypeError("the sketch must have at least one value")
+        values, counts = self._values()
+        cdf = np.cumsum(counts)/self.count
+        cdf[-1] = 1.0 # Prevent rounding errors 
+        return values, cdf
@@ -31,6 +31,14 @@ class TestDiscreteDist(unittest.TestCase):
         pdf_1 = np.array([0.4, 0.6])
         pdf_2 = stats.DiscreteDist(pdf_1).pdf
         self.assertTrue(all(pdf_1[i] == pdf_2[i] for i in range(len(pdf_1))))
+
+    def test_rvs(self):
+        dist = stats.DiscreteDist(np.array([0.0, 0.5, 0.5]))
+        rvs_1 = dist.rvs(1000, np.random.RandomState(1))
+        rvs_2 = dist.rvs(1000, np.random.RandomState(1))
+        self.assertEqual(1000, len(rvs_1))
+        self.assertEqual(list(rvs_1), list(rvs_2))
+        self.assertEqual(set([2, 3]), set(rvs_1))
         
 class TestTruncatedZipfDist(unittest.TestCase):
 
@@ -85,4 +93,44 @@ class TestCdf(unittest.TestCase):
             self.assertAlmostEqual(x[i], exp_x[i])
             self.assertAlmostEqual(cdf[i], exp_cdf[i])
         
-        
\ No newline at end of file
+        
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def test_quantile_error(self):
+        data = np.random.RandomState(0).lognormal(3, 1, 5000)
+        sketch = stats.QuantileSketch(0.01)
+        for x in data:
+            sketch.add(x)
+        self.assertEqual(5000, len(sketch))
+        sorted_data = np.sort(data)
+        for q in (0, 0.1, 0.5, 0.9, 0.99, 1):
+            exact = sorted_data[int(q*(len(data) - 1))]
+            self.assertLessEqual(abs(sketch.quantile(q) - exact), 0.0101*exact)
+
+    def test_cdf(self):
+        sketch = stats.QuantileSketch(0.01)
+        for x in [0, 0, 1, 1, 1, 10, 10, 10, 10, 10]:
+            sketch.add(x)
+        x, cdf = sketch.cdf()
+        self.assertEqual(3, len(x))
+        self.assertEqual(0, x[0])
+        self.assertAlmostEqual(1, x[1], delta=0.01)
+        self.assertAlmostEqual(10, x[2], delta=0.1)
+        self.assertEqual([0.2, 0.5, 1.0], list(cdf))
+        self.assertRaises(ValueError, sketch.add, -1)
+        self.assertRaises(TypeError, stats.QuantileSketch().cdf)
+
+    def test_merge(self):
+        sketches = [stats.QuantileSketch(0.02) for _ in range(3)]
+        union = stats.QuantileSketch(0.02)
+        for i, x in enumerate(np.random.RandomState(1).exponential(5, 300)):
+            sketches[i % 3].add(x)
+            union.add(x)
+        merged = sum(sketches)
+        self.assertEqual(300, len(merged))
+        for x_1, x_2 in zip(union.cdf(), merged.cdf()):
+            self.assertEqual(list(x_1), list(x_2))
+        self.assertEqual(100, len(sketches[0]))
+        self.assertRaises(ValueError, sketches[0].merge,
+                          stats.QuantileSketch(0.01))
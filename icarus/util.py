@@ -20,6 +20,7 @@ __all__ = [
         'can_import',
         'overlay_betweenness_centrality',
         'path_links',
+        'all_pairs_order',
         'multicast_tree',
            ]
 
@@ -662,6 +663,30 @@ def path_links(path):
     return [(path[i], path[i+1]) for i in range(len(path)-1)]
 
 
+def all_pairs_order(topology):
+    """Return the nodes of a topology in the order in which they are iterated
+    in the dictionary of paths returned by *nx.all_pairs_dijkstra_path*.
+    
+    This order determines which shortest path is selected for each pair of
+    nodes when all-pairs shortest paths are made symmetric: the path between
+    two nodes is taken from the Dijkstra shortest path tree rooted at the node
+    coming later in this order.
+    
+    Parameters
+    ----------
+    topology : Topology
+        The topology object
+        
+    Returns
+    -------
+    nodes : list
+        The ordered list of nodes
+    """
+    # The dictionary is built in the same way as all_pairs_dijkstra_path
+    # does, so that its keys are iterated in the same order
+    return list({v: None for v in topology})
+
+
 def multicast_tree(shortest_paths, source, destinations):
     """Return a multicast tree expressed as a set of edges, without any
     ordering
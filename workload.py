@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""This script writes the events of a registered workload to a columnar
+workload directory, which can then be replayed by the COLUMNAR workload.
+
+The topology passed to the workload is built by the specified topology
+factory, so the COLUMNAR workload must be used with the same topology.
+Parameters of the topology and of the workload are passed as key=value pairs,
+where values are parsed as Python literals if possible and as strings
+otherwise.
+"""
+import sys
+from os import path
+import argparse
+import ast
+
+
+def parse_params(params):
+    """Parse a list of key=value strings into a dictionary
+    """
+    d = {}
+    for param in params or []:
+        k, v = param.split("=", 1)
+        try:
+            d[k] = ast.literal_eval(v)
+        except (ValueError, SyntaxError):
+            d[k] = v
+    return d
+
+
+def main():
+    src_dir = path.abspath(path.dirname(__file__))
+    sys.path.insert(0, src_dir)
+    from icarus.registry import TOPOLOGY_FACTORY, WORKLOAD
+    from icarus.scenarios import write_columnar_workload
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-t", "--topology", dest="topology", required=True,
+                        help='the name of the topology factory')
+    parser.add_argument("-T", "--topology-param", dest="topology_params",
+                        action="append", required=False,
+                        help='key=value parameter of the topology factory')
+    parser.add_argument("-w", "--workload", dest="workload", required=True,
+                        help='the name of the workload')
+    parser.add_argument("-W", "--workload-param", dest="workload_params",
+                        action="append", required=False,
+                        help='key=value parameter of the workload')
+    parser.add_argument("output",
+                        help="the directory on which the workload will be saved")
+    args = parser.parse_args()
+    if args.topology not in TOPOLOGY_FACTORY:
+        parser.error('No topology factory named %s was found' % args.topology)
+    if args.workload not in WORKLOAD:
+        parser.error('No workload named %s was found' % args.workload)
+    topology = TOPOLOGY_FACTORY[args.topology](
+                                **parse_params(args.topology_params))
+    workload = WORKLOAD[args.workload](topology,
+                                       **parse_params(args.workload_params))
+    n_events = write_columnar_workload(workload, args.output)
+    print('Wrote %d events to %s' % (n_events, args.output))
+
+
+if __name__ == "__main__":
+    main()